@@ -0,0 +1,94 @@
+"""
+Caché en proceso para respuestas que dependen de pocas tablas.
+
+Cada entrada guarda las versiones de `table_versions` con las que se calculó.
+Antes de servirla se vuelven a leer esas versiones (una búsqueda por clave
+primaria); si alguna tabla ha cambiado desde entonces la entrada se recalcula.
+Como los contadores viven en la base de datos y los incrementan los triggers,
+ningún worker puede servir un valor anterior a una escritura ya confirmada.
+
+Las claves incluyen el alumno y, en algunos agregados, el día; para que la
+caché no crezca sin límite se guardan como mucho `VERSIONED_CACHE_SIZE`
+entradas y se descarta la usada hace más tiempo (las de días pasados no se
+vuelven a pedir y son las primeras en salir).
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import statements
+from app.database import current_learner
+
+VERSIONED_CACHE_SIZE = int(os.getenv("VERSIONED_CACHE_SIZE", "1024"))
+
+
+def get_table_stamps(db: Session, tables: Sequence[str]) -> Tuple[Tuple[int, ...], Optional[str]]:
+    """
+    Devuelve las versiones actuales de `tables` (en el mismo orden) y la fecha
+    de la última escritura en cualquiera de ellas (`updated_at`, en UTC).
+    """
+    rows = db.execute(statements.TABLE_STAMPS, {"tables": list(tables)}).fetchall()
+    versions = {row.table_name: row.version for row in rows}
+    updated_at = max((row.updated_at for row in rows if row.updated_at), default=None)
+    return tuple(versions.get(table, 0) for table in tables), updated_at
+
+
+def get_table_versions(db: Session, tables: Sequence[str]) -> Tuple[int, ...]:
+    """Devuelve las versiones actuales de `tables`, en el mismo orden."""
+    return get_table_stamps(db, tables)[0]
+
+
+class VersionedCache:
+    """Caché de valores invalidada por las versiones de las tablas de origen."""
+
+    def __init__(self, size: int = VERSIONED_CACHE_SIZE):
+        self.size = size
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, db: Session, key: Hashable, tables: Sequence[str], compute: Callable[[], Any]) -> Any:
+        """
+        Devuelve el valor cacheado para `key` si ninguna de `tables` ha cambiado;
+        en otro caso lo recalcula con `compute()`.
+
+        Las versiones se leen antes de llamar a `compute()`: si una escritura
+        se cuela entre ambas lecturas, la entrada queda etiquetada con una
+        versión anterior y simplemente se recalcula en la siguiente petición,
+        pero nunca se sirve un valor más antiguo que su etiqueta.
+        """
+        versions = get_table_versions(db, tables)
+        # Cada alumno tiene su propia base y, por tanto, sus propias versiones
+        key = (current_learner.get(), key)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
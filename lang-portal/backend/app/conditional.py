@@ -0,0 +1,97 @@
+"""
+Peticiones condicionales (ETag / Last-Modified) a partir de `table_versions`.
+
+El ETag de una respuesta es un resumen de la URL pedida y de las versiones de
+las tablas de las que depende, y `Last-Modified` es la última escritura en
+esas tablas. Como los triggers incrementan las versiones en cada escritura, la
+misma URL con las mismas versiones produce siempre el mismo cuerpo (ETag
+fuerte), y un `If-None-Match` que coincide se responde con 304 tras una sola
+búsqueda por clave primaria, sin ejecutar la consulta del endpoint.
+
+Las versiones se leen antes que los datos: si una escritura se cuela entre
+ambas lecturas, el cliente guarda datos más nuevos que su ETag y la siguiente
+petición simplemente no coincide; nunca se valida una copia anterior.
+
+El ETag (la versión) manda siempre. `Last-Modified` solo tiene resolución de
+segundos: dos escrituras en el mismo segundo dan la misma fecha, así que un
+`If-Modified-Since` igual al segundo de la última escritura no basta para
+saber si el cliente vio la segunda y se responde entero. Solo una fecha
+posterior a la última escritura da un 304.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from app.cache import get_table_stamps
+from app.database import current_learner, run_in_db_thread
+from app.learners import LEARNER_HEADER
+
+
+def build_validators(request: Request, versions: Sequence[int], updated_at: Optional[str]) -> Dict[str, str]:
+    """Cabeceras ETag, Last-Modified y Cache-Control para la URL y versiones dadas."""
+    key = f"{request.url.path}?{request.url.query}:{','.join(map(str, versions))}"
+    learner_id = current_learner.get()
+    if learner_id is not None:
+        # Las versiones son de la base del alumno: la misma URL de otro alumno es otra respuesta
+        key = f"{learner_id}:{key}"
+    headers = {
+        "ETag": '"' + hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + '"',
+        # Los clientes pueden guardar la respuesta pero deben revalidarla siempre
+        "Cache-Control": "no-cache",
+    }
+    if learner_id is not None:
+        headers["Vary"] = LEARNER_HEADER
+    if updated_at:
+        modified = datetime.strptime(updated_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(modified, usegmt=True)
+    return headers
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110), como pide el estándar."""
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+def not_modified_since(if_modified_since: str, last_modified: Optional[str]) -> bool:
+    """
+    Si la copia del cliente es seguro que sigue vigente: su fecha es posterior
+    al segundo de la última escritura (en ese mismo segundo pudo haber otra).
+    """
+    if not last_modified:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return parsedate_to_datetime(last_modified) < since
+
+
+async def check_conditional(request: Request, db: Session, tables: Sequence[str]) -> Tuple[Optional[Response], Dict[str, str]]:
+    """
+    Resuelve una petición GET condicional sobre `tables`.
+
+    Devuelve `(respuesta_304, cabeceras)`: si el cliente ya tiene la versión
+    actual, la respuesta 304 lista para devolver; si no, None y las cabeceras
+    que el endpoint debe añadir a su respuesta.
+    """
+    versions, updated_at = await run_in_db_thread(get_table_stamps, db, tables)
+    headers = build_validators(request, versions, updated_at)
+
+    # If-None-Match compara la versión exacta; If-Modified-Since solo se usa sin él
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, headers["ETag"])
+    elif "if-modified-since" in request.headers:
+        not_modified = not_modified_since(request.headers["if-modified-since"], headers.get("Last-Modified"))
+    else:
+        not_modified = False
+
+    if not_modified:
+        return Response(status_code=304, headers=headers), headers
+    return None, headers
@@ -0,0 +1,200 @@
+"""
+Difusión de los cambios del dashboard a los clientes de `GET /dashboard/stream`.
+
+Los clientes conectados a la vez comparten un único `DashboardBroadcaster`
+(uno por alumno). Su tarea de fondo lee cada `DASHBOARD_STREAM_POLL_MS` las
+versiones de `table_versions` de las tablas del dashboard, una búsqueda por
+clave primaria que también ve las escrituras de otros workers, y solo cuando
+cambian vuelve a calcular el dashboard. El resultado se compara con el anterior
+y la diferencia (solo los campos que han cambiado) se reparte a todos los
+suscriptores: mil dashboards abiertos cuestan un cálculo por cambio, no mil por
+intervalo de sondeo.
+
+Cada suscriptor recibe primero el dashboard completo (`snapshot`) y después los
+`delta`. Un cliente que no lee se desconecta al llenarse su cola; al
+reconectar, `EventSource` recibe otra vez el dashboard completo.
+
+Cuando se desconecta el último cliente de un alumno su broadcaster se detiene y
+se descarta: cualquier cliente puede mandar un `X-Learner-Id` nuevo, así que
+solo hay tareas de sondeo para los alumnos con algún stream abierto.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Callable, Dict, Hashable, Optional, Set
+
+import orjson
+
+from app import database
+from app.metrics import current_request
+
+logger = logging.getLogger(__name__)
+
+# Intervalo de sondeo de table_versions, y cada cuánto se manda un comentario
+# para que los proxies no cierren una conexión sin eventos
+DASHBOARD_STREAM_POLL_MS = float(os.getenv("DASHBOARD_STREAM_POLL_MS", "500"))
+DASHBOARD_STREAM_KEEPALIVE_S = float(os.getenv("DASHBOARD_STREAM_KEEPALIVE_S", "15"))
+
+# Eventos que un suscriptor puede tener sin leer antes de desconectarlo
+SUBSCRIBER_QUEUE_SIZE = 16
+
+
+def diff(old: Any, new: Any) -> Any:
+    """
+    Lo que ha cambiado de `old` a `new`: para diccionarios, solo las claves con
+    otro valor (recursivamente); para el resto, `new` entero. None si son iguales.
+    """
+    if old == new:
+        return None
+    if not (isinstance(old, dict) and isinstance(new, dict)):
+        return new
+    return {
+        key: diff(old[key], value) if key in old else value
+        for key, value in new.items()
+        if key not in old or old[key] != value
+    }
+
+
+def format_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """Un evento en el formato de Server-Sent Events."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: ".encode() + orjson.dumps(data) + b"\n\n"
+
+
+class DashboardBroadcaster:
+    """Calcula el dashboard una vez por cambio y lo reparte a sus suscriptores."""
+
+    def __init__(self, stamp: Callable[[], Hashable], compute: Callable[[], Dict[str, Any]], poll_interval: float):
+        # stamp() y compute() son síncronas y se ejecutan en el pool de la base
+        self.stamp = stamp
+        self.compute = compute
+        self.poll_interval = poll_interval
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.state: Optional[Dict[str, Any]] = None
+        self.sequence = 0
+        self.computations = 0
+        self._stamp: Optional[Hashable] = None
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_lock = asyncio.Lock()
+
+    async def subscribe(self) -> asyncio.Queue:
+        """Añade un suscriptor; su cola empieza con el dashboard completo."""
+        if self._task is None:
+            # Sin suscriptores nadie ha vigilado los cambios: se comprueba ahora
+            await self.refresh()
+        queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        queue.put_nowait(format_event("snapshot", self.state, self.sequence))
+        self.subscribers.add(queue)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    async def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+        if not self.subscribers and self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def refresh(self) -> bool:
+        """
+        Vuelve a calcular el dashboard si las versiones de sus tablas han
+        cambiado y reparte la diferencia. Devuelve si ha habido un delta.
+        """
+        async with self._refresh_lock:
+            stamp = await database.run_in_db_thread(self.stamp)
+            if stamp == self._stamp:
+                return False
+            state = await database.run_in_db_thread(self.compute)
+            self.computations += 1
+            self._stamp = stamp
+
+            previous, self.state = self.state, state
+            changes = diff(previous, state) if previous is not None else None
+            if changes is None:
+                return False
+            self.sequence += 1
+            self.publish(format_event("delta", changes, self.sequence))
+            return True
+
+    def publish(self, event: bytes):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Se cierra su stream (None); al reconectar recibirá el estado completo
+                self.subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def _run(self):
+        # La tarea nace en la petición del primer suscriptor, pero sus consultas
+        # no son de esa petición
+        current_request.set(None)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Dashboard stream refresh failed")
+
+
+class DashboardStreams:
+    """
+    Un `DashboardBroadcaster` por alumno (None es la base compartida) mientras
+    tenga algún cliente conectado.
+    """
+
+    def __init__(self, poll_ms: float = DASHBOARD_STREAM_POLL_MS):
+        self.poll_ms = poll_ms
+        self._broadcasters: Dict[Optional[str], DashboardBroadcaster] = {}
+        # Clientes de cada alumno, contados desde antes de suscribirse: mientras
+        # el primero espera su snapshot el broadcaster aún no tiene suscriptores
+        self._clients: Dict[Optional[str], int] = {}
+
+    def get(self, stamp, compute) -> DashboardBroadcaster:
+        learner_id = database.current_learner.get()
+        broadcaster = self._broadcasters.get(learner_id)
+        if broadcaster is None:
+            broadcaster = DashboardBroadcaster(stamp, compute, self.poll_ms / 1000)
+            self._broadcasters[learner_id] = broadcaster
+        return broadcaster
+
+    def open_learners(self) -> Set[Optional[str]]:
+        """Alumnos con un broadcaster activo."""
+        return set(self._broadcasters)
+
+    async def events(self, stamp, compute, keepalive: float = DASHBOARD_STREAM_KEEPALIVE_S):
+        """Eventos SSE de un suscriptor hasta que se desconecta."""
+        learner_id = database.current_learner.get()
+        broadcaster = self.get(stamp, compute)
+        self._clients[learner_id] = self._clients.get(learner_id, 0) + 1
+        queue = None
+        try:
+            queue = await broadcaster.subscribe()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield event
+        finally:
+            self._clients[learner_id] -= 1
+            if not self._clients[learner_id]:
+                # El último cliente: se descarta antes de esperar a su tarea, para
+                # que un cliente nuevo cree otro en lugar de usar uno que se detiene
+                del self._clients[learner_id]
+                del self._broadcasters[learner_id]
+            if queue is not None:
+                await broadcaster.unsubscribe(queue)
+
+
+dashboard_streams = DashboardStreams()
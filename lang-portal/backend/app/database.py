@@ -3,26 +3,426 @@ Configuración de la conexión a la base de datos.
 Se utiliza una variable de entorno para permitir flexibilidad en la configuración.
 """
 
+import asyncio
+import contextvars
 import os
-from sqlalchemy import create_engine
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import NamedTuple, Optional
+from urllib.parse import quote
+from sqlalchemy import create_engine, event, make_url
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import QueuePool
 from contextlib import contextmanager
+from app import slow_queries, statements
+from app.metrics import METRICS_ENABLED, CountingConnection, instrument_engine, record_pool_wait
 
 # Se permite configurar la URL de la base de datos mediante una variable de entorno,
 # de lo contrario se utiliza SQLite local.
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./words.db")
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Perfil de SQLite aplicado a cada conexión nueva. WAL permite que los lectores
+# no bloqueen al escritor (ni al revés), y busy_timeout hace que un escritor
+# espere al otro en lugar de fallar con "database is locked".
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+
+# Las consultas son síncronas (SQLite no tiene un driver asíncrono en la
+# biblioteca estándar), así que los handlers async las ejecutan en este pool
+# acotado de hilos para no bloquear el event loop de uvicorn. sqlite3 libera el
+# GIL mientras ejecuta la consulta, por lo que varias lecturas avanzan en paralelo.
+DB_THREADPOOL_SIZE = int(os.getenv("DB_THREADPOOL_SIZE", "8"))
+
+# Pool de lectura: una conexión por hilo más un margen para las peticiones que
+# mantienen su sesión abierta entre dos consultas.
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_THREADPOOL_SIZE)))
+DB_READ_POOL_OVERFLOW = int(os.getenv("DB_READ_POOL_OVERFLOW", "32"))
+DB_WRITE_POOL_TIMEOUT = float(os.getenv("DB_WRITE_POOL_TIMEOUT", "30"))
+
+# Pool de un servidor de base de datos (DATABASE_URL que no es SQLite, p. ej.
+# postgresql+psycopg2://...). Ahí no hay un único escritor: lecturas y
+# escrituras comparten un pool con tamaño y desbordamiento propios, las
+# conexiones se reciclan antes de que el servidor o un proxy las corte y se
+# comprueban al sacarlas del pool para no devolver una conexión muerta.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str(DB_THREADPOOL_SIZE)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") not in ("0", "false", "False")
+
+# Umbral del registro de consultas lentas (0 lo desactiva) y número de formas
+# de SQL distintas que guarda antes de descartar la más antigua
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+
+slow_query_log = slow_queries.SlowQueryLog(SLOW_QUERY_MS, SLOW_QUERY_LOG_SIZE)
+
+# Modo por alumno (opcional): si LEARNER_DATA_DIR está definido, las peticiones
+# con cabecera X-Learner-Id usan una base SQLite propia de ese alumno dentro de
+# ese directorio, con el vocabulario de DATABASE_URL adjunto en solo lectura.
+# Se mantienen abiertos como mucho LEARNER_ENGINE_CACHE_SIZE alumnos.
+LEARNER_DATA_DIR = os.getenv("LEARNER_DATA_DIR")
+LEARNER_ENGINE_CACHE_SIZE = int(os.getenv("LEARNER_ENGINE_CACHE_SIZE", "64"))
+LEARNER_READ_POOL_SIZE = int(os.getenv("LEARNER_READ_POOL_SIZE", "2"))
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False, prepare=None):
+    """
+    Aplica el perfil de SQLite a una conexión DBAPI recién abierta. `prepare`,
+    si se indica, se llama antes de `query_only` (que impide crear objetos TEMP).
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+    cursor.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+    if prepare is not None:
+        prepare(cursor)
+    if read_only:
+        cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que suma a las métricas de la petición la espera por una conexión."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            record_pool_wait(time.perf_counter() - start)
+
+
+def instrument(engine):
+    """
+    Registra en `engine` los hooks de métricas, del registro de consultas lentas
+    y de los aciertos de las cachés de sentencias.
+    """
+    instrument_engine(engine)
+    slow_queries.instrument_engine(engine, slow_query_log)
+    statements.instrument_engine(engine)
+    return engine
+
+
+def sqlite_connect_args(uri: bool = False) -> dict:
+    # cached_statements: tamaño del LRU de sentencias preparadas de cada conexión
+    connect_args = {"check_same_thread": False, "cached_statements": statements.SQLITE_CACHED_STATEMENTS}
+    if uri:
+        # Necesario para adjuntar otras bases con "file:...?mode=ro"
+        connect_args["uri"] = True
+    if METRICS_ENABLED:
+        # Sus cursores cuentan las filas leídas (sqlite3 no da rowcount de los SELECT)
+        connect_args["factory"] = CountingConnection
+    return connect_args
+
+
+def create_server_engine(url: str):
+    """
+    Motor de un servidor de base de datos: un único pool para lecturas y
+    escrituras, sin los argumentos propios de sqlite3 (`check_same_thread`).
+    """
+    return instrument(create_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    ))
+
+
+def create_write_engine(url: str, prepare=None):
+    """
+    Motor del único escritor. En SQLite usa una sola conexión (los escritores de
+    este proceso hacen cola en el pool en lugar de competir por el lock) y abre
+    las transacciones con BEGIN IMMEDIATE, de modo que el lock de escritura se
+    toma al empezar y la espera la resuelve busy_timeout frente a otros procesos.
+    """
+    if not is_sqlite(url):
+        return create_server_engine(url)
+
+    write_engine = create_engine(
+        url,
+        connect_args=sqlite_connect_args(uri=prepare is not None),
+        poolclass=TimedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=DB_WRITE_POOL_TIMEOUT,
+    )
+
+    @event.listens_for(write_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, prepare=prepare)
+        # El driver deja de abrir transacciones por su cuenta; las abre "begin"
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(write_engine, "begin")
+    def on_begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return instrument(write_engine)
+
+
+def create_read_engine(url: str, prepare=None, pool_size: int = DB_READ_POOL_SIZE,
+                       max_overflow: int = DB_READ_POOL_OVERFLOW):
+    """Motor de solo lectura con su propio pool, separado del escritor."""
+    if not is_sqlite(url):
+        return create_server_engine(url)
+
+    read_engine = create_engine(
+        url,
+        connect_args=sqlite_connect_args(uri=prepare is not None),
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        # LIFO: las conexiones que más se usan son las que tienen la caché de
+        # sentencias preparadas caliente
+        pool_use_lifo=True,
+    )
+
+    @event.listens_for(read_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, read_only=True, prepare=prepare)
+
+    return instrument(read_engine)
+
+
+engine = create_write_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if is_sqlite(DATABASE_URL) and ":memory:" not in DATABASE_URL and DATABASE_URL != "sqlite://":
+    read_engine = create_read_engine(DATABASE_URL)
+else:
+    # Una base de datos en memoria solo existe dentro de su propia conexión, y
+    # un servidor ya atiende a varios escritores desde el mismo pool
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+
+# ======================
+# Bases por alumno
+# ======================
+
+# Tablas del vocabulario compartido; el resto (sesiones, repasos, contadores,
+# planificación y resumen diario) vive en la base de cada alumno
+VOCABULARY_TABLES = ("words", "groups", "word_groups", "study_activities")
+
+# Alumno de la petición en curso (None: la base compartida de DATABASE_URL)
+current_learner: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_learner", default=None)
+
+
+class LearnerShard(NamedTuple):
+    write_engine: object
+    read_engine: object
+    write_sessions: sessionmaker
+    read_sessions: sessionmaker
+
+    def dispose(self):
+        self.write_engine.dispose()
+        self.read_engine.dispose()
+
+
+def create_learner_database(path: str):
+    """
+    Crea la base de un alumno a partir de las migraciones y elimina las tablas
+    del vocabulario, que se leen de la base adjunta. Se crea con otro nombre y
+    se renombra al final para que una creación interrumpida no deje una base
+    a medias.
+    """
+    from init_db import run_migrations
+
+    building = f"{path}.{threading.get_ident()}.tmp"
+    run_migrations(building, verbose=False)
+    connection = sqlite3.connect(building)
+    try:
+        # Con la tabla se borran sus triggers (FTS, words_count, planificación)
+        for table in ("words_fts", *VOCABULARY_TABLES):
+            connection.execute(f"DROP TABLE IF EXISTS {table}")
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(building, path)
+
+
+def attach_vocabulary(vocabulary_path: str):
+    """
+    Devuelve el `prepare` de las conexiones de un alumno: adjunta el vocabulario
+    en solo lectura como `vocab` y crea las vistas TEMP `table_versions` y
+    `table_counts`, que toman las versiones y los totales de cada tabla de la
+    base que la contiene. Los nombres sin esquema se buscan en temp, main y
+    después en las adjuntas, así que las consultas existentes funcionan sin
+    cambios, y los triggers de la base del alumno siguen actualizando sus
+    propias `main.table_versions` y `main.table_counts`.
+    """
+    uri = "file:" + quote(os.path.abspath(vocabulary_path)) + "?mode=ro"
+    tables = ", ".join(f"'{table}'" for table in VOCABULARY_TABLES)
+
+    def prepare(cursor):
+        cursor.execute("ATTACH DATABASE ? AS vocab", (uri,))
+        cursor.execute(f"""
+            CREATE TEMP VIEW table_versions AS
+            SELECT table_name, version, updated_at FROM main.table_versions
+            WHERE table_name NOT IN ({tables})
+            UNION ALL
+            SELECT table_name, version, updated_at FROM vocab.table_versions
+            WHERE table_name IN ({tables})
+        """)
+        # Los totales de words y groups solo los mantiene la base compartida
+        cursor.execute(f"""
+            CREATE TEMP VIEW table_counts AS
+            SELECT name, shard, value FROM main.table_counts
+            WHERE name NOT IN ({tables})
+            UNION ALL
+            SELECT name, shard, value FROM vocab.table_counts
+            WHERE name IN ({tables})
+        """)
+
+    return prepare
+
+
+def sync_learner_schedules(write_engine):
+    """
+    Crea la fila de planificación de los enlaces del vocabulario que el alumno
+    aún no tiene. La fila 'word_groups' de `main.table_versions` del alumno
+    guarda la versión del vocabulario ya sincronizada, así que solo se recorre
+    `word_groups` cuando el vocabulario ha cambiado desde la última apertura.
+    """
+    with write_engine.begin() as connection:
+        synced = connection.exec_driver_sql(
+            "SELECT version FROM main.table_versions WHERE table_name = 'word_groups'"
+        ).scalar()
+        current = connection.exec_driver_sql(
+            "SELECT version FROM vocab.table_versions WHERE table_name = 'word_groups'"
+        ).scalar()
+        if synced == current:
+            return
+        connection.exec_driver_sql("""
+            INSERT OR IGNORE INTO word_schedules (group_id, word_id)
+            SELECT group_id, word_id FROM vocab.word_groups
+        """)
+        connection.exec_driver_sql(
+            "UPDATE main.table_versions SET version = ? WHERE table_name = 'word_groups'", (current,)
+        )
+
+
+class LearnerEngines:
+    """
+    LRU de motores por alumno. Cada alumno tiene su propio escritor (y por
+    tanto su propio lock de escritura de SQLite) y un pool de lectura pequeño.
+    Al superar `size` se cierran los motores del alumno usado hace más tiempo;
+    las conexiones que aún estén en uso se cierran al devolverse.
+    """
+
+    def __init__(self, data_dir: str, vocabulary_path: str, size: int = LEARNER_ENGINE_CACHE_SIZE):
+        self.data_dir = data_dir
+        self.vocabulary_path = vocabulary_path
+        self.size = size
+        self._shards: "OrderedDict[str, LearnerShard]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(data_dir, exist_ok=True)
+
+    def path(self, learner_id: str) -> str:
+        return os.path.join(self.data_dir, f"learner-{learner_id}.db")
+
+    def get(self, learner_id: str) -> LearnerShard:
+        with self._lock:
+            shard = self._shards.get(learner_id)
+            if shard is not None:
+                self._shards.move_to_end(learner_id)
+                return shard
+            # Se abre con el lock tomado: solo ocurre la primera vez (o tras
+            # un desalojo) y así dos peticiones no crean la misma base a la vez
+            shard = self._open(learner_id)
+            self._shards[learner_id] = shard
+            evicted = []
+            while len(self._shards) > self.size:
+                evicted.append(self._shards.popitem(last=False)[1])
+        for old in evicted:
+            old.dispose()
+        return shard
+
+    def _open(self, learner_id: str) -> LearnerShard:
+        path = self.path(learner_id)
+        if not os.path.exists(path):
+            create_learner_database(path)
+        url = f"sqlite:///{path}"
+        prepare = attach_vocabulary(self.vocabulary_path)
+        write_engine = create_write_engine(url, prepare=prepare)
+        read_engine = create_read_engine(url, prepare=prepare, pool_size=LEARNER_READ_POOL_SIZE,
+                                         max_overflow=DB_THREADPOOL_SIZE)
+        sync_learner_schedules(write_engine)
+        return LearnerShard(
+            write_engine,
+            read_engine,
+            sessionmaker(autocommit=False, autoflush=False, bind=write_engine),
+            sessionmaker(autocommit=False, autoflush=False, bind=read_engine),
+        )
+
+    def open_learners(self):
+        with self._lock:
+            return list(self._shards)
+
+    def dispose(self):
+        with self._lock:
+            shards = list(self._shards.values())
+            self._shards.clear()
+        for shard in shards:
+            shard.dispose()
+
+
+learner_engines: Optional[LearnerEngines] = None
+if LEARNER_DATA_DIR and is_sqlite(DATABASE_URL):
+    learner_engines = LearnerEngines(LEARNER_DATA_DIR, make_url(DATABASE_URL).database)
+
+
+def read_session() -> Session:
+    """Sesión de lectura de la base del alumno en curso (o de la compartida)."""
+    learner_id = current_learner.get()
+    if learner_id is None or learner_engines is None:
+        return ReadSessionLocal()
+    return learner_engines.get(learner_id).read_sessions()
+
+
+def write_session() -> Session:
+    """Sesión del escritor de la base del alumno en curso (o de la compartida)."""
+    learner_id = current_learner.get()
+    if learner_id is None or learner_engines is None:
+        return SessionLocal()
+    return learner_engines.get(learner_id).write_sessions()
+
+
+db_executor = ThreadPoolExecutor(max_workers=DB_THREADPOOL_SIZE, thread_name_prefix="db")
+
 def get_db() -> Session:
     """
     Dependency to get a database session.
     Yields a database session and ensures it is closed after use.
     """
-    db = SessionLocal()
+    db = write_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def get_read_db() -> Session:
+    """
+    Dependency to get a read-only database session from the read pool.
+    """
+    db = read_session()
     try:
         yield db
     finally:
@@ -33,7 +433,7 @@ def session_scope():
     """
     Provide a transactional scope around a series of operations.
     """
-    session = SessionLocal()
+    session = write_session()
     try:
         yield session
         session.commit()
@@ -42,3 +442,43 @@ def session_scope():
         raise
     finally:
         session.close()
+
+
+async def run_in_db_thread(func, *args, **kwargs):
+    """
+    Run a blocking database call in the bounded database thread pool.
+    The caller's context variables are propagated to the worker thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        db_executor, partial(context.run, func, *args, **kwargs)
+    )
+
+
+async def fetch_all(db: Session, statement, params=None):
+    """Execute `statement` off the event loop and return all rows."""
+    return await run_in_db_thread(lambda: db.execute(statement, params).fetchall())
+
+
+async def fetch_one(db: Session, statement, params=None):
+    """Execute `statement` off the event loop and return the first row or None."""
+    return await run_in_db_thread(lambda: db.execute(statement, params).first())
+
+
+async def fetch_scalar(db: Session, statement, params=None):
+    """Execute `statement` off the event loop and return the first column of the first row."""
+    return await run_in_db_thread(lambda: db.execute(statement, params).scalar())
+
+
+async def run_in_transaction(func, *args):
+    """
+    Run `func(session, *args)` in a writer transaction on a database thread.
+
+    The whole transaction (checkout, writes, commit) happens inside a single
+    thread-pool call, so the writer connection is never held across an await.
+    """
+    def work():
+        with session_scope() as session:
+            return func(session, *args)
+    return await run_in_db_thread(work)
@@ -0,0 +1,57 @@
+"""
+Selección de la base del alumno por petición.
+
+Con `LEARNER_DATA_DIR` definido, `LearnerMiddleware` lee la cabecera
+`X-Learner-Id` y la deja en `app.database.current_learner`; las sesiones de
+lectura y escritura de esa petición (también en el pool de hilos, que copia el
+contexto) usan entonces la base de ese alumno. Las peticiones sin cabecera
+siguen usando la base compartida de `DATABASE_URL`, y sin `LEARNER_DATA_DIR` la
+cabecera se ignora.
+"""
+
+import re
+
+from starlette.responses import JSONResponse
+
+from app import database
+
+LEARNER_HEADER = "X-Learner-Id"
+
+# El id forma parte del nombre del fichero: nada de separadores de ruta ni puntos
+LEARNER_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+_HEADER_KEY = LEARNER_HEADER.lower().encode("latin-1")
+
+
+class LearnerMiddleware:
+    """Fija el alumno de la petición a partir de la cabecera `X-Learner-Id`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or database.learner_engines is None:
+            await self.app(scope, receive, send)
+            return
+
+        learner_id = None
+        for name, value in scope["headers"]:
+            if name == _HEADER_KEY:
+                learner_id = value.decode("latin-1")
+                break
+        if learner_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not LEARNER_ID_PATTERN.fullmatch(learner_id):
+            response = JSONResponse(
+                {"detail": f"{LEARNER_HEADER} must be 1-64 letters, digits, '_' or '-'"}, status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        token = database.current_learner.set(learner_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            database.current_learner.reset(token)
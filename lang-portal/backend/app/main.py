@@ -3,15 +3,38 @@ Punto de entrada de la aplicación FastAPI.
 Se inicializan las tablas de la base de datos y se configuran los routers.
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from app import review_buffer
 from app.models import Base
 from app.database import engine
+from app.learners import LearnerMiddleware
+from app.metrics import CONTENT_TYPE, MetricsMiddleware, registry
 from app.routers import api
+from app.statements import statement_cache
 
 Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Language Learning Portal API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # El buffer de repasos (opcional) vuelca lo pendiente antes de parar
+    buffer = review_buffer.review_buffer
+    if buffer is not None:
+        buffer.start()
+    try:
+        yield
+    finally:
+        if buffer is not None:
+            await buffer.stop()
+
+
+app = FastAPI(title="Language Learning Portal API", lifespan=lifespan)
+
+# Dentro del CORS, para que sus errores 400 también lleven las cabeceras CORS
+app.add_middleware(LearnerMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,4 +46,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Se añade el último para ser el más externo y medir también el CORS
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(api.router, prefix="/api")
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Métricas de la aplicación en el formato de texto de Prometheus."""
+    body = registry.render() + statement_cache.render()
+    if review_buffer.review_buffer is not None:
+        body += review_buffer.review_buffer.render()
+    return Response(body, media_type=CONTENT_TYPE)
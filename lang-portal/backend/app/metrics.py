@@ -0,0 +1,284 @@
+"""
+Métricas de peticiones y de SQL en formato Prometheus.
+
+`MetricsMiddleware` (ASGI puro, sin `BaseHTTPMiddleware`) abre un
+`RequestMetrics` por petición en una variable de contexto. Los hooks del motor
+(`instrument_engine`) y del pool de conexiones de `app.database` suman en él las
+consultas, el tiempo de SQL, las filas leídas y la espera por una conexión; como
+`run_in_db_thread` copia el contexto al hilo de trabajo, el acumulador es el de
+la petición que lanzó la consulta. Al terminar la petición se vuelca una sola
+vez en el registro, agrupado por la plantilla de la ruta (`/api/words/{word_id}`)
+para que el número de series no crezca con los ids.
+
+El registro se escribe con un único lock por petición y se serializa solo
+cuando Prometheus lee `/metrics`.
+"""
+
+import contextvars
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") not in ("0", "false", "False")
+
+# Límites superiores de los buckets de cada histograma
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+ROWS_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+# Ruta de las peticiones que no corresponden a ninguna ruta de la aplicación
+UNMATCHED_ROUTE = "<unmatched>"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestMetrics:
+    """Acumulador de una petición. Sus consultas son secuenciales, no necesita lock."""
+
+    __slots__ = ("scope", "queries", "sql_seconds", "rows", "pool_wait_seconds")
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+        self.pool_wait_seconds = 0.0
+
+
+current_request: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar(
+    "current_request_metrics", default=None
+)
+
+
+class Histogram:
+    """Histograma acumulativo con buckets fijos (sin etiquetas propias)."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels, lines):
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{format_value(bound)}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {format_value(self.sum)}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+
+
+class RouteMetrics:
+    """Series de una ruta (método + plantilla)."""
+
+    __slots__ = ("responses", "latency", "queries", "sql_seconds", "rows", "pool_wait_seconds")
+
+    def __init__(self):
+        self.responses: Dict[int, int] = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_seconds = Histogram(LATENCY_BUCKETS)
+        self.rows = Histogram(ROWS_BUCKETS)
+        self.pool_wait_seconds = Histogram(LATENCY_BUCKETS)
+
+
+class MetricsRegistry:
+    """Métricas agregadas de todo el proceso."""
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, route: str, status: int, seconds: float, request: RequestMetrics):
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics()
+            metrics.responses[status] = metrics.responses.get(status, 0) + 1
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(request.queries)
+            metrics.sql_seconds.observe(request.sql_seconds)
+            metrics.rows.observe(request.rows)
+            metrics.pool_wait_seconds.observe(request.pool_wait_seconds)
+
+    def render(self) -> str:
+        """Serializa el registro en el formato de texto de Prometheus."""
+        lines = []
+        with self._lock:
+            routes = sorted(self._routes.items())
+
+            lines.append("# HELP http_requests_total Respuestas HTTP por ruta y código de estado.")
+            lines.append("# TYPE http_requests_total counter")
+            for (method, route), metrics in routes:
+                for status, count in sorted(metrics.responses.items()):
+                    lines.append(
+                        f'http_requests_total{{{route_labels(method, route)},status="{status}"}} {count}'
+                    )
+
+            for name, attribute, help_text in (
+                ("http_request_duration_seconds", "latency", "Latencia de la petición completa."),
+                ("db_queries_per_request", "queries", "Sentencias SQL ejecutadas por petición."),
+                ("db_sql_seconds_per_request", "sql_seconds", "Tiempo total de SQL por petición."),
+                ("db_rows_per_request", "rows", "Filas leídas de la base de datos por petición."),
+                ("db_pool_wait_seconds_per_request", "pool_wait_seconds",
+                 "Espera por una conexión del pool por petición."),
+            ):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for (method, route), metrics in routes:
+                    getattr(metrics, attribute).render(name, route_labels(method, route), lines)
+        lines.append("")
+        return "\n".join(lines)
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
+
+
+def route_labels(method: str, route: str) -> str:
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ======================
+# Hooks de la base de datos
+# ======================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    request = current_request.get()
+    if request is None or context is None:
+        return
+    request.queries += 1
+    request.sql_seconds += time.perf_counter() - context._metrics_start
+    # sqlite3 no da rowcount de los SELECT; sus filas las cuenta CountingCursor
+    if not isinstance(cursor, CountingCursor) and cursor.rowcount > 0:
+        request.rows += cursor.rowcount
+
+
+def instrument_engine(engine):
+    """Registra los hooks de tiempo y recuento de sentencias en `engine`."""
+    if METRICS_ENABLED:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def record_pool_wait(seconds: float):
+    request = current_request.get()
+    if request is not None:
+        request.pool_wait_seconds += seconds
+
+
+class CountingCursor(sqlite3.Cursor):
+    """Cursor de sqlite3 que suma al acumulador de la petición las filas leídas."""
+
+    def fetchone(self):
+        row = super().fetchone()
+        if row is not None:
+            request = current_request.get()
+            if request is not None:
+                request.rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        request = current_request.get()
+        if request is not None:
+            request.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = super().fetchall()
+        request = current_request.get()
+        if request is not None:
+            request.rows += len(rows)
+        return rows
+
+
+class CountingConnection(sqlite3.Connection):
+    """Conexión de sqlite3 cuyos cursores son `CountingCursor`."""
+
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
+
+
+# ======================
+# Middleware ASGI
+# ======================
+
+class MetricsMiddleware:
+    """Mide cada petición HTTP y vuelca sus métricas de SQL en `registry`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request = RequestMetrics(scope)
+        token = current_request.set(request)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            registry.record(scope["method"], route_template(scope), status, elapsed, request)
+
+
+def current_route() -> Optional[str]:
+    """Plantilla de la ruta de la petición en curso, o None fuera de una petición."""
+    request = current_request.get()
+    if request is None or request.scope is None:
+        return None
+    return route_template(request.scope)
+
+
+def route_template(scope) -> str:
+    """
+    Plantilla completa de la ruta de la petición, como `/api/words/{word_id}`.
+
+    El router deja la ruta encontrada en el scope, pero su `path` no incluye el
+    prefijo con el que se incluyó el router; el prefijo son los primeros
+    segmentos de la URL que sobran frente a la plantilla.
+    """
+    template = getattr(scope.get("route"), "path", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    segments = scope["path"].split("/")
+    prefix = segments[:len(segments) - template.count("/")]
+    return "/".join(prefix) + template if len(prefix) > 1 else template
@@ -13,9 +13,14 @@ class Word(Base):
     id = Column(Integer, primary_key=True, index=True)
     spanish = Column(String, nullable=False)
     english = Column(String, nullable=False)
+    groups = relationship("Group", secondary="words_groups", back_populates="words")
+    stats = relationship("WordStats", uselist=False)
+
+class WordStats(Base):
+    __tablename__ = "word_stats"
+    word_id = Column(Integer, ForeignKey("words.id"), primary_key=True)
     correct_count = Column(Integer, default=0)
     wrong_count = Column(Integer, default=0)
-    groups = relationship("Group", secondary="words_groups", back_populates="words")
 
 class Group(Base):
     __tablename__ = "groups"
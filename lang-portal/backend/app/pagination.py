@@ -0,0 +1,57 @@
+"""
+Utilidades de paginación por cursor (keyset) para los endpoints de listado.
+
+Un cursor es la clave de ordenación de la última fila devuelta, codificada en
+base64 para que el cliente la trate como un valor opaco. Con él la consulta
+salta directamente a la siguiente página a través del índice en lugar de
+recorrer y descartar las filas anteriores con OFFSET.
+"""
+
+import base64
+import binascii
+import json
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    """Codifica la clave de ordenación de una fila como cursor opaco."""
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Decodifica un cursor y comprueba que tenga `size` componentes."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        key = None
+
+    if not isinstance(key, list) or len(key) != size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+    return key
+
+
+def total_column(count_sql: str, include_total: bool) -> str:
+    """
+    Columna extra que calcula el total en la misma sentencia que la página.
+
+    La subconsulta no está correlacionada, así que SQLite la evalúa una sola vez.
+    """
+    return f", ({count_sql}) AS total_count" if include_total else ""
+
+
+def split_page(rows: Sequence[Any], items_per_page: int, key: Callable[[Any], Sequence[Any]]) -> Tuple[List[Any], Optional[str]]:
+    """
+    Recorta la fila extra pedida con `LIMIT items_per_page + 1` y devuelve el
+    cursor de la página siguiente, o None si no hay más filas.
+    """
+    rows = list(rows)
+    if len(rows) <= items_per_page:
+        return rows, None
+    rows = rows[:items_per_page]
+    return rows, encode_cursor(key(rows[-1]))
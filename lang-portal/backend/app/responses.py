@@ -0,0 +1,53 @@
+"""
+Respuestas JSON rápidas para los listados.
+
+Construir un modelo Pydantic por fila y dejar que FastAPI lo vuelva a validar
+contra `response_model` antes de codificarlo cuesta más que la propia consulta
+en páginas de cientos de filas. Los listados construyen los diccionarios
+directamente desde las filas de SQL y devuelven un `FastJSONResponse`, que
+FastAPI envía tal cual (sin validar) codificado con orjson. El `response_model`
+de cada ruta se mantiene para la documentación de OpenAPI y define las claves
+de cada fila.
+"""
+
+from typing import Any, Dict, List, Sequence, Type
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """Respuesta JSON codificada con orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def rows_as_dicts(rows: Sequence[Any], model: Type[BaseModel]) -> List[Dict[str, Any]]:
+    """
+    Convierte filas de SQLAlchemy en diccionarios con los campos de `model`.
+
+    Las columnas se buscan por nombre una sola vez y los campos que la consulta
+    no selecciona toman el valor por defecto del modelo. Los tipos ya deben
+    venir bien de la consulta (por ejemplo, `text(...).columns(correct=Boolean)`).
+    """
+    if not rows:
+        return []
+
+    # Los valores por defecto se añaden al final de cada fila, de modo que
+    # cada campo (en el orden del modelo) es un índice en esa tupla
+    columns = rows[0]._fields
+    fields = tuple(model.model_fields)
+    defaults = []
+    indexes = []
+    for name, field in model.model_fields.items():
+        if name in columns:
+            indexes.append(columns.index(name))
+        else:
+            indexes.append(len(columns) + len(defaults))
+            defaults.append(field.get_default(call_default_factory=True))
+
+    if not defaults:
+        return [dict(zip(fields, [row[i] for i in indexes])) for row in rows]
+    return [dict(zip(fields, [values[i] for i in indexes])) for values in ((*row, *defaults) for row in rows)]
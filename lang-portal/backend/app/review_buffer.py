@@ -0,0 +1,335 @@
+"""
+Buffer de escritura diferida (write-behind) de los repasos, opcional.
+
+Con `REVIEW_BUFFER_SIZE` mayor que cero, `POST /study-sessions/{id}/reviews`
+valida el lote con el pool de lectura, lo encola y responde 202 sin esperar al
+escritor. Una tarea de fondo vuelca la cola en una sola transacción cuando
+acumula `REVIEW_BUFFER_SIZE` repasos o cuando pasan `REVIEW_BUFFER_FLUSH_MS`
+desde el primero, de modo que muchos lotes de un repaso comparten un único
+commit. Los lotes de una misma sesión se juntan en una llamada a
+`record_reviews`, y cada una va en su propio savepoint: un lote que ya no es
+válido al volcarlo (la sesión se ha borrado) se descarta sin perder el resto.
+
+Cada repaso se registra con la hora en la que se aceptó, no con la del volcado.
+El lifespan de la aplicación arranca la tarea y, al parar, vuelca lo pendiente.
+
+Un volcado que falla por otra causa (un lock que no llega, una conexión perdida)
+devuelve sus lotes a la cabeza de la cola y se reintenta con espera exponencial,
+hasta `REVIEW_BUFFER_RETRY_MAX_MS`: el cliente ya tiene su 202. Solo se
+descartan los lotes que nunca podrán escribirse (la sesión o la palabra ya no
+existen); se cuentan en `review_buffer_dropped_total` y se registran enteros en
+el logger `app.review_buffer.dead_letter`.
+
+Lo aceptado y aún sin confirmar (en cola o en un volcado en curso) no pasa de
+`REVIEW_BUFFER_MAX_PENDING` repasos: mientras la base falla la cola no puede
+vaciarse, así que al llegar al límite los lotes nuevos se rechazan con 503 (y
+`Retry-After`) en lugar de aceptar escrituras que no se pueden volcar.
+
+El detalle de una sesión (`GET /study-sessions/{id}`) lee sus propias
+escrituras: a los totales guardados se suman los de los repasos aceptados que
+aún no se han confirmado. La lectura y el commit de cada volcado se excluyen
+con un lock, así que un repaso cuenta o en la base o en el buffer, nunca en los
+dos. El resto de las lecturas ven los repasos al volcarse.
+
+Lo aceptado y aún no volcado se pierde si el proceso muere sin pasar por el
+lifespan, o si al parar la base sigue fallando tras `SHUTDOWN_RETRIES`
+intentos (entonces también va al dead-letter); es el precio de no esperar al
+commit.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app import database
+from app.reviews import MAX_REVIEW_BATCH, ReviewItem, record_reviews
+
+logger = logging.getLogger(__name__)
+# Lotes aceptados que no se han podido escribir, uno por línea en JSON
+dead_letter = logging.getLogger(__name__ + ".dead_letter")
+
+# Repasos que disparan un volcado (0 desactiva el buffer) y espera máxima desde
+# el primer repaso pendiente
+REVIEW_BUFFER_SIZE = int(os.getenv("REVIEW_BUFFER_SIZE", "0"))
+REVIEW_BUFFER_FLUSH_MS = float(os.getenv("REVIEW_BUFFER_FLUSH_MS", "50"))
+# Espera máxima entre reintentos de un volcado fallido (empieza en FLUSH_MS)
+REVIEW_BUFFER_RETRY_MAX_MS = float(os.getenv("REVIEW_BUFFER_RETRY_MAX_MS", "5000"))
+# Repasos aceptados y aún sin confirmar a partir de los cuales se rechazan lotes
+# nuevos; no puede ser menor que un lote completo (MAX_REVIEW_BATCH)
+REVIEW_BUFFER_MAX_PENDING = max(int(os.getenv("REVIEW_BUFFER_MAX_PENDING", "10000")), MAX_REVIEW_BATCH)
+
+# Intentos de volcado al parar antes de dar lo pendiente por perdido
+SHUTDOWN_RETRIES = 5
+
+# Sesión de la base de un alumno (o de la compartida, con None)
+SessionKey = Tuple[Optional[str], int]
+
+
+class ReviewBatchQueued(BaseModel):
+    study_session_id: int
+    queued: int
+
+
+class ReviewBuffer:
+    """Cola de repasos aceptados que una tarea de fondo vuelca por lotes."""
+
+    def __init__(self, size: int, flush_ms: float, retry_max_ms: float = REVIEW_BUFFER_RETRY_MAX_MS,
+                 max_pending: int = REVIEW_BUFFER_MAX_PENDING):
+        self.size = size
+        self.flush_ms = flush_ms
+        self.retry_max_ms = retry_max_ms
+        self.max_pending = max_pending
+        self._pending: List[Tuple[SessionKey, List[ReviewItem]]] = []
+        self._pending_items = 0
+        # Totales (repasos, aciertos, fallos) aceptados y aún sin confirmar, y
+        # su suma, que es lo que limita max_pending
+        self._unflushed: Dict[SessionKey, List[int]] = {}
+        self._unflushed_items = 0
+        self._lock = threading.Lock()
+        # Excluye el commit de un volcado de la lectura del detalle de una sesión
+        self._commit_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        # Volcados fallidos seguidos, que marcan la espera del siguiente intento
+        self._failures = 0
+        self.flushes = 0
+        self.retries = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._closed
+
+    def start(self):
+        """Arranca la tarea de volcado en el event loop en curso."""
+        self._closed = False
+        self._has_items = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Vuelca lo pendiente y termina la tarea de volcado."""
+        if self._task is None:
+            return
+        self._closed = True
+        self._has_items.set()
+        self._full.set()
+        await self._task
+        self._task = None
+
+    def add(self, session_id: int, items: List[ReviewItem]) -> bool:
+        """
+        Encola un lote ya validado. Se llama desde el event loop; los repasos
+        sin fecha toman la hora de ahora. Devuelve False, sin encolar nada, si
+        el lote haría pasar lo pendiente de `max_pending`.
+        """
+        now = datetime.now(timezone.utc)
+        items = [item if item.created_at else item.model_copy(update={"created_at": now}) for item in items]
+        key = (database.current_learner.get(), session_id)
+        correct = sum(1 for item in items if item.correct)
+        with self._lock:
+            if self._unflushed_items + len(items) > self.max_pending:
+                self.rejected += 1
+                return False
+            self._unflushed_items += len(items)
+            self._pending.append((key, items))
+            self._pending_items += len(items)
+            totals = self._unflushed.setdefault(key, [0, 0, 0])
+            totals[0] += len(items)
+            totals[1] += correct
+            totals[2] += len(items) - correct
+            full = self._pending_items >= self.size
+        self._has_items.set()
+        if full:
+            self._full.set()
+        return True
+
+    def has_unflushed(self, session_id: int) -> bool:
+        return (database.current_learner.get(), session_id) in self._unflushed
+
+    def read_session(self, db: Session, statement, session_id: int) -> Optional[dict]:
+        """
+        Ejecuta `statement` (el detalle de la sesión) y le suma los repasos
+        aceptados que aún no se han confirmado. Se llama en un hilo de la base.
+        """
+        key = (database.current_learner.get(), session_id)
+        with self._commit_lock:
+            row = db.execute(statement, {"session_id": session_id}).mappings().first()
+            with self._lock:
+                total, correct, incorrect = self._unflushed.get(key, (0, 0, 0))
+        if row is None:
+            return None
+        row = dict(row)
+        row["review_items_count"] += total
+        row["correct_count"] += correct
+        row["incorrect_count"] += incorrect
+        return row
+
+    async def flush(self) -> bool:
+        """
+        Vuelca en una transacción por base todo lo encolado hasta ahora. Los
+        lotes de las bases en las que falla vuelven a la cola; devuelve si ha
+        ido todo bien.
+        """
+        async with self._flush_lock:
+            with self._lock:
+                batches, self._pending = self._pending, []
+                self._pending_items = 0
+                self._has_items.clear()
+                self._full.clear()
+            if not batches:
+                return True
+            failed = await database.run_in_db_thread(self._write, batches)
+            if failed:
+                self._requeue(failed)
+                self._failures += 1
+                self.retries += 1
+                return False
+            self._failures = 0
+            return True
+
+    def retry_delay(self) -> float:
+        """Espera antes de reintentar tras `_failures` volcados fallidos, en segundos."""
+        return min(self.flush_ms * 2 ** (self._failures - 1), self.retry_max_ms) / 1000
+
+    def render(self) -> str:
+        """Contadores en el formato de texto de Prometheus."""
+        return "\n".join([
+            "# HELP review_buffer_retries_total Volcados del buffer de repasos que fallaron y se reintentan.",
+            "# TYPE review_buffer_retries_total counter",
+            f"review_buffer_retries_total {self.retries}",
+            "# HELP review_buffer_dropped_total Repasos aceptados que se descartaron sin escribirse.",
+            "# TYPE review_buffer_dropped_total counter",
+            f"review_buffer_dropped_total {self.dropped}",
+            "# HELP review_buffer_rejected_total Lotes rechazados con 503 por tener el buffer lleno.",
+            "# TYPE review_buffer_rejected_total counter",
+            f"review_buffer_rejected_total {self.rejected}",
+            "",
+        ])
+
+    async def _run(self):
+        while True:
+            await self._has_items.wait()
+            if not self._closed:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_ms / 1000)
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                flushed = await self.flush()
+            except Exception:
+                logger.exception("Review buffer flush failed")
+                flushed = False
+            if not flushed:
+                if self._closed and self._failures >= SHUTDOWN_RETRIES:
+                    self._drop_pending("still failing at shutdown")
+                    return
+                await asyncio.sleep(self.retry_delay())
+            if self._closed and not self._pending:
+                return
+
+    def _write(self, batches: List[Tuple[SessionKey, List[ReviewItem]]]) -> List[Tuple[SessionKey, List[ReviewItem]]]:
+        """
+        Escribe los lotes de cada base en una sola transacción (hilo de la base)
+        y devuelve los de las bases cuya transacción ha fallado.
+        """
+        by_learner: Dict[Optional[str], Dict[int, List[ReviewItem]]] = defaultdict(lambda: defaultdict(list))
+        for (learner_id, session_id), items in batches:
+            by_learner[learner_id][session_id].extend(items)
+
+        failed = []
+        for learner_id, sessions in by_learner.items():
+            token = database.current_learner.set(learner_id)
+            try:
+                self._write_sessions(learner_id, sessions)
+            except Exception:
+                logger.exception("Could not write buffered reviews (learner %s), will retry", learner_id)
+                failed.extend(((learner_id, session_id), items) for session_id, items in sessions.items())
+            finally:
+                database.current_learner.reset(token)
+        self.flushes += 1
+        return failed
+
+    def _write_sessions(self, learner_id: Optional[str], sessions: Dict[int, List[ReviewItem]]):
+        db = database.write_session()
+        try:
+            rejected = []
+            for session_id, items in sessions.items():
+                for start in range(0, len(items), MAX_REVIEW_BATCH):
+                    chunk = items[start:start + MAX_REVIEW_BATCH]
+                    savepoint = db.begin_nested()
+                    try:
+                        record_reviews(db, session_id, chunk)
+                    except HTTPException as error:
+                        # Ya no es válido (se ha borrado la sesión o una palabra): reintentarlo no sirve
+                        savepoint.rollback()
+                        rejected.append((session_id, chunk, error.detail))
+                    else:
+                        savepoint.commit()
+            with self._commit_lock:
+                db.commit()
+                self._forget(learner_id, sessions)
+        except BaseException:
+            # Los lotes siguen contando como pendientes: vuelven a la cola
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        for session_id, items, reason in rejected:
+            self._dead_letter(learner_id, session_id, items, reason)
+
+    def _requeue(self, batches: List[Tuple[SessionKey, List[ReviewItem]]]):
+        """Devuelve a la cabeza de la cola los lotes de un volcado fallido, en su orden."""
+        with self._lock:
+            self._pending[:0] = batches
+            self._pending_items += sum(len(items) for _, items in batches)
+        self._has_items.set()
+
+    def _drop_pending(self, reason: str):
+        with self._lock:
+            batches, self._pending = self._pending, []
+            self._pending_items = 0
+        for (learner_id, session_id), items in batches:
+            self._forget(learner_id, {session_id: items})
+            self._dead_letter(learner_id, session_id, items, reason)
+
+    def _dead_letter(self, learner_id: Optional[str], session_id: int, items: List[ReviewItem], reason):
+        self.dropped += len(items)
+        logger.warning("Dropped %d buffered reviews for study session %s: %s", len(items), session_id, reason)
+        dead_letter.error(json.dumps({
+            "learner_id": learner_id,
+            "study_session_id": session_id,
+            "reason": str(reason),
+            "items": [item.model_dump(mode="json") for item in items],
+        }))
+
+    def _forget(self, learner_id: Optional[str], sessions: Dict[int, List[ReviewItem]]):
+        with self._lock:
+            for session_id, items in sessions.items():
+                key = (learner_id, session_id)
+                totals = self._unflushed.get(key)
+                if totals is None:
+                    continue
+                correct = sum(1 for item in items if item.correct)
+                self._unflushed_items -= len(items)
+                totals[0] -= len(items)
+                totals[1] -= correct
+                totals[2] -= len(items) - correct
+                if totals[0] <= 0:
+                    del self._unflushed[key]
+
+
+review_buffer: Optional[ReviewBuffer] = (
+    ReviewBuffer(REVIEW_BUFFER_SIZE, REVIEW_BUFFER_FLUSH_MS) if REVIEW_BUFFER_SIZE > 0 else None
+)
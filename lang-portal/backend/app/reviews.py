@@ -0,0 +1,196 @@
+"""
+Ruta de escritura de los repasos (`word_review_items`).
+
+Todas las escrituras de repasos pasan por `record_reviews`, que valida la
+sesión y las palabras con una consulta por conjunto e inserta el lote completo
+con un único `executemany` dentro de la transacción del llamador. Los triggers
+mantienen `word_stats`, el resumen de la sesión (`study_sessions.correct_count`,
+`incorrect_count` y `total_items`) y `table_versions` a partir de esas
+inserciones, y `update_schedules` aplica el lote al estado SM-2 de cada palabra
+en el grupo de la sesión (`word_schedules`). El resumen diario (`app/stats.py`) se
+actualiza en la misma transacción.
+"""
+
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app import statements
+from app.scheduler import ScheduleState, schedule_review
+from app.stats import add_daily_stats
+
+# Máximo de repasos aceptados en una sola petición
+MAX_REVIEW_BATCH = 1000
+
+
+class ReviewItem(BaseModel):
+    word_id: int
+    correct: bool
+    created_at: Optional[datetime] = None
+
+
+class ReviewBatchResult(BaseModel):
+    study_session_id: int
+    inserted: int
+    review_items_count: int
+    correct_count: int
+    incorrect_count: int
+
+
+def format_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """
+    Normaliza una fecha al formato de CURRENT_TIMESTAMP de SQLite (UTC), para
+    que los repasos se ordenen igual vengan de donde vengan.
+    """
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def missing_word_ids(db: Session, word_ids: Iterable[int]) -> List[int]:
+    """Devuelve, ordenados, los ids de `word_ids` que no existen en `words`."""
+    requested = set(word_ids)
+    found = {row.id for row in db.execute(statements.EXISTING_WORD_IDS, {"word_ids": sorted(requested)})}
+    return sorted(requested - found)
+
+
+def session_totals(db: Session, session_id: int) -> dict:
+    """Totales de repasos de una sesión, del resumen que mantienen los triggers."""
+    return dict(db.execute(statements.SESSION_TOTALS, {"session_id": session_id}).mappings().one())
+
+
+def lock_word_stats(db: Session, word_ids: Iterable[int]):
+    """
+    Bloquea (creándolas si hace falta) las filas de `word_stats` de `word_ids`
+    en orden de id, antes de que los triggers de `word_review_items` las
+    actualicen en el orden del lote. Solo hace falta con varios escritores a la
+    vez (un servidor como PostgreSQL): dos lotes con palabras en común toman
+    así sus locks en el mismo orden y uno espera al otro en lugar de
+    bloquearse mutuamente.
+    """
+    ids = sorted(set(word_ids))
+    db.execute(statements.ENSURE_WORD_STATS, [{"word_id": word_id} for word_id in ids])
+    db.execute(statements.LOCK_WORD_STATS, {"word_ids": ids})
+
+
+def update_schedules(db: Session, group_id: int, reviews: List[Tuple[int, bool, str]]):
+    """
+    Aplica `reviews` (word_id, correct, reviewed_at) al estado SM-2 de cada
+    palabra en `group_id`, en orden cronológico.
+
+    Solo se actualizan las filas existentes: los triggers de `word_groups` crean
+    una por cada palabra del grupo, así que los repasos de palabras que no
+    pertenecen al grupo no lo alteran.
+
+    Un repaso con fecha anterior al último ya aplicado no puede ponerse encima
+    del estado (movería el próximo repaso hacia atrás): el estado de esa
+    palabra se rehace con todo su historial en el grupo, en orden, como en
+    `backfill_counters.rebuild_schedules`. Los repasos del lote ya están
+    insertados, así que el historial los incluye.
+    """
+    if not reviews:
+        return
+
+    # En SQLite el escritor es único; en un servidor otros escritores pueden
+    # repasar las mismas palabras a la vez, así que las filas se bloquean hasta
+    # el commit para no perder ninguna actualización
+    query = statements.word_schedules(for_update=db.get_bind().dialect.name != "sqlite")
+    rows = db.execute(query, {"group_id": group_id, "word_ids": sorted({word_id for word_id, _, _ in reviews})})
+    states = {row.word_id: ScheduleState(*row[1:]) for row in rows}
+
+    backdated = {
+        word_id for word_id, _, reviewed_at in reviews
+        if word_id in states and states[word_id].last_reviewed_at
+        and reviewed_at < states[word_id].last_reviewed_at
+    }
+    if backdated:
+        history = db.execute(statements.WORD_REVIEW_HISTORY,
+                             {"group_id": group_id, "word_ids": sorted(backdated)})
+        for word_id in backdated:
+            states[word_id] = ScheduleState()
+        for word_id, correct, reviewed_at in history:
+            states[word_id] = schedule_review(states[word_id], correct, reviewed_at)
+
+    for word_id, correct, reviewed_at in sorted(reviews, key=lambda review: review[2]):
+        if word_id in states and word_id not in backdated:
+            states[word_id] = schedule_review(states[word_id], correct, reviewed_at)
+
+    if states:
+        db.execute(
+            statements.UPDATE_WORD_SCHEDULE,
+            [{"group_id": group_id, "word_id": word_id, **state._asdict()} for word_id, state in states.items()]
+        )
+
+
+def check_review_batch(db: Session, session_id: int, items: List[ReviewItem]) -> int:
+    """
+    Comprueba que el lote se puede registrar (tamaño, sesión y palabras) y
+    devuelve el grupo de la sesión. Lanza la HTTPException que corresponda.
+    """
+    if len(items) > MAX_REVIEW_BATCH:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {MAX_REVIEW_BATCH} reviews can be sent at once"
+        )
+
+    session = db.execute(statements.SESSION_GROUP, {"session_id": session_id}).first()
+    if not session:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Study session with id {session_id} not found"
+        )
+
+    if items:
+        missing = missing_word_ids(db, (item.word_id for item in items))
+        if missing:
+            raise HTTPException(
+                status_code=422,
+                detail={"message": "Unknown word ids", "word_ids": missing}
+            )
+    return session.group_id
+
+
+def record_reviews(db: Session, session_id: int, items: List[ReviewItem]) -> ReviewBatchResult:
+    """
+    Inserta un lote de repasos en la sesión `session_id`.
+
+    No hace commit: se espera que se llame dentro de `run_in_transaction`, de
+    modo que el lote entero se confirma (o se descarta) de una vez.
+    """
+    group_id = check_review_batch(db, session_id, items)
+
+    if items:
+        # Los repasos sin fecha se registran con la hora del lote, que es
+        # también la que usa el planificador
+        now = format_timestamp(datetime.now(timezone.utc))
+        reviews = [
+            (item.word_id, item.correct, format_timestamp(item.created_at) or now)
+            for item in items
+        ]
+        if db.get_bind().dialect.name != "sqlite":
+            lock_word_stats(db, (item.word_id for item in items))
+        db.execute(
+            statements.INSERT_REVIEW_ITEM,
+            [
+                {
+                    "word_id": word_id,
+                    "study_session_id": session_id,
+                    "correct": correct,
+                    "created_at": reviewed_at
+                }
+                for word_id, correct, reviewed_at in reviews
+            ]
+        )
+        update_schedules(db, group_id, reviews)
+        add_daily_stats(db, reviews=[(correct, reviewed_at) for _, correct, reviewed_at in reviews])
+
+    return ReviewBatchResult(
+        study_session_id=session_id,
+        inserted=len(items),
+        **session_totals(db, session_id)
+    )
@@ -1,17 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import date, datetime, timedelta, timezone
 from pydantic import BaseModel
-from typing import List, Optional
-from app.database import SessionLocal
-from sqlalchemy import text
+from typing import List, Literal, Optional
+from app.cache import VersionedCache, get_table_versions
+from app.conditional import check_conditional
+from app.dashboard_stream import dashboard_streams
+from app.database import (fetch_all, fetch_one, fetch_scalar, read_session, run_in_db_thread,
+                          run_in_transaction, slow_query_log)
+from app.pagination import decode_cursor, split_page
+from app.responses import FastJSONResponse, rows_as_dicts
+from app import review_buffer
+from app.review_buffer import ReviewBatchQueued
+from app.reviews import ReviewBatchResult, ReviewItem, check_review_batch, format_timestamp, record_reviews
+from app.stats import STATS_TIMEZONE, add_daily_stats, get_streaks, local_today
+from app.search import SEARCH_RANKED_MATCHES, SEARCH_SQL
+from app import statements
+from sqlalchemy.sql.elements import TextClause
 
 router = APIRouter()
 
+# Caché de los agregados del dashboard, invalidada por table_versions
+dashboard_cache = VersionedCache()
 
-# Dependencia para obtener la sesión de base de datos
+# Tablas de las que depende cada agregado del dashboard
+LAST_STUDY_SESSION_TABLES = ("study_sessions", "study_activities", "groups")
+STUDY_PROGRESS_TABLES = ("words", "word_review_items")
+QUICK_STATS_TABLES = ("word_review_items", "study_sessions", "groups")
+DASHBOARD_TABLES = tuple(dict.fromkeys(LAST_STUDY_SESSION_TABLES + STUDY_PROGRESS_TABLES + QUICK_STATS_TABLES))
+
+# Máximo de días que se pueden pedir a /stats/daily de una vez
+MAX_DAILY_STATS_DAYS = 3660
+
+# Máximo de ids que se pueden pedir a /words/batch de una vez
+MAX_WORD_BATCH = 5000
+
+# Tablas de las que dependen las respuestas con ETag (los contadores de
+# word_stats cambian con word_review_items)
+WORDS_TABLES = ("words", "word_review_items")
+GROUP_TABLES = ("groups",)
+GROUP_WORDS_TABLES = ("words", "word_groups", "word_review_items")
+
+
+# Dependencia para obtener la sesión de base de datos (pool de solo lectura, de
+# la base del alumno si la petición lo indica). Las escrituras usan
+# run_in_transaction con el motor del escritor.
 def get_db():
-    db = SessionLocal()
+    db = read_session()
     try:
         yield db
     finally:
@@ -52,9 +89,12 @@ class WordBase(BaseModel):
 
 class Pagination(BaseModel):
     current_page: int
-    total_pages: int
-    total_items: int
+    # None cuando el cliente pide omitir el total con include_total=false
+    total_pages: Optional[int]
+    total_items: Optional[int]
     items_per_page: int
+    # Cursor para pedir la página siguiente con ?cursor=; None en la última
+    next_cursor: Optional[str] = None
 
 # Schemas que extienden los base
 class LastStudySessionResponse(BaseModel):
@@ -77,7 +117,14 @@ class QuickStatsResponse(BaseModel):
     success_rate: int
     total_study_sessions: int
     total_active_groups: int
+    # Días seguidos con actividad hasta hoy (o ayer) y la racha más larga
     study_streak_days: int
+    longest_streak_days: int = 0
+
+class DashboardResponse(BaseModel):
+    last_study_session: Optional[LastStudySessionResponse] = None
+    study_progress: StudyProgressResponse
+    quick_stats: QuickStatsResponse
 
 class StudyActivity(StudyActivityBase):
     study_session_id: Optional[int] = None
@@ -117,6 +164,13 @@ class WordsResponse(BaseModel):
     items: List[Word]
     pagination: Pagination
 
+class WordsBatchRequest(BaseModel):
+    ids: List[int]
+
+class WordsBatchResponse(BaseModel):
+    items: List[Word]
+    missing_ids: List[int]
+
 class Group(GroupBase):
     pass
 
@@ -135,35 +189,259 @@ class WordReviewResponse(BaseModel):
     words: List[WordReview]
     pagination: Pagination
 
+class DueWord(BaseModel):
+    id: int
+    spanish: str
+    english: str
+    ease: float
+    interval_days: int
+    repetitions: int
+    next_review_at: str
+    last_reviewed_at: Optional[str]
+
+class DueWordsResponse(BaseModel):
+    group_id: int
+    items: List[DueWord]
+
+class DailyStats(BaseModel):
+    date: str
+    sessions: int
+    reviews: int
+    correct_count: int
+    incorrect_count: int
+
+class DailyStatsResponse(BaseModel):
+    timezone: str
+    start_date: str
+    end_date: str
+    current_streak: int
+    longest_streak: int
+    days: List[DailyStats]
+
+class SlowQuery(BaseModel):
+    sql: str
+    params: str
+    duration_ms: float
+    max_ms: float
+    count: int
+    route: Optional[str]
+    plan: List[str]
+    first_seen: str
+    last_seen: str
+
+class SlowQueriesResponse(BaseModel):
+    threshold_ms: float
+    capacity: int
+    queries: List[SlowQuery]
+
+class ReviewBatchRequest(BaseModel):
+    items: List[ReviewItem]
+
+
+async def build_pagination(db: Session, rows, page: int, items_per_page: int, include_total: bool,
+                           count_query: TextClause, params: dict, next_cursor: Optional[str]) -> Pagination:
+    """
+    Construye la paginación a partir de la columna `total_count` de la propia
+    página. Solo una página vacía necesita una consulta aparte para el total.
+    """
+    total_items = None
+    total_pages = None
+    if include_total:
+        if rows:
+            total_items = rows[0].total_count
+        else:
+            total_items = await fetch_scalar(db, count_query, params)
+        total_pages = (total_items + items_per_page - 1) // items_per_page
+
+    return Pagination(
+        current_page=page,
+        total_pages=total_pages,
+        total_items=total_items,
+        items_per_page=items_per_page,
+        next_cursor=next_cursor
+    )
+
+
+async def study_sessions_response(db: Session, by: Optional[str], filter_id: Optional[int], page: int,
+                                  items_per_page: int, cursor: Optional[str], include_total: bool):
+    """
+    Página de sesiones, las más recientes primero, de todas (`by=None`), de un
+    grupo (`"group"`) o de una actividad (`"activity"`).
+    """
+    offset = (page - 1) * items_per_page
+    after = decode_cursor(cursor, 2) if cursor else None
+    filter_params = {statements.SESSION_FILTERS[by][1]: filter_id} if by else {}
+
+    results = await fetch_all(db, statements.study_sessions_page(by, include_total, after is not None), {
+        **filter_params,
+        "after_created_at": after[0] if after else None,
+        "after_id": after[1] if after else None,
+        "limit": items_per_page + 1,
+        "offset": 0 if after else offset
+    })
+    results, next_cursor = split_page(results, items_per_page, lambda row: (row.start_time, row.id))
+
+    study_sessions = rows_as_dicts(results, StudySession)
+
+    pagination = await build_pagination(
+        db, results, page, items_per_page, include_total,
+        statements.study_sessions_count(by), filter_params, next_cursor
+    )
+
+    return FastJSONResponse({
+        "study_sessions": study_sessions,
+        "pagination": pagination.model_dump()
+    })
+
 
 # ======================
 # Endpoints de la API
 # ======================
 
+@router.get("")
+async def read_root():
+    return {"message": "Language Learning Portal API"}
+
+
+@router.get("/health")
+async def health_check():
+    return {"status": "healthy"}
+
+
 # Dashboard endpoints
+@router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard(db: Session = Depends(get_db)):
+    """
+    The three dashboard payloads from one statement, so they always agree with
+    each other. `last_study_session` is null while there are no sessions.
+    """
+    return await run_in_db_thread(
+        dashboard_cache.get_or_compute, db, ("dashboard", local_today()), DASHBOARD_TABLES,
+        lambda: compute_dashboard(db)
+    )
+
+
 @router.get("/dashboard/last_study_session", response_model=LastStudySessionResponse)
 async def get_last_study_session(db: Session = Depends(get_db)):
-    query = text("""
-        SELECT 
-            ss.id,
-            sa.name as activity_name,
-            g.name as group_name,
-            ss.created_at,
-            sa.id as study_activity_id,
-            g.id as group_id,
-            COUNT(CASE WHEN wri.correct THEN 1 END) as correct_count,
-            COUNT(CASE WHEN NOT wri.correct THEN 1 END) as incorrect_count,
-            COUNT(*) as total_items
-        FROM study_sessions ss
-        JOIN study_activities sa ON ss.study_activity_id = sa.id
-        JOIN groups g ON ss.group_id = g.id
-        LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-        GROUP BY ss.id, sa.name, g.name, ss.created_at, sa.id, g.id
-        ORDER BY ss.created_at DESC
-        LIMIT 1
-    """)
-    
-    result = db.execute(query).first()
+    return await run_in_db_thread(
+        dashboard_cache.get_or_compute, db, "last_study_session", LAST_STUDY_SESSION_TABLES,
+        lambda: compute_last_study_session(db)
+    )
+
+
+@router.get("/dashboard/study_progress", response_model=StudyProgressResponse)
+async def get_study_progress(db: Session = Depends(get_db)):
+    return await run_in_db_thread(
+        dashboard_cache.get_or_compute, db, "study_progress", STUDY_PROGRESS_TABLES,
+        lambda: compute_study_progress(db)
+    )
+
+
+@router.get("/dashboard/quick_stats", response_model=QuickStatsResponse)
+async def get_quick_stats(db: Session = Depends(get_db)):
+    # The current streak can end with the (local) date even without writes
+    today = local_today()
+    return await run_in_db_thread(
+        dashboard_cache.get_or_compute, db, ("quick_stats", today), QUICK_STATS_TABLES,
+        lambda: compute_quick_stats(db)
+    )
+
+
+@router.get("/dashboard/stream")
+async def stream_dashboard():
+    """
+    Server-Sent Events feed of the dashboard: a `snapshot` event with the three
+    payloads, then a `delta` event with only the changed fields each time a
+    write changes them. All connected clients share one computation per change.
+    """
+    return StreamingResponse(
+        dashboard_streams.events(dashboard_stamp, compute_dashboard_state),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats/daily", response_model=DailyStatsResponse)
+async def get_daily_stats(from_date: Optional[date] = Query(None, alias="from"),
+                          to_date: Optional[date] = Query(None, alias="to"),
+                          db: Session = Depends(get_db)):
+    # Días locales (STATS_TIMEZONE); por defecto, los últimos 30 hasta hoy
+    to_date = to_date or local_today()
+    from_date = from_date or to_date - timedelta(days=29)
+    if from_date > to_date:
+        raise HTTPException(status_code=422, detail="'from' must not be after 'to'")
+    if (to_date - from_date).days >= MAX_DAILY_STATS_DAYS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_DAILY_STATS_DAYS} days can be requested at once")
+
+    def load():
+        rows = db.execute(statements.DAILY_STATS, {
+            "from_date": from_date.isoformat(),
+            "to_date": to_date.isoformat()
+        }).fetchall()
+        return rows, get_streaks(db)
+
+    rows, (current_streak, longest_streak) = await run_in_db_thread(load)
+
+    # Serie completa: los días sin actividad no tienen fila y van a cero
+    by_day = {row.day: row for row in rows}
+    days = []
+    for offset in range((to_date - from_date).days + 1):
+        day = (from_date + timedelta(days=offset)).isoformat()
+        row = by_day.get(day)
+        days.append({
+            "date": day,
+            "sessions": row.sessions if row else 0,
+            "reviews": row.reviews if row else 0,
+            "correct_count": row.correct_count if row else 0,
+            "incorrect_count": row.incorrect_count if row else 0
+        })
+
+    return FastJSONResponse({
+        "timezone": STATS_TIMEZONE,
+        "start_date": from_date.isoformat(),
+        "end_date": to_date.isoformat(),
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+        "days": days
+    })
+
+
+@router.get("/dashboard/cache_stats")
+async def get_dashboard_cache_stats():
+    """Hit/miss counters of this worker's dashboard cache."""
+    return dashboard_cache.stats()
+
+
+@router.get("/admin/slow-queries", response_model=SlowQueriesResponse)
+async def get_slow_queries():
+    """
+    Slow statements seen by this worker, one per SQL shape, most recently seen
+    first, with the query plan captured when each was first seen.
+    """
+    return SlowQueriesResponse(
+        threshold_ms=slow_query_log.threshold_ms,
+        capacity=slow_query_log.size,
+        queries=slow_query_log.entries()
+    )
+
+
+@router.delete("/admin/slow-queries", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_slow_queries():
+    """Empty this worker's slow-query log."""
+    slow_query_log.clear()
+
+
+@router.get("/admin/statement-cache")
+async def get_statement_cache_stats():
+    """
+    Hits and misses of SQLAlchemy's compiled cache and of SQLite's
+    prepared-statement cache for this worker's statements.
+    """
+    return statements.statement_cache.stats()
+
+
+def compute_last_study_session(db: Session) -> LastStudySessionResponse:
+    result = db.execute(statements.LAST_STUDY_SESSION).first()
     
     if not result:
         raise HTTPException(
@@ -184,30 +462,8 @@ async def get_last_study_session(db: Session = Depends(get_db)):
     )
 
 
-@router.get("/dashboard/study_progress", response_model=StudyProgressResponse)
-async def get_study_progress(db: Session = Depends(get_db)):
-    query = text("""
-        WITH WordStats AS (
-            SELECT 
-                COUNT(DISTINCT w.id) as total_available_words,
-                COUNT(DISTINCT CASE 
-                    WHEN wri.correct THEN w.id 
-                END) as total_words_studied
-            FROM words w
-            LEFT JOIN word_review_items wri ON w.id = wri.word_id
-        )
-        SELECT 
-            total_words_studied,
-            total_available_words,
-            CASE 
-                WHEN total_available_words > 0 THEN
-                    (total_words_studied * 100 / total_available_words)
-                ELSE 0 
-            END as mastery_percentage
-        FROM WordStats
-    """)
-    
-    result = db.execute(query).first()
+def compute_study_progress(db: Session) -> StudyProgressResponse:
+    result = db.execute(statements.STUDY_PROGRESS).first()
     
     return StudyProgressResponse(
         total_words_studied=result.total_words_studied or 0,
@@ -216,48 +472,76 @@ async def get_study_progress(db: Session = Depends(get_db)):
     )
 
 
-@router.get("/dashboard/quick_stats", response_model=QuickStatsResponse)
-async def get_quick_stats(db: Session = Depends(get_db)):
-    query = text("""
-        WITH ReviewStats AS (
-            SELECT 
-                COUNT(CASE WHEN correct THEN 1 END) * 100 / COUNT(*) as success_rate
-            FROM word_review_items
-        ),
-        SessionStats AS (
-            SELECT 
-                COUNT(DISTINCT id) as total_study_sessions
-            FROM study_sessions
-        ),
-        GroupStats AS (
-            SELECT 
-                COUNT(DISTINCT id) as total_active_groups
-            FROM groups
-        ),
-        StreakStats AS (
-            SELECT 
-                COUNT(DISTINCT DATE(created_at)) as study_streak_days
-            FROM study_sessions
-            WHERE created_at >= DATE('now', '-7 days')
-        )
-        SELECT 
-            COALESCE(r.success_rate, 0) as success_rate,
-            s.total_study_sessions,
-            g.total_active_groups,
-            st.study_streak_days
-        FROM ReviewStats r
-        CROSS JOIN SessionStats s
-        CROSS JOIN GroupStats g
-        CROSS JOIN StreakStats st
-    """)
-    
-    result = db.execute(query).first()
+def compute_quick_stats(db: Session) -> QuickStatsResponse:
+    result = db.execute(statements.QUICK_STATS).first()
+    # Rachas reales a partir del resumen diario (dos búsquedas por índice)
+    current_streak, longest_streak = get_streaks(db)
     
     return QuickStatsResponse(
         success_rate=result.success_rate or 0,
         total_study_sessions=result.total_study_sessions or 0,
         total_active_groups=result.total_active_groups or 0,
-        study_streak_days=result.study_streak_days or 0
+        study_streak_days=current_streak,
+        longest_streak_days=longest_streak
+    )
+
+
+def dashboard_stamp():
+    """Versiones de las tablas del dashboard y el día local (las rachas cambian con él)."""
+    db = read_session()
+    try:
+        return get_table_versions(db, DASHBOARD_TABLES), local_today()
+    finally:
+        db.close()
+
+
+def compute_dashboard_state() -> dict:
+    """El dashboard completo, a través de la caché, como JSON."""
+    db = read_session()
+    try:
+        return dashboard_cache.get_or_compute(
+            db, ("dashboard", local_today()), DASHBOARD_TABLES, lambda: compute_dashboard(db)
+        ).model_dump(mode="json")
+    finally:
+        db.close()
+
+
+def compute_dashboard(db: Session) -> DashboardResponse:
+    today = local_today()
+    result = db.execute(statements.DASHBOARD, {
+        "today": today.isoformat(),
+        "yesterday": (today - timedelta(days=1)).isoformat()
+    }).first()
+
+    last_study_session = None
+    if result.id is not None:
+        last_study_session = LastStudySessionResponse(
+            id=result.id,
+            activity_name=result.activity_name,
+            group_name=result.group_name,
+            created_at=result.created_at,
+            study_activity_id=result.study_activity_id,
+            group_id=result.group_id,
+            correct_count=result.correct_count,
+            incorrect_count=result.incorrect_count,
+            total_items=result.total_items
+        )
+
+    return DashboardResponse(
+        last_study_session=last_study_session,
+        study_progress=StudyProgressResponse(
+            total_words_studied=result.total_words_studied,
+            total_available_words=result.total_available_words,
+            mastery_percentage=(result.total_words_studied * 100 // result.total_available_words
+                                if result.total_available_words else 0)
+        ),
+        quick_stats=QuickStatsResponse(
+            success_rate=result.success_rate,
+            total_study_sessions=result.total_study_sessions,
+            total_active_groups=result.total_active_groups,
+            study_streak_days=result.current_streak or 0,
+            longest_streak_days=result.longest_streak or 0
+        )
     )
 
 
@@ -266,38 +550,14 @@ async def get_quick_stats(db: Session = Depends(get_db)):
 async def list_study_activities(page: int = 1, items_per_page: int = 10, db: Session = Depends(get_db)):
     offset = (page - 1) * items_per_page
     
-    count_query = text("""
-        SELECT COUNT(*) as total
-        FROM study_activities
-    """)
-    total_items = db.execute(count_query).scalar()
-    
-    query = text("""
-        SELECT 
-            id,
-            name,
-            thumbnail_url,
-            description,
-            launch_url
-        FROM study_activities
-        LIMIT :limit OFFSET :offset
-    """)
+    total_items = await fetch_scalar(db, statements.STUDY_ACTIVITIES_COUNT)
     
-    results = db.execute(query, {
+    results = await fetch_all(db, statements.STUDY_ACTIVITIES_PAGE, {
         "limit": items_per_page,
         "offset": offset
-    }).fetchall()
+    })
     
-    study_activities = [
-        StudyActivity(
-            id=row.id,
-            name=row.name,
-            thumbnail_url=row.thumbnail_url,
-            description=row.description,
-            launch_url=row.launch_url
-        )
-        for row in results
-    ]
+    study_activities = rows_as_dicts(results, StudyActivity)
     
     total_pages = (total_items + items_per_page - 1) // items_per_page
     
@@ -308,26 +568,15 @@ async def list_study_activities(page: int = 1, items_per_page: int = 10, db: Ses
         items_per_page=items_per_page
     )
     
-    return StudyActivitiesResponse(
-        study_activities=study_activities,
-        pagination=pagination
-    )
+    return FastJSONResponse({
+        "study_activities": study_activities,
+        "pagination": pagination.model_dump()
+    })
 
 
 @router.get("/study-activities/{activity_id}", response_model=StudyActivity)
 async def get_study_activity(activity_id: int, db: Session = Depends(get_db)):
-    query = text("""
-        SELECT 
-            id,
-            name,
-            thumbnail_url,
-            description,
-            launch_url
-        FROM study_activities
-        WHERE id = :activity_id
-    """)
-    
-    result = db.execute(query, {"activity_id": activity_id}).first()
+    result = await fetch_one(db, statements.STUDY_ACTIVITY, {"activity_id": activity_id})
     
     if not result:
         raise HTTPException(
@@ -345,184 +594,168 @@ async def get_study_activity(activity_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/study-activities/{activity_id}/study-sessions", response_model=StudySessionsResponse)
-async def get_study_sessions_by_activity(activity_id: int, page: int = 1, items_per_page: int = 10, db: Session = Depends(get_db)):
-    offset = (page - 1) * items_per_page
-    
-    count_query = text("""
-        SELECT COUNT(*) as total
-        FROM study_sessions ss
-        WHERE ss.study_activity_id = :activity_id
-    """)
-    total_items = db.execute(count_query, {"activity_id": activity_id}).scalar()
-    
-    query = text("""
-        SELECT 
-            ss.id,
-            sa.name as activity_name,
-            g.name as group_name,
-            ss.created_at as start_time,
-            ss.end_time,
-            COUNT(wri.id) as review_items_count
-        FROM study_sessions ss
-        JOIN study_activities sa ON ss.study_activity_id = sa.id
-        JOIN groups g ON ss.group_id = g.id
-        LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-        WHERE ss.study_activity_id = :activity_id
-        GROUP BY ss.id, sa.name, g.name, ss.created_at, ss.end_time
-        ORDER BY ss.created_at DESC
-        LIMIT :limit OFFSET :offset
-    """)
-    
-    results = db.execute(query, {
-        "activity_id": activity_id,
-        "limit": items_per_page,
-        "offset": offset
-    }).fetchall()
-    
-    study_sessions = [
-        StudySession(
-            id=row.id,
-            activity_name=row.activity_name,
-            group_name=row.group_name,
-            start_time=row.start_time,
-            end_time=row.end_time,
-            review_items_count=row.review_items_count
-        )
-        for row in results
-    ]
-    
-    total_pages = (total_items + items_per_page - 1) // items_per_page
-    
-    pagination = Pagination(
-        current_page=page,
-        total_pages=total_pages,
-        total_items=total_items,
-        items_per_page=items_per_page
-    )
-    
-    return StudySessionsResponse(
-        study_sessions=study_sessions,
-        pagination=pagination
-    )
+async def get_study_sessions_by_activity(activity_id: int, page: int = 1, items_per_page: int = 10,
+                                         cursor: Optional[str] = None, include_total: bool = True,
+                                         db: Session = Depends(get_db)):
+    return await study_sessions_response(db, "activity", activity_id, page, items_per_page, cursor, include_total)
 
 
 @router.post("/study-activities", response_model=StudyActivityCreateResponse)
-async def create_study_activity(activity: StudyActivityCreateRequest, db: Session = Depends(get_db)):
-    query = text("""
-        INSERT INTO study_sessions (group_id, study_activity_id, created_at)
-        VALUES (:group_id, :study_activity_id, CURRENT_TIMESTAMP)
-        RETURNING id, created_at
-    """)
-    
-    result = db.execute(query, {
-        "group_id": activity.group_id,
-        "study_activity_id": activity.study_activity_id
-    }).first()
-    
-    # Get the launch URL from the study activity
-    launch_url_query = text("""
-        SELECT launch_url
-        FROM study_activities
-        WHERE id = :activity_id
-    """)
-    
-    launch_url_result = db.execute(launch_url_query, {
-        "activity_id": activity.study_activity_id
-    }).first()
-    
-    if not launch_url_result:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Study activity with id {activity.study_activity_id} not found"
+async def create_study_activity(activity: StudyActivityCreateRequest):
+    def create(db: Session) -> StudyActivityCreateResponse:
+        # Get the launch URL from the study activity. It is looked up first:
+        # databases that enforce foreign keys would reject the insert anyway
+        launch_url_result = db.execute(statements.STUDY_ACTIVITY_LAUNCH_URL, {
+            "activity_id": activity.study_activity_id
+        }).first()
+        
+        if not launch_url_result:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Study activity with id {activity.study_activity_id} not found"
+            )
+        
+        # La hora se fija aquí, en el formato de CURRENT_TIMESTAMP de SQLite,
+        # para que sea la misma en cualquier base de datos
+        result = db.execute(statements.INSERT_STUDY_SESSION, {
+            "group_id": activity.group_id,
+            "study_activity_id": activity.study_activity_id,
+            "created_at": format_timestamp(datetime.now(timezone.utc))
+        }).first()
+        
+        add_daily_stats(db, sessions=[result.created_at])
+        
+        return StudyActivityCreateResponse(
+            id=result.id,
+            group_id=activity.group_id,
+            study_activity_id=activity.study_activity_id,
+            created_at=result.created_at,
+            launch_url=launch_url_result.launch_url
         )
     
-    db.commit()
-    
-    return StudyActivityCreateResponse(
-        id=result.id,
-        group_id=activity.group_id,
-        study_activity_id=activity.study_activity_id,
-        created_at=result.created_at,
-        launch_url=launch_url_result.launch_url
-    )
+    return await run_in_transaction(create)
 
 
 # Words endpoints
 @router.get("/words", response_model=WordsResponse)
-async def list_words(page: int = 1, items_per_page: int = 100, db: Session = Depends(get_db)):
-    # Calculate offset
+async def list_words(request: Request, page: int = 1, items_per_page: int = 100, cursor: Optional[str] = None,
+                     include_total: bool = True, db: Session = Depends(get_db)):
+    # Calculate offset (ignored when seeking from a cursor)
     offset = (page - 1) * items_per_page
+    after = decode_cursor(cursor, 1) if cursor else None
 
-    # Query to get words with correct and wrong counts
-    query = text("""
-        SELECT 
-            w.id,
-            w.spanish,
-            w.english,
-            COUNT(CASE WHEN wri.correct THEN 1 END) as correct_count,
-            COUNT(CASE WHEN NOT wri.correct THEN 1 END) as wrong_count
-        FROM words w
-        LEFT JOIN word_review_items wri ON w.id = wri.word_id
-        GROUP BY w.id, w.spanish, w.english
-        ORDER BY w.id
-        LIMIT :items_per_page OFFSET :offset
-    """)
-
-    # Execute the query
-    words_result = db.execute(query, {
-        "items_per_page": items_per_page, 
-        "offset": offset
-    }).fetchall()
+    # 304 si el cliente ya tiene esta página con las versiones actuales
+    not_modified, validators = await check_conditional(request, db, WORDS_TABLES)
+    if not_modified:
+        return not_modified
+
+    # Words with correct and wrong counts (maintained by triggers) and the
+    # total count of words, computed in the same statement as the page
+    query = statements.words_page(include_total, after is not None)
+
+    # Execute the query, fetching one extra row to know if there is a next page
+    words_result = await fetch_all(db, query, {
+        "after_id": after[0] if after else None,
+        "items_per_page": items_per_page + 1,
+        "offset": 0 if after else offset
+    })
+    words_result, next_cursor = split_page(words_result, items_per_page, lambda row: (row.id,))
 
     # Convert results to list of dictionaries
-    words = [
-        Word(
-            id=row.id,
-            spanish=row.spanish,
-            english=row.english,
-            correct_count=row.correct_count or 0, 
-            wrong_count=row.wrong_count or 0
-        ) for row in words_result
-    ]
-
-    # Get total count of words
-    total_items_query = text("SELECT COUNT(*) FROM words")
-    total_items = db.execute(total_items_query).scalar()
-
-    # Calculate total pages
-    total_pages = (total_items + items_per_page - 1) // items_per_page
+    words = rows_as_dicts(words_result, Word)
 
     # Create pagination object
-    pagination = Pagination(
-        current_page=page,
-        total_pages=total_pages,
-        total_items=total_items,
-        items_per_page=items_per_page
+    pagination = await build_pagination(
+        db, words_result, page, items_per_page, include_total,
+        statements.WORDS_COUNT, {}, next_cursor
     )
 
     # Return response
-    return WordsResponse(
-        items=words,
-        pagination=pagination
+    return FastJSONResponse({
+        "items": words,
+        "pagination": pagination.model_dump()
+    }, headers=validators)
+
+
+@router.get("/words/search", response_model=WordsResponse)
+async def search_words(q: str = Query(..., min_length=1, max_length=200), items_per_page: int = 20,
+                       cursor: Optional[str] = None, include_total: bool = True,
+                       db: Session = Depends(get_db)):
+    # Búsqueda sin tener en cuenta acentos; la última palabra se busca como
+    # prefijo para el autocompletado
+    dialect = db.get_bind().dialect.name
+    match = SEARCH_SQL[dialect].build_query(q)
+    after = decode_cursor(cursor, 2) if cursor else None
+    if match is None:
+        return FastJSONResponse({
+            "items": [],
+            "pagination": Pagination(
+                current_page=1,
+                total_pages=0 if include_total else None,
+                total_items=0 if include_total else None,
+                items_per_page=items_per_page
+            ).model_dump()
+        })
+
+    # Se ordena por relevancia (bm25) si hay pocas coincidencias y por id si no.
+    # El cursor guarda el rank (None en orden por id) para seguir en el mismo modo
+    if after:
+        ranked = after[0] is not None
+    else:
+        matches = await fetch_scalar(db, statements.search_match_count(dialect),
+                                     {"match": match, "limit": SEARCH_RANKED_MATCHES + 1})
+        ranked = matches <= SEARCH_RANKED_MATCHES
+
+    # La página se busca y se salta con el cursor dentro del propio índice de
+    # texto; solo esas filas se cruzan con words
+    query = statements.search_page(dialect, ranked, after is not None, include_total)
+
+    rows = await fetch_all(db, query, {
+        "match": match,
+        "after_rank": after[0] if after else None,
+        "after_id": after[1] if after else None,
+        "items_per_page": items_per_page + 1
+    })
+    rows, next_cursor = split_page(rows, items_per_page, lambda row: (row.rank, row.id))
+
+    words = rows_as_dicts(rows, Word)
+
+    pagination = await build_pagination(
+        db, rows, 1, items_per_page, include_total,
+        statements.search_count(dialect), {"match": match}, next_cursor
     )
 
+    return FastJSONResponse({"items": words, "pagination": pagination.model_dump()})
+
+
+@router.post("/words/batch", response_model=WordsBatchResponse)
+async def get_words_batch(batch: WordsBatchRequest, db: Session = Depends(get_db)):
+    """
+    Words for a list of ids, in the requested order, with one query. Repeated
+    ids are returned once; ids that do not exist are listed in `missing_ids`.
+    """
+    if len(batch.ids) > MAX_WORD_BATCH:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {MAX_WORD_BATCH} ids can be requested at once"
+        )
+
+    ids = list(dict.fromkeys(batch.ids))
+    rows = []
+    if ids:
+        rows = await fetch_all(db, statements.words_by_ids(db.get_bind().dialect.name), {
+            "ids": json.dumps(ids)
+        })
+
+    return FastJSONResponse({
+        "items": rows_as_dicts([row for row in rows if row.id is not None], Word),
+        "missing_ids": [row.requested_id for row in rows if row.id is None]
+    })
+
 
 @router.get("/words/{word_id}", response_model=Word)
 async def get_word(word_id: int, db: Session = Depends(get_db)):
-    query = text("""
-        SELECT 
-            w.id,
-            w.spanish,
-            w.english,
-            COUNT(CASE WHEN wri.correct THEN 1 END) as correct_count,
-            COUNT(CASE WHEN NOT wri.correct THEN 1 END) as wrong_count
-        FROM words w
-        LEFT JOIN word_review_items wri ON w.id = wri.word_id
-        WHERE w.id = :word_id
-        GROUP BY w.id, w.spanish, w.english
-    """)
-    
-    result = db.execute(query, {"word_id": word_id}).fetchone()
+    result = await fetch_one(db, statements.WORD, {"word_id": word_id})
     
     if not result:
         raise HTTPException(status_code=404, detail="Word not found")
@@ -538,28 +771,49 @@ async def get_word(word_id: int, db: Session = Depends(get_db)):
 
 # Groups endpoints
 @router.get("/groups", response_model=GroupsResponse)
-async def list_groups(page: int = 1, items_per_page: int = 100, db: Session = Depends(get_db)):
-    groups = [
-        Group(id=1, name="Basic Greetings", word_count=10)
-    ]
-    pagination = Pagination(
-        current_page=page,
-        total_pages=10,
-        total_items=100,
-        items_per_page=items_per_page
+async def list_groups(request: Request, page: int = 1, items_per_page: int = 100,
+                      sort_by: Literal["name", "words_count"] = "name", order: Literal["asc", "desc"] = "asc",
+                      min_words: Optional[int] = None, cursor: Optional[str] = None,
+                      include_total: bool = True, db: Session = Depends(get_db)):
+    offset = (page - 1) * items_per_page
+    after = decode_cursor(cursor, 2) if cursor else None
+
+    not_modified, validators = await check_conditional(request, db, GROUP_TABLES)
+    if not_modified:
+        return not_modified
+
+    query = statements.groups_page(sort_by, order, min_words is not None, after is not None, include_total)
+
+    results = await fetch_all(db, query, {
+        "min_words": min_words,
+        "after_key": after[0] if after else None,
+        "after_id": after[1] if after else None,
+        "limit": items_per_page + 1,
+        "offset": 0 if after else offset
+    })
+    sort_key = "name" if sort_by == "name" else "word_count"
+    results, next_cursor = split_page(results, items_per_page, lambda row: (getattr(row, sort_key), row.id))
+
+    groups = rows_as_dicts(results, Group)
+
+    pagination = await build_pagination(
+        db, results, page, items_per_page, include_total,
+        statements.groups_count(min_words is not None), {"min_words": min_words}, next_cursor
     )
-    return GroupsResponse(groups=groups, pagination=pagination)
+
+    return FastJSONResponse({
+        "groups": groups,
+        "pagination": pagination.model_dump()
+    }, headers=validators)
 
 
 @router.get("/groups/{group_id}", response_model=Group)
-async def get_group(group_id: int, db: Session = Depends(get_db)):
-    query = text("""
-        SELECT g.id, g.name, g.words_count as word_count
-        FROM groups g
-        WHERE g.id = :group_id
-    """)
-    
-    result = db.execute(query, {"group_id": group_id}).first()
+async def get_group(group_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified, validators = await check_conditional(request, db, GROUP_TABLES)
+    if not_modified:
+        return not_modified
+
+    result = await fetch_one(db, statements.GROUP, {"group_id": group_id})
     
     if not result:
         raise HTTPException(
@@ -567,6 +821,7 @@ async def get_group(group_id: int, db: Session = Depends(get_db)):
             detail=f"Group with id {group_id} not found"
         )
     
+    response.headers.update(validators)
     return Group(
         id=result.id,
         name=result.name,
@@ -575,203 +830,78 @@ async def get_group(group_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/groups/{group_id}/words", response_model=WordsResponse)
-async def get_words_by_group(group_id: int, page: int = 1, items_per_page: int = 100, db: Session = Depends(get_db)):
+async def get_words_by_group(group_id: int, request: Request, page: int = 1, items_per_page: int = 100,
+                             cursor: Optional[str] = None, include_total: bool = True,
+                             db: Session = Depends(get_db)):
     offset = (page - 1) * items_per_page
+    after = decode_cursor(cursor, 1) if cursor else None
+
+    not_modified, validators = await check_conditional(request, db, GROUP_WORDS_TABLES)
+    if not_modified:
+        return not_modified
     
-    query = text("""
-        SELECT 
-            w.id,
-            w.spanish,
-            w.english,
-            COUNT(CASE WHEN wri.correct THEN 1 END) as correct_count,
-            COUNT(CASE WHEN NOT wri.correct THEN 1 END) as wrong_count
-        FROM words w
-        JOIN word_groups wg ON w.id = wg.word_id
-        LEFT JOIN word_review_items wri ON w.id = wri.word_id
-        WHERE wg.group_id = :group_id
-        GROUP BY w.id, w.spanish, w.english
-        ORDER BY w.id
-        LIMIT :items_per_page OFFSET :offset
-    """)
+    query = statements.group_words_page(include_total, after is not None)
     
-    words_result = db.execute(query, {
+    words_result = await fetch_all(db, query, {
         "group_id": group_id,
-        "items_per_page": items_per_page,
-        "offset": offset
-    }).fetchall()
+        "after_id": after[0] if after else None,
+        "items_per_page": items_per_page + 1,
+        "offset": 0 if after else offset
+    })
+    words_result, next_cursor = split_page(words_result, items_per_page, lambda row: (row.id,))
     
-    items = [
-        Word(
-            id=row.id,
-            spanish=row.spanish,
-            english=row.english,
-            correct_count=row.correct_count or 0,
-            wrong_count=row.wrong_count or 0
-        ) for row in words_result
-    ]
-    
-    count_query = text("""
-        SELECT COUNT(*) 
-        FROM word_groups 
-        WHERE group_id = :group_id
-    """)
-    total_items = db.execute(count_query, {"group_id": group_id}).scalar()
-    
-    total_pages = (total_items + items_per_page - 1) // items_per_page
+    items = rows_as_dicts(words_result, Word)
     
-    pagination = Pagination(
-        current_page=page,
-        total_pages=total_pages,
-        total_items=total_items,
-        items_per_page=items_per_page
+    pagination = await build_pagination(
+        db, words_result, page, items_per_page, include_total,
+        statements.GROUP_WORDS_COUNT, {"group_id": group_id}, next_cursor
     )
     
-    return WordsResponse(items=items, pagination=pagination)
+    return FastJSONResponse({"items": items, "pagination": pagination.model_dump()}, headers=validators)
 
 
-@router.get("/groups/{group_id}/study-sessions", response_model=StudySessionsResponse)
-async def get_study_sessions_by_group(group_id: int, page: int = 1, items_per_page: int = 10, db: Session = Depends(get_db)):
-    offset = (page - 1) * items_per_page
-    
-    count_query = text("""
-        SELECT COUNT(*) as total
-        FROM study_sessions ss
-        WHERE ss.group_id = :group_id
-    """)
-    total_items = db.execute(count_query, {"group_id": group_id}).scalar()
-    
-    query = text("""
-        SELECT 
-            ss.id,
-            sa.name as activity_name,
-            g.name as group_name,
-            ss.created_at as start_time,
-            ss.end_time,
-            COUNT(wri.id) as review_items_count
-        FROM study_sessions ss
-        JOIN study_activities sa ON ss.study_activity_id = sa.id
-        JOIN groups g ON ss.group_id = g.id
-        LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-        WHERE ss.group_id = :group_id
-        GROUP BY ss.id, sa.name, g.name, ss.created_at, ss.end_time
-        ORDER BY ss.created_at DESC
-        LIMIT :limit OFFSET :offset
-    """)
-    
-    results = db.execute(query, {
+@router.get("/groups/{group_id}/due-words", response_model=DueWordsResponse)
+async def get_due_words(group_id: int, limit: int = Query(20, ge=1, le=500), db: Session = Depends(get_db)):
+    results = await fetch_all(db, statements.DUE_WORDS, {
         "group_id": group_id,
-        "limit": items_per_page,
-        "offset": offset
-    }).fetchall()
-    
-    study_sessions = [
-        StudySession(
-            id=row.id,
-            activity_name=row.activity_name,
-            group_name=row.group_name,
-            start_time=row.start_time,
-            end_time=row.end_time,
-            review_items_count=row.review_items_count
-        )
-        for row in results
-    ]
-    
-    total_pages = (total_items + items_per_page - 1) // items_per_page
-    
-    pagination = Pagination(
-        current_page=page,
-        total_pages=total_pages,
-        total_items=total_items,
-        items_per_page=items_per_page
-    )
-    
-    return StudySessionsResponse(
-        study_sessions=study_sessions,
-        pagination=pagination
-    )
+        "now": format_timestamp(datetime.now(timezone.utc)),
+        "limit": limit
+    })
+
+    if not results:
+        group = await fetch_one(db, statements.GROUP_EXISTS, {"group_id": group_id})
+        if not group:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Group with id {group_id} not found"
+            )
+
+    return FastJSONResponse({"group_id": group_id, "items": rows_as_dicts(results, DueWord)})
+
+
+@router.get("/groups/{group_id}/study-sessions", response_model=StudySessionsResponse)
+async def get_study_sessions_by_group(group_id: int, page: int = 1, items_per_page: int = 10,
+                                      cursor: Optional[str] = None, include_total: bool = True,
+                                      db: Session = Depends(get_db)):
+    return await study_sessions_response(db, "group", group_id, page, items_per_page, cursor, include_total)
 
 
 # Study sessions endpoints
 @router.get("/study-sessions", response_model=StudySessionsResponse)
-async def list_study_sessions(page: int = 1, items_per_page: int = 10, db: Session = Depends(get_db)):
-    offset = (page - 1) * items_per_page
-    
-    count_query = text("""
-        SELECT COUNT(*) as total
-        FROM study_sessions
-    """)
-    total_items = db.execute(count_query).scalar()
-    
-    query = text("""
-        SELECT 
-            ss.id,
-            sa.name as activity_name,
-            g.name as group_name,
-            ss.created_at as start_time,
-            ss.end_time,
-            COUNT(wri.id) as review_items_count
-        FROM study_sessions ss
-        JOIN study_activities sa ON ss.study_activity_id = sa.id
-        JOIN groups g ON ss.group_id = g.id
-        LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-        GROUP BY ss.id, sa.name, g.name, ss.created_at, ss.end_time
-        ORDER BY ss.created_at DESC
-        LIMIT :limit OFFSET :offset
-    """)
-    
-    results = db.execute(query, {
-        "limit": items_per_page,
-        "offset": offset
-    }).fetchall()
-    
-    study_sessions = [
-        StudySession(
-            id=row.id,
-            activity_name=row.activity_name,
-            group_name=row.group_name,
-            start_time=row.start_time,
-            end_time=row.end_time,
-            review_items_count=row.review_items_count
-        )
-        for row in results
-    ]
-    
-    total_pages = (total_items + items_per_page - 1) // items_per_page
-    
-    pagination = Pagination(
-        current_page=page,
-        total_pages=total_pages,
-        total_items=total_items,
-        items_per_page=items_per_page
-    )
-    
-    return StudySessionsResponse(
-        study_sessions=study_sessions,
-        pagination=pagination
-    )
+async def list_study_sessions(page: int = 1, items_per_page: int = 10, cursor: Optional[str] = None,
+                              include_total: bool = True, db: Session = Depends(get_db)):
+    return await study_sessions_response(db, None, None, page, items_per_page, cursor, include_total)
 
 
 @router.get("/study-sessions/{session_id}", response_model=StudySessionDetail)
 async def get_study_session(session_id: int, db: Session = Depends(get_db)):
-    query = text("""
-        SELECT 
-            ss.id,
-            sa.name as activity_name,
-            g.name as group_name,
-            ss.created_at as start_time,
-            ss.end_time,
-            COUNT(wri.id) as review_items_count,
-            COUNT(CASE WHEN wri.correct THEN 1 END) as correct_count,
-            COUNT(CASE WHEN NOT wri.correct THEN 1 END) as incorrect_count
-        FROM study_sessions ss
-        JOIN study_activities sa ON ss.study_activity_id = sa.id
-        JOIN groups g ON ss.group_id = g.id
-        LEFT JOIN word_review_items wri ON ss.id = wri.study_session_id
-        WHERE ss.id = :session_id
-        GROUP BY ss.id, sa.name, g.name, ss.created_at, ss.end_time
-    """)
-    
-    result = db.execute(query, {"session_id": session_id}).first()
+    buffer = review_buffer.review_buffer
+    if buffer is not None and buffer.has_unflushed(session_id):
+        # Lee sus propias escrituras: suma los repasos aceptados aún sin volcar
+        result = await run_in_db_thread(buffer.read_session, db, statements.STUDY_SESSION, session_id)
+    else:
+        result = await fetch_one(db, statements.STUDY_SESSION, {"session_id": session_id})
+        result = result._mapping if result else None
     
     if not result:
         raise HTTPException(
@@ -779,70 +909,92 @@ async def get_study_session(session_id: int, db: Session = Depends(get_db)):
             detail=f"Study session with id {session_id} not found"
         )
     
-    return StudySessionDetail(
-        id=result.id,
-        activity_name=result.activity_name,
-        group_name=result.group_name,
-        start_time=result.start_time,
-        end_time=result.end_time,
-        review_items_count=result.review_items_count,
-        correct_count=result.correct_count,
-        incorrect_count=result.incorrect_count
-    )
+    return StudySessionDetail(**result)
+
+
+@router.post("/study-sessions/{session_id}/finish", response_model=StudySessionDetail)
+async def finish_study_session(session_id: int):
+    """
+    Stamp the session's end_time and return its summary. Finishing a session
+    twice keeps the first end_time.
+    """
+    def finish(db: Session) -> StudySessionDetail:
+        finished = db.execute(statements.FINISH_STUDY_SESSION, {
+            "session_id": session_id,
+            "end_time": format_timestamp(datetime.now(timezone.utc))
+        }).first()
+        if not finished:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Study session with id {session_id} not found"
+            )
+        return StudySessionDetail(**db.execute(statements.STUDY_SESSION, {"session_id": session_id}).mappings().one())
+
+    return await run_in_transaction(finish)
+
+
+@router.post("/study-sessions/{session_id}/reviews", response_model=ReviewBatchResult,
+             responses={202: {"model": ReviewBatchQueued, "description": "Queued in the review buffer"},
+                        503: {"description": "The review buffer is full"}})
+async def create_study_session_reviews(session_id: int, batch: ReviewBatchRequest):
+    """
+    Record a batch of reviews in one transaction and return the session totals.
+
+    With the review buffer enabled the batch is validated, queued and
+    acknowledged with 202; it is written by the next buffer flush. A full
+    buffer answers 503 with Retry-After.
+    """
+    buffer = review_buffer.review_buffer
+    if buffer is not None and buffer.running:
+        def check():
+            db = read_session()
+            try:
+                check_review_batch(db, session_id, batch.items)
+            finally:
+                db.close()
+
+        await run_in_db_thread(check)
+        if not buffer.add(session_id, batch.items):
+            # La base no da abasto (o está fallando): no se aceptan más escrituras
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The review buffer is full, retry later",
+                headers={"Retry-After": str(max(1, round(buffer.retry_delay())))}
+            )
+        return FastJSONResponse(
+            ReviewBatchQueued(study_session_id=session_id, queued=len(batch.items)).model_dump(),
+            status_code=status.HTTP_202_ACCEPTED
+        )
+
+    return await run_in_transaction(record_reviews, session_id, batch.items)
 
 
 @router.get("/study-sessions/{session_id}/words", response_model=WordReviewResponse)
-async def get_words_by_study_session(session_id: int, page: int = 1, items_per_page: int = 100, db: Session = Depends(get_db)):
+async def get_words_by_study_session(session_id: int, page: int = 1, items_per_page: int = 100,
+                                     cursor: Optional[str] = None, include_total: bool = True,
+                                     db: Session = Depends(get_db)):
     offset = (page - 1) * items_per_page
+    after = decode_cursor(cursor, 2) if cursor else None
     
-    count_query = text("""
-        SELECT COUNT(*) as total
-        FROM word_review_items wri
-        WHERE wri.study_session_id = :session_id
-    """)
-    total_items = db.execute(count_query, {"session_id": session_id}).scalar()
+    query = statements.session_words_page(include_total, after is not None)
     
-    query = text("""
-        SELECT 
-            w.id,
-            w.spanish,
-            w.english,
-            wri.correct,
-            wri.created_at as review_time
-        FROM word_review_items wri
-        JOIN words w ON wri.word_id = w.id
-        WHERE wri.study_session_id = :session_id
-        ORDER BY wri.created_at
-        LIMIT :limit OFFSET :offset
-    """)
-    
-    results = db.execute(query, {
+    results = await fetch_all(db, query, {
         "session_id": session_id,
-        "limit": items_per_page,
-        "offset": offset
-    }).fetchall()
-    
-    words = [
-        WordReview(
-            id=row.id,
-            spanish=row.spanish,
-            english=row.english,
-            correct=row.correct,
-            review_time=row.review_time
-        )
-        for row in results
-    ]
-    
-    total_pages = (total_items + items_per_page - 1) // items_per_page
-    
-    pagination = Pagination(
-        current_page=page,
-        total_pages=total_pages,
-        total_items=total_items,
-        items_per_page=items_per_page
+        "after_created_at": after[0] if after else None,
+        "after_id": after[1] if after else None,
+        "limit": items_per_page + 1,
+        "offset": 0 if after else offset
+    })
+    results, next_cursor = split_page(results, items_per_page, lambda row: (row.review_time, row.review_id))
+    
+    words = rows_as_dicts(results, WordReview)
+    
+    pagination = await build_pagination(
+        db, results, page, items_per_page, include_total,
+        statements.SESSION_WORDS_COUNT, {"session_id": session_id}, next_cursor
     )
     
-    return WordReviewResponse(
-        words=words,
-        pagination=pagination
-    )
+    return FastJSONResponse({
+        "words": words,
+        "pagination": pagination.model_dump()
+    })
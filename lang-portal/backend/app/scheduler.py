@@ -0,0 +1,68 @@
+"""
+Planificador de repasos espaciados (SM-2).
+
+Cada palabra de un grupo tiene un estado (`word_schedules`): facilidad,
+intervalo en días, repeticiones seguidas acertadas y la fecha del próximo
+repaso. `schedule_review` aplica un repaso a ese estado; se usa tanto en la
+ruta de escritura de los repasos (`app/reviews.py`) como al reconstruir los
+estados a partir del historial (`backfill_counters.py`), de modo que ambos
+caminos llegan exactamente al mismo resultado.
+
+Los repasos solo registran acierto o fallo, así que se traducen a la escala
+de calidad 0-5 de SM-2 como 4 (acierto) y 1 (fallo).
+"""
+
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+# Calidad SM-2 asignada a un acierto y a un fallo
+CORRECT_QUALITY = 4
+INCORRECT_QUALITY = 1
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ScheduleState(NamedTuple):
+    ease: float = DEFAULT_EASE
+    interval_days: int = 0
+    repetitions: int = 0
+    next_review_at: Optional[str] = None
+    last_reviewed_at: Optional[str] = None
+
+
+def schedule_review(state: ScheduleState, correct: bool, reviewed_at: str) -> ScheduleState:
+    """
+    Devuelve el estado tras un repaso hecho en `reviewed_at` (formato de
+    CURRENT_TIMESTAMP, UTC).
+
+    >>> state = schedule_review(ScheduleState(), True, "2025-03-01 10:00:00")
+    >>> state.interval_days, state.next_review_at
+    (1, '2025-03-02 10:00:00')
+    """
+    quality = CORRECT_QUALITY if correct else INCORRECT_QUALITY
+
+    if quality >= 3:
+        if state.repetitions == 0:
+            interval_days = 1
+        elif state.repetitions == 1:
+            interval_days = 6
+        else:
+            interval_days = max(1, round(state.interval_days * state.ease))
+        repetitions = state.repetitions + 1
+    else:
+        interval_days = 1
+        repetitions = 0
+
+    ease = max(MIN_EASE, state.ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    next_review_at = datetime.strptime(reviewed_at, TIMESTAMP_FORMAT) + timedelta(days=interval_days)
+    return ScheduleState(
+        ease=round(ease, 4),
+        interval_days=interval_days,
+        repetitions=repetitions,
+        next_review_at=next_review_at.strftime(TIMESTAMP_FORMAT),
+        last_reviewed_at=reviewed_at
+    )
@@ -0,0 +1,90 @@
+"""
+Búsqueda de palabras sobre el índice FTS5 `words_fts` (migración 0009).
+
+El texto del usuario nunca se pasa tal cual a MATCH: solo se conservan sus
+palabras y cada una se cita como cadena FTS5, de modo que comillas, asteriscos
+u operadores (AND, NEAR, ...) no cambian la consulta. La última palabra se
+busca como prefijo para servir el autocompletado.
+
+En PostgreSQL el mismo índice es la columna generada `words.search_vector`
+con su índice GIN (migrations/postgresql/0009), y las palabras se citan como
+lexemas de un `tsquery`. `SEARCH_SQL` da, para cada dialecto, las piezas de SQL
+con las que `/words/search` construye sus consultas.
+"""
+
+import os
+import re
+from typing import NamedTuple, Optional
+
+# bm25 tiene que puntuar todas las coincidencias antes de devolver la primera,
+# así que solo se ordena por relevancia cuando hay como mucho estas; un prefijo
+# corto sobre un vocabulario grande se sirve en orden de id, que FTS5 recorre
+# de forma incremental y corta en cuanto llena la página.
+SEARCH_RANKED_MATCHES = int(os.getenv("SEARCH_RANKED_MATCHES", "2000"))
+
+# Palabras tal como las separa el tokenizador unicode61
+TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """
+    Convierte la búsqueda del usuario en una expresión MATCH de FTS5, o None si
+    no contiene ninguna palabra.
+
+    >>> build_match_query('adios  amig')
+    '"adios" "amig"*'
+    """
+    terms = TERM.findall(q)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def build_tsquery(q: str) -> Optional[str]:
+    """
+    Convierte la búsqueda del usuario en un `tsquery` de PostgreSQL con las
+    mismas reglas que `build_match_query`, o None si no contiene ninguna palabra.
+
+    >>> build_tsquery('adios  amig')
+    "'adios' & 'amig':*"
+    """
+    terms = TERM.findall(q)
+    if not terms:
+        return None
+    quoted = [f"'{term}'" for term in terms]
+    quoted[-1] += ":*"
+    return " & ".join(quoted)
+
+
+class SearchSQL(NamedTuple):
+    """Piezas de SQL de la búsqueda de palabras en un dialecto."""
+    # Construye el parámetro :match a partir del texto del usuario
+    build_query: object
+    # Filas que coinciden con :match (tras FROM)
+    source: str
+    # Id de la palabra en `source`
+    id_column: str
+    # Relevancia; menor es mejor, como el `rank` (bm25) de FTS5
+    rank: str
+
+
+_TSQUERY = "to_tsquery('simple', fold_accents(:match))"
+
+SEARCH_SQL = {
+    "sqlite": SearchSQL(
+        build_query=build_match_query,
+        source="words_fts WHERE words_fts MATCH :match",
+        id_column="rowid",
+        rank="rank",
+    ),
+    # ts_rank con normalización 1 divide por el logaritmo de la longitud del
+    # documento, así que las coincidencias más cortas van antes, como con bm25
+    "postgresql": SearchSQL(
+        build_query=build_tsquery,
+        source=f"words WHERE search_vector @@ {_TSQUERY}",
+        id_column="id",
+        rank=f"(-ts_rank(search_vector, {_TSQUERY}, 1))::float8",
+    ),
+}
@@ -0,0 +1,167 @@
+"""
+Registro de consultas lentas.
+
+Cada sentencia que tarda más que el umbral del motor se anota una sola vez por
+forma de SQL: el texto normalizado (literales y listas de parámetros colapsados),
+los tipos de los parámetros, la duración, la ruta que la lanzó y el
+`EXPLAIN QUERY PLAN` obtenido en ese momento en la misma conexión, con los
+mismos parámetros y por tanto con las mismas estadísticas e índices. Las
+repeticiones de una forma ya registrada solo actualizan su recuento, su máximo
+y la fecha de la última vez, sin volver a pedir el plan.
+
+El registro guarda como mucho `SLOW_QUERY_LOG_SIZE` formas y al llenarse
+descarta la que lleva más tiempo sin repetirse (LRU): una consulta lenta que
+sigue apareciendo no sale del registro.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import event
+
+from app.metrics import current_route
+
+logger = logging.getLogger(__name__)
+
+# Sentencias de las que se puede pedir el plan
+EXPLAINABLE = ("select", "with", "insert", "update", "delete", "replace")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Forma de la sentencia: literales sustituidos por `?`, listas de parámetros
+    (como las de los IN expandidos) reducidas a `?, ...` y espacios colapsados.
+    """
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("?, ...", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def parameter_shape(parameters, executemany: bool = False) -> str:
+    """Tipos de los parámetros, sin sus valores: `(int, str)` o `{id: int}`."""
+    if executemany:
+        rows = list(parameters or ())
+        first = parameter_shape(rows[0]) if rows else "()"
+        return f"{len(rows)} x {first}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    names = [type(value).__name__ for value in parameters or ()]
+    if len(names) > 8 and len(set(names)) == 1:
+        return f"({names[0]} x {len(names)})"
+    return "(" + ", ".join(names) + ")"
+
+
+def explain(cursor, statement: str, parameters, executemany: bool) -> List[str]:
+    """Plan de `statement` en la conexión de `cursor`, sin ejecutarla."""
+    if not statement.lstrip().lower().startswith(EXPLAINABLE):
+        return []
+    if executemany:
+        parameters = next(iter(parameters or ()), ())
+    connection = cursor.connection
+    try:
+        if isinstance(connection, sqlite3.Connection):
+            # Un cursor simple, para que las filas del plan no cuenten en las métricas
+            explain_cursor = connection.cursor(sqlite3.Cursor)
+            explain_cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            plan = [row[-1] for row in explain_cursor.fetchall()]
+        else:
+            # En PostgreSQL un error aborta la transacción del llamador: el
+            # EXPLAIN va en su propio savepoint y un fallo solo deshace ese
+            with connection.transaction():
+                explain_cursor = connection.cursor()
+                explain_cursor.execute("EXPLAIN " + statement, parameters)
+                plan = [str(row[0]) for row in explain_cursor.fetchall()]
+        explain_cursor.close()
+        return plan
+    except Exception as exc:  # el plan es informativo; nunca debe romper la consulta
+        return [f"EXPLAIN falló: {exc}"]
+
+
+class SlowQueryLog:
+    """Formas de SQL lentas, en un LRU con lock."""
+
+    def __init__(self, threshold_ms: float, size: int):
+        self.threshold_ms = threshold_ms
+        self.size = size
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, cursor, statement, parameters, executemany, duration_ms):
+        sql = normalize_sql(statement)
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._lock:
+            entry = self._entries.get(sql)
+            if entry is not None:
+                entry["count"] += 1
+                entry["max_ms"] = max(entry["max_ms"], duration_ms)
+                entry["last_seen"] = now
+                self._entries.move_to_end(sql)
+                return
+
+        # El plan se pide fuera del lock: puede tardar y otras consultas lentas
+        # de otros hilos no deben esperar por él
+        entry = {
+            "sql": sql,
+            "params": parameter_shape(parameters, executemany),
+            "duration_ms": duration_ms,
+            "max_ms": duration_ms,
+            "count": 1,
+            "route": current_route(),
+            "plan": explain(cursor, statement, parameters, executemany),
+            "first_seen": now,
+            "last_seen": now,
+        }
+        with self._lock:
+            if sql in self._entries:
+                # Otro hilo registró la misma forma mientras se pedía el plan
+                self._entries[sql]["count"] += 1
+                self._entries.move_to_end(sql)
+                return
+            self._entries[sql] = entry
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+        logger.warning(
+            "Consulta lenta (%.1f ms) en %s: %s params=%s plan=%s",
+            duration_ms, entry["route"] or "-", sql, entry["params"], " | ".join(entry["plan"]),
+        )
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Formas registradas, de la vista más recientemente a la que lleva más tiempo sin verse."""
+        with self._lock:
+            return [dict(entry) for entry in reversed(self._entries.values())]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def instrument_engine(engine, log: SlowQueryLog):
+    """Mide cada sentencia de `engine` y registra en `log` las que superan su umbral."""
+    if log.threshold_ms <= 0:
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._slow_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        duration_ms = (time.perf_counter() - context._slow_query_start) * 1000
+        if duration_ms >= log.threshold_ms:
+            log.record(cursor, statement, parameters, executemany, duration_ms)
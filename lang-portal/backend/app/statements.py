@@ -0,0 +1,804 @@
+"""
+Registro de las sentencias SQL del router y de su caché.
+
+Cada sentencia del router (`app/routers/api.py`) y de las rutas de escritura
+(`app/reviews.py`, `app/stats.py`, `app/cache.py`) se construye una sola vez: las fijas
+como constantes del módulo y las que varían (con o sin total, con o sin
+cursor, orden de los grupos, dialecto de la búsqueda) con constructores
+memorizados con `lru_cache`, de modo que cada variante es siempre el mismo
+objeto `TextClause`. Los parámetros conocidos llevan su tipo declarado
+(`PARAM_TYPES`) y las columnas que no son texto o enteros, su tipo de resultado.
+
+Con ello una sentencia se encuentra en dos cachés:
+
+- la caché de compilación de SQLAlchemy (`query_cache_size` del motor), que
+  evita volver a compilar la sentencia en cada petición;
+- la caché de sentencias preparadas de sqlite3 (`cached_statements`, un LRU
+  por conexión indexado por el texto SQL), que evita volver a preparar el
+  mismo SQL en SQLite. Como el texto generado es siempre idéntico para una
+  misma variante, la sentencia preparada se reutiliza.
+
+`StatementCacheStats` mide ambas desde los hooks del motor: los aciertos de
+SQLAlchemy salen de `context.cache_hit`, y los de sqlite3 de un espejo del LRU
+de cada conexión (el módulo no expone el suyo), con el mismo tamaño.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Optional
+
+from sqlalchemy import Boolean, Float, Integer, String, bindparam, event, text
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.sql.elements import TextClause
+
+from app.pagination import total_column
+from app.search import SEARCH_SQL
+
+# Tamaño del LRU de sentencias preparadas de cada conexión de sqlite3 (128 por
+# defecto en el módulo). Las listas IN expandidas generan un texto por longitud,
+# así que se deja margen para que no desalojen a las sentencias del router.
+SQLITE_CACHED_STATEMENTS = int(os.getenv("SQLITE_CACHED_STATEMENTS", "256"))
+
+# Tipos de los parámetros con nombre fijo en las sentencias del router
+PARAM_TYPES = {
+    "activity_id": Integer,
+    "group_id": Integer,
+    "session_id": Integer,
+    "word_id": Integer,
+    "after_id": Integer,
+    "min_words": Integer,
+    "limit": Integer,
+    "offset": Integer,
+    "items_per_page": Integer,
+    "after_rank": Float,
+    "after_created_at": String,
+    "created_at": String,
+    "from_date": String,
+    "to_date": String,
+    "now": String,
+    "end_time": String,
+    "today": String,
+    "yesterday": String,
+    "match": String,
+    "ids": String,
+    "day": String,
+    "streak": Integer,
+}
+
+# Los mismos nombres de parámetro que reconoce text()
+_BIND_NAME = re.compile(r"(?<![:\w\\]):(\w+)(?!:)")
+
+
+def statement(sql: str, **columns) -> TextClause:
+    """
+    `text(sql)` con el tipo de cada parámetro conocido y, si se indican, los
+    tipos de las columnas del resultado (`correct=Boolean`).
+    """
+    clause = text(sql)
+    typed = [bindparam(name, type_=PARAM_TYPES[name])
+             for name in dict.fromkeys(_BIND_NAME.findall(sql)) if name in PARAM_TYPES]
+    if typed:
+        clause = clause.bindparams(*typed)
+    if columns:
+        clause = clause.columns(**columns)
+    return clause
+
+
+# ======================
+# Dashboard y estadísticas
+# ======================
+
+# La última sesión por el índice de created_at, con su resumen guardado
+# (mantenido por los triggers de word_review_items, migración 0013)
+LAST_STUDY_SESSION = statement("""
+    SELECT
+        ss.id,
+        sa.name as activity_name,
+        g.name as group_name,
+        ss.created_at,
+        sa.id as study_activity_id,
+        g.id as group_id,
+        ss.correct_count,
+        ss.incorrect_count,
+        ss.total_items
+    FROM study_sessions ss
+    JOIN study_activities sa ON ss.study_activity_id = sa.id
+    JOIN groups g ON ss.group_id = g.id
+    ORDER BY ss.created_at DESC, ss.id DESC
+    LIMIT 1
+""")
+
+# Un total de table_counts (migración 0014): la suma de sus shards, una
+# búsqueda por clave primaria
+def table_count_sql(name: str) -> str:
+    return f"SELECT CAST(COALESCE(SUM(value), 0) AS BIGINT) FROM table_counts WHERE name = '{name}'"
+
+
+# Los totales salen de los contadores de table_counts, no de recorrer las tablas
+STUDY_PROGRESS = statement(f"""
+    WITH WordStats AS (
+        SELECT
+            ({table_count_sql("words")}) as total_available_words,
+            ({table_count_sql("words_studied")}) as total_words_studied
+    )
+    SELECT
+        total_words_studied,
+        total_available_words,
+        CASE
+            WHEN total_available_words > 0 THEN
+                (total_words_studied * 100 / total_available_words)
+            ELSE 0
+        END as mastery_percentage
+    FROM WordStats
+""")
+
+QUICK_STATS = statement(f"""
+    SELECT
+        COALESCE(
+            ({table_count_sql("correct_reviews")}) * 100 / NULLIF(({table_count_sql("word_review_items")}), 0),
+            0
+        ) as success_rate,
+        ({table_count_sql("study_sessions")}) as total_study_sessions,
+        ({table_count_sql("groups")}) as total_active_groups
+""")
+
+# Los tres agregados del dashboard en una sola sentencia, y por tanto en una
+# sola instantánea de la base: la última sesión por el índice de created_at y
+# los totales de table_counts, sin recorrer ninguna tabla que crezca.
+DASHBOARD = statement(f"""
+    WITH last_session AS (
+        SELECT
+            ss.id,
+            sa.name AS activity_name,
+            g.name AS group_name,
+            ss.created_at,
+            sa.id AS study_activity_id,
+            g.id AS group_id,
+            ss.correct_count,
+            ss.incorrect_count,
+            ss.total_items
+        FROM study_sessions ss
+        JOIN study_activities sa ON ss.study_activity_id = sa.id
+        JOIN groups g ON ss.group_id = g.id
+        ORDER BY ss.created_at DESC, ss.id DESC
+        LIMIT 1
+    ),
+    totals AS (
+        SELECT
+            ({table_count_sql("words_studied")}) AS total_words_studied,
+            ({table_count_sql("words")}) AS total_available_words,
+            ({table_count_sql("correct_reviews")}) AS correct_reviews,
+            ({table_count_sql("word_review_items")}) AS total_reviews,
+            ({table_count_sql("study_sessions")}) AS total_study_sessions,
+            ({table_count_sql("groups")}) AS total_active_groups
+    )
+    SELECT
+        ls.*,
+        t.total_words_studied,
+        t.total_available_words,
+        COALESCE(t.correct_reviews * 100 / NULLIF(t.total_reviews, 0), 0) AS success_rate,
+        t.total_study_sessions,
+        t.total_active_groups,
+        (
+            SELECT streak FROM study_daily_stats
+            WHERE day IN (:today, :yesterday)
+            ORDER BY day DESC
+            LIMIT 1
+        ) AS current_streak,
+        (SELECT MAX(streak) FROM study_daily_stats) AS longest_streak
+    FROM totals t
+    LEFT JOIN last_session ls ON 1 = 1
+""")
+
+DAILY_STATS = statement("""
+    SELECT day, sessions, reviews, correct_count, incorrect_count
+    FROM study_daily_stats
+    WHERE day BETWEEN :from_date AND :to_date
+    ORDER BY day
+""")
+
+
+# ======================
+# Actividades de estudio
+# ======================
+
+STUDY_ACTIVITIES_COUNT = statement("""
+    SELECT COUNT(*) as total
+    FROM study_activities
+""")
+
+STUDY_ACTIVITIES_PAGE = statement("""
+    SELECT
+        id,
+        name,
+        thumbnail_url,
+        description,
+        launch_url
+    FROM study_activities
+    LIMIT :limit OFFSET :offset
+""")
+
+STUDY_ACTIVITY = statement("""
+    SELECT
+        id,
+        name,
+        thumbnail_url,
+        description,
+        launch_url
+    FROM study_activities
+    WHERE id = :activity_id
+""")
+
+STUDY_ACTIVITY_LAUNCH_URL = statement("""
+    SELECT launch_url
+    FROM study_activities
+    WHERE id = :activity_id
+""")
+
+INSERT_STUDY_SESSION = statement("""
+    INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+    VALUES (:group_id, :study_activity_id, :created_at)
+    RETURNING id, created_at
+""")
+
+
+# ======================
+# Palabras
+# ======================
+
+WORDS_COUNT_SQL = table_count_sql("words")
+WORDS_COUNT = statement(WORDS_COUNT_SQL)
+
+
+@lru_cache(maxsize=None)
+def words_page(include_total: bool, seek: bool) -> TextClause:
+    """Página de /words, desde un offset o tras el id del cursor."""
+    return statement(f"""
+        SELECT
+            w.id,
+            w.spanish,
+            w.english,
+            COALESCE(ws.correct_count, 0) as correct_count,
+            COALESCE(ws.wrong_count, 0) as wrong_count
+            {total_column(WORDS_COUNT_SQL, include_total)}
+        FROM words w
+        LEFT JOIN word_stats ws ON w.id = ws.word_id
+        {"WHERE w.id > :after_id" if seek else ""}
+        ORDER BY w.id
+        LIMIT :items_per_page OFFSET :offset
+    """)
+
+
+# Una palabra con sus contadores de repasos (mantenidos por los triggers de
+# word_stats), tal como la devuelven /words/{id} y /words/batch
+WORD_COLUMNS = """
+    w.id,
+    w.spanish,
+    w.english,
+    COALESCE(ws.correct_count, 0) as correct_count,
+    COALESCE(ws.wrong_count, 0) as wrong_count
+"""
+
+WORD = statement(f"""
+    SELECT {WORD_COLUMNS}
+    FROM words w
+    LEFT JOIN word_stats ws ON w.id = ws.word_id
+    WHERE w.id = :word_id
+""")
+
+# Lista de ids recibida como un array JSON (:ids), con su posición. Un único
+# parámetro mantiene el mismo texto SQL para cualquier número de ids, en lugar
+# de un IN expandido distinto (y otra sentencia preparada) por cada longitud
+ID_LISTS = {
+    "sqlite": "json_each(:ids) j",
+    "postgresql": "jsonb_array_elements_text(CAST(:ids AS jsonb)) WITH ORDINALITY AS j(value, key)",
+}
+
+
+@lru_cache(maxsize=None)
+def words_by_ids(dialect: str) -> TextClause:
+    """
+    Las palabras de una lista de ids en el orden pedido, en una sola consulta.
+    Los ids que no existen salen con `id` NULL.
+    """
+    return statement(f"""
+        SELECT
+            CAST(j.value AS INTEGER) as requested_id,
+            {WORD_COLUMNS}
+        FROM {ID_LISTS[dialect]}
+        LEFT JOIN words w ON w.id = CAST(j.value AS INTEGER)
+        LEFT JOIN word_stats ws ON w.id = ws.word_id
+        ORDER BY j.key
+    """)
+
+
+@lru_cache(maxsize=None)
+def search_match_count(dialect: str) -> TextClause:
+    """Coincidencias de la búsqueda, contadas como mucho hasta :limit."""
+    return statement(f"""
+        SELECT COUNT(*) FROM (
+            SELECT 1 FROM {SEARCH_SQL[dialect].source} LIMIT :limit
+        ) m
+    """)
+
+
+@lru_cache(maxsize=None)
+def search_count(dialect: str) -> TextClause:
+    return statement(f"SELECT COUNT(*) FROM {SEARCH_SQL[dialect].source}")
+
+
+@lru_cache(maxsize=None)
+def search_page(dialect: str, ranked: bool, seek: bool, include_total: bool) -> TextClause:
+    """
+    Página de /words/search, por relevancia o por id. La página se busca y se
+    salta con el cursor dentro del propio índice de texto; solo esas filas se
+    cruzan con words.
+    """
+    search = SEARCH_SQL[dialect]
+    rank, word_id = search.rank, search.id_column
+    if ranked:
+        rank_column = f"{rank} AS rank"
+        seek_condition = f"AND ({rank} > :after_rank OR ({rank} = :after_rank AND {word_id} > :after_id))"
+        order_by = f"rank, {word_id}"
+    else:
+        rank_column = "NULL AS rank"
+        seek_condition = f"AND {word_id} > :after_id"
+        order_by = word_id
+
+    return statement(f"""
+        SELECT
+            w.id,
+            w.spanish,
+            w.english,
+            COALESCE(ws.correct_count, 0) as correct_count,
+            COALESCE(ws.wrong_count, 0) as wrong_count,
+            f.rank
+            {total_column(f"SELECT COUNT(*) FROM {search.source}", include_total)}
+        FROM (
+            SELECT {word_id} AS id, {rank_column}
+            FROM {search.source}
+            {seek_condition if seek else ""}
+            ORDER BY {order_by}
+            LIMIT :items_per_page
+        ) f
+        JOIN words w ON w.id = f.id
+        LEFT JOIN word_stats ws ON w.id = ws.word_id
+        ORDER BY {"f.rank, f.id" if ranked else "f.id"}
+    """)
+
+
+# ======================
+# Grupos
+# ======================
+
+def _groups_count_sql(min_words: bool) -> str:
+    if not min_words:
+        return table_count_sql("groups")
+    return f"""
+        SELECT COUNT(*)
+        FROM groups g
+        {"WHERE g.words_count >= :min_words" if min_words else ""}
+    """
+
+
+@lru_cache(maxsize=None)
+def groups_count(min_words: bool) -> TextClause:
+    return statement(_groups_count_sql(min_words))
+
+
+@lru_cache(maxsize=None)
+def groups_page(sort_by: str, order: str, min_words: bool, seek: bool, include_total: bool) -> TextClause:
+    """
+    Página de /groups. words_count lo mantienen los triggers de word_groups; la
+    ordenación y el filtro usan idx_groups_name / idx_groups_words_count.
+    """
+    sort_column = "g.name" if sort_by == "name" else "g.words_count"
+    direction = "DESC" if order == "desc" else "ASC"
+    conditions = []
+    if min_words:
+        conditions.append("g.words_count >= :min_words")
+    if seek:
+        conditions.append(f"({sort_column}, g.id) {'<' if order == 'desc' else '>'} (:after_key, :after_id)")
+
+    return statement(f"""
+        SELECT
+            g.id,
+            g.name,
+            g.words_count as word_count
+            {total_column(_groups_count_sql(min_words), include_total)}
+        FROM groups g
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY {sort_column} {direction}, g.id {direction}
+        LIMIT :limit OFFSET :offset
+    """)
+
+
+GROUP = statement("""
+    SELECT g.id, g.name, g.words_count as word_count
+    FROM groups g
+    WHERE g.id = :group_id
+""")
+
+GROUP_EXISTS = statement("SELECT 1 FROM groups WHERE id = :group_id")
+
+GROUP_WORDS_COUNT_SQL = """
+    SELECT COUNT(*)
+    FROM word_groups
+    WHERE group_id = :group_id
+"""
+GROUP_WORDS_COUNT = statement(GROUP_WORDS_COUNT_SQL)
+
+
+@lru_cache(maxsize=None)
+def group_words_page(include_total: bool, seek: bool) -> TextClause:
+    return statement(f"""
+        SELECT
+            w.id,
+            w.spanish,
+            w.english,
+            COALESCE(ws.correct_count, 0) as correct_count,
+            COALESCE(ws.wrong_count, 0) as wrong_count
+            {total_column(GROUP_WORDS_COUNT_SQL, include_total)}
+        FROM words w
+        JOIN word_groups wg ON w.id = wg.word_id
+        LEFT JOIN word_stats ws ON w.id = ws.word_id
+        WHERE wg.group_id = :group_id
+        {"AND wg.word_id > :after_id" if seek else ""}
+        ORDER BY wg.word_id
+        LIMIT :items_per_page OFFSET :offset
+    """)
+
+
+# Palabras del grupo cuyo próximo repaso (SM-2) ya ha llegado, las más
+# atrasadas primero: un recorrido de idx_word_schedules_due
+DUE_WORDS = statement("""
+    SELECT
+        w.id,
+        w.spanish,
+        w.english,
+        s.ease,
+        s.interval_days,
+        s.repetitions,
+        s.next_review_at,
+        s.last_reviewed_at
+    FROM word_schedules s
+    JOIN words w ON w.id = s.word_id
+    WHERE s.group_id = :group_id AND s.next_review_at <= :now
+    ORDER BY s.next_review_at, s.word_id
+    LIMIT :limit
+""")
+
+
+# ======================
+# Sesiones de estudio
+# ======================
+
+# Filtros de los listados de sesiones: todas, las de un grupo o las de una
+# actividad, con el parámetro que recibe el id
+SESSION_FILTERS = {
+    None: None,
+    "group": ("ss.group_id", "group_id"),
+    "activity": ("ss.study_activity_id", "activity_id"),
+}
+
+
+def _study_sessions_count_sql(by: Optional[str]) -> str:
+    session_filter = SESSION_FILTERS[by]
+    if session_filter is None:
+        return table_count_sql("study_sessions")
+    return f"""
+        SELECT COUNT(*) as total
+        FROM study_sessions ss
+        {f"WHERE {session_filter[0]} = :{session_filter[1]}" if session_filter else ""}
+    """
+
+
+@lru_cache(maxsize=None)
+def study_sessions_count(by: Optional[str]) -> TextClause:
+    return statement(_study_sessions_count_sql(by))
+
+
+@lru_cache(maxsize=None)
+def study_sessions_page(by: Optional[str], include_total: bool, seek: bool) -> TextClause:
+    """
+    Página de sesiones, las más recientes primero, de /study-sessions,
+    /groups/{id}/study-sessions (`by="group"`) o
+    /study-activities/{id}/study-sessions (`by="activity"`).
+    """
+    session_filter = SESSION_FILTERS[by]
+    conditions = []
+    if session_filter:
+        conditions.append(f"{session_filter[0]} = :{session_filter[1]}")
+    if seek:
+        conditions.append("(ss.created_at, ss.id) < (:after_created_at, :after_id)")
+
+    return statement(f"""
+        SELECT
+            ss.id,
+            sa.name as activity_name,
+            g.name as group_name,
+            ss.created_at as start_time,
+            ss.end_time,
+            ss.total_items as review_items_count
+            {total_column(_study_sessions_count_sql(by), include_total)}
+        FROM study_sessions ss
+        JOIN study_activities sa ON ss.study_activity_id = sa.id
+        JOIN groups g ON ss.group_id = g.id
+        {"WHERE " + " AND ".join(conditions) if conditions else ""}
+        ORDER BY ss.created_at DESC, ss.id DESC
+        LIMIT :limit OFFSET :offset
+    """)
+
+
+STUDY_SESSION = statement("""
+    SELECT
+        ss.id,
+        sa.name as activity_name,
+        g.name as group_name,
+        ss.created_at as start_time,
+        ss.end_time,
+        ss.total_items as review_items_count,
+        ss.correct_count,
+        ss.incorrect_count
+    FROM study_sessions ss
+    JOIN study_activities sa ON ss.study_activity_id = sa.id
+    JOIN groups g ON ss.group_id = g.id
+    WHERE ss.id = :session_id
+""")
+
+# Cierra la sesión; una sesión ya cerrada conserva su end_time
+FINISH_STUDY_SESSION = statement("""
+    UPDATE study_sessions
+    SET end_time = COALESCE(end_time, :end_time)
+    WHERE id = :session_id
+    RETURNING id
+""")
+
+SESSION_WORDS_COUNT_SQL = """
+    SELECT COUNT(*) as total
+    FROM word_review_items wri
+    WHERE wri.study_session_id = :session_id
+"""
+SESSION_WORDS_COUNT = statement(SESSION_WORDS_COUNT_SQL)
+
+
+@lru_cache(maxsize=None)
+def session_words_page(include_total: bool, seek: bool) -> TextClause:
+    return statement(f"""
+        SELECT
+            w.id,
+            w.spanish,
+            w.english,
+            wri.correct,
+            wri.created_at as review_time,
+            wri.id as review_id
+            {total_column(SESSION_WORDS_COUNT_SQL, include_total)}
+        FROM word_review_items wri
+        JOIN words w ON wri.word_id = w.id
+        WHERE wri.study_session_id = :session_id
+        {"AND (wri.created_at, wri.id) > (:after_created_at, :after_id)" if seek else ""}
+        ORDER BY wri.created_at, wri.id
+        LIMIT :limit OFFSET :offset
+    """, correct=Boolean)
+
+
+# ======================
+# Repasos (app/reviews.py)
+# ======================
+
+SESSION_GROUP = statement("SELECT group_id FROM study_sessions WHERE id = :session_id")
+
+# Las listas IN expandidas dan un texto por longitud, pero la sentencia (y su
+# compilación) es siempre la misma
+EXISTING_WORD_IDS = statement("""
+    SELECT id
+    FROM words
+    WHERE id IN :word_ids
+""").bindparams(bindparam("word_ids", expanding=True))
+
+# Totales de repasos de una sesión, del resumen que mantienen los triggers
+SESSION_TOTALS = statement("""
+    SELECT
+        total_items as review_items_count,
+        correct_count,
+        incorrect_count
+    FROM study_sessions
+    WHERE id = :session_id
+""")
+
+ENSURE_WORD_STATS = statement(
+    "INSERT INTO word_stats (word_id) VALUES (:word_id) ON CONFLICT (word_id) DO NOTHING"
+)
+
+LOCK_WORD_STATS = statement("""
+    SELECT word_id FROM word_stats
+    WHERE word_id IN :word_ids
+    ORDER BY word_id
+    FOR UPDATE
+""").bindparams(bindparam("word_ids", expanding=True))
+
+INSERT_REVIEW_ITEM = statement("""
+    INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+    VALUES (:word_id, :study_session_id, :correct, :created_at)
+""")
+
+
+@lru_cache(maxsize=None)
+def word_schedules(for_update: bool) -> TextClause:
+    """Estado SM-2 de unas palabras de un grupo; `for_update` bloquea las filas."""
+    return statement(f"""
+        SELECT word_id, ease, interval_days, repetitions, next_review_at, last_reviewed_at
+        FROM word_schedules
+        WHERE group_id = :group_id AND word_id IN :word_ids
+        ORDER BY word_id
+        {"FOR UPDATE" if for_update else ""}
+    """).bindparams(bindparam("word_ids", expanding=True))
+
+
+# Historial de repasos de unas palabras en las sesiones de un grupo, en el
+# orden en que los aplica el planificador (el mismo que rebuild_schedules)
+WORD_REVIEW_HISTORY = statement("""
+    SELECT wri.word_id, wri.correct, wri.created_at
+    FROM word_review_items wri
+    JOIN study_sessions ss ON ss.id = wri.study_session_id
+    WHERE ss.group_id = :group_id AND wri.word_id IN :word_ids
+    ORDER BY wri.created_at, wri.id
+""", correct=Boolean).bindparams(bindparam("word_ids", expanding=True))
+
+UPDATE_WORD_SCHEDULE = statement("""
+    UPDATE word_schedules SET
+        ease = :ease,
+        interval_days = :interval_days,
+        repetitions = :repetitions,
+        next_review_at = :next_review_at,
+        last_reviewed_at = :last_reviewed_at
+    WHERE group_id = :group_id AND word_id = :word_id
+""")
+
+
+# ======================
+# Resumen diario (app/stats.py)
+# ======================
+
+DAILY_STREAK = statement("SELECT streak FROM study_daily_stats WHERE day = :day")
+
+SET_DAILY_STREAK = statement(
+    "UPDATE study_daily_stats SET streak = :streak WHERE day = :day AND streak != :streak"
+)
+
+DAILY_STATS_EXISTS = statement("SELECT 1 FROM study_daily_stats WHERE day = :day")
+
+EXISTING_DAILY_STATS = statement(
+    "SELECT day FROM study_daily_stats WHERE day IN :days"
+).bindparams(bindparam("days", expanding=True))
+
+ADD_DAILY_STATS = statement("""
+    INSERT INTO study_daily_stats (day, sessions, reviews, correct_count, incorrect_count)
+    VALUES (:day, :sessions, :reviews, :correct_count, :incorrect_count)
+    ON CONFLICT (day) DO UPDATE SET
+        sessions = study_daily_stats.sessions + excluded.sessions,
+        reviews = study_daily_stats.reviews + excluded.reviews,
+        correct_count = study_daily_stats.correct_count + excluded.correct_count,
+        incorrect_count = study_daily_stats.incorrect_count + excluded.incorrect_count
+""")
+
+# La racha que sigue viva: la de hoy o, si hoy aún no se ha estudiado, la de ayer
+CURRENT_STREAK = statement("""
+    SELECT streak FROM study_daily_stats
+    WHERE day IN (:today, :yesterday)
+    ORDER BY day DESC
+    LIMIT 1
+""")
+
+LONGEST_STREAK = statement("SELECT MAX(streak) FROM study_daily_stats")
+
+
+# ======================
+# Versiones de las tablas (app/cache.py)
+# ======================
+
+TABLE_STAMPS = statement("""
+    SELECT table_name, version, updated_at
+    FROM table_versions
+    WHERE table_name IN :tables
+""").bindparams(bindparam("tables", expanding=True))
+
+
+# ======================
+# Aciertos de las cachés
+# ======================
+
+class StatementCacheStats:
+    """Aciertos y fallos de la caché de compilación y de la de sentencias preparadas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self.compiled_hits = 0
+            self.compiled_misses = 0
+            self.prepared_hits = 0
+            self.prepared_misses = 0
+
+    def record(self, compiled: Optional[bool], prepared: Optional[bool]):
+        with self._lock:
+            if compiled is not None:
+                if compiled:
+                    self.compiled_hits += 1
+                else:
+                    self.compiled_misses += 1
+            if prepared is not None:
+                if prepared:
+                    self.prepared_hits += 1
+                else:
+                    self.prepared_misses += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        def summary(hits, misses):
+            total = hits + misses
+            return {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+        with self._lock:
+            return {
+                "compiled": summary(self.compiled_hits, self.compiled_misses),
+                "prepared": summary(self.prepared_hits, self.prepared_misses),
+            }
+
+    def render(self) -> str:
+        """Contadores en el formato de texto de Prometheus."""
+        stats = self.stats()
+        lines = [
+            "# HELP db_statement_cache_total Búsquedas en la caché de compilación de SQLAlchemy "
+            "y en la de sentencias preparadas de sqlite3.",
+            "# TYPE db_statement_cache_total counter",
+        ]
+        for cache in ("compiled", "prepared"):
+            for result, key in (("hit", "hits"), ("miss", "misses")):
+                lines.append(f'db_statement_cache_total{{cache="{cache}",result="{result}"}} {stats[cache][key]}')
+        lines.append("")
+        return "\n".join(lines)
+
+
+statement_cache = StatementCacheStats()
+
+
+def _prepared_cache_hit(conn, statement_sql: str) -> Optional[bool]:
+    """
+    Actualiza el espejo del LRU de sentencias preparadas de la conexión y
+    devuelve si `statement_sql` ya estaba en él (None fuera de SQLite).
+
+    Es una estimación: sqlite3 no expone su caché, así que se reproduce su
+    política (LRU del mismo tamaño indexado por el texto SQL) y no se mide la
+    caché real.
+    """
+    if conn.dialect.name != "sqlite":
+        return None
+    info = conn.connection.info
+    cached = info.get("prepared_statements")
+    if cached is None:
+        cached = info["prepared_statements"] = OrderedDict()
+    if statement_sql in cached:
+        cached.move_to_end(statement_sql)
+        return True
+    cached[statement_sql] = None
+    if len(cached) > SQLITE_CACHED_STATEMENTS:
+        cached.popitem(last=False)
+    return False
+
+
+def _after_cursor_execute(conn, cursor, statement_sql, parameters, context, executemany):
+    if context is None:
+        return
+    # Las sentencias sin caché (exec_driver_sql, DDL) no cuentan en la de compilación
+    compiled = {CACHE_HIT: True, CACHE_MISS: False}.get(context.cache_hit)
+    statement_cache.record(compiled, _prepared_cache_hit(conn, statement_sql))
+
+
+def instrument_engine(engine):
+    """Registra en `engine` el recuento de aciertos de las cachés de sentencias."""
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,137 @@
+"""
+Resumen diario de estudio (`study_daily_stats`, migración 0012).
+
+Los días se cuentan en la zona horaria `STATS_TIMEZONE`, algo que los
+triggers de SQLite no saben hacer, así que el resumen lo mantienen las rutas
+de escritura de la aplicación dentro de su propia transacción:
+`create_study_activity` (sesiones) y `record_reviews` (repasos). Las escrituras
+hechas fuera de la API, o un cambio de zona horaria, se corrigen con
+`backfill_counters.py`, que lo reconstruye con `build_daily_rows`.
+
+Cada fila guarda también la racha que termina ese día (días activos seguidos),
+de modo que la racha actual y la más larga no recorren el historial.
+"""
+
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from app import statements
+
+STATS_TIMEZONE = os.getenv("STATS_TIMEZONE", "UTC")
+STATS_ZONE = ZoneInfo(STATS_TIMEZONE)
+
+
+@lru_cache(maxsize=65536)
+def _local_day(minute: str, zone: ZoneInfo) -> str:
+    utc = datetime.strptime(minute, "%Y-%m-%d %H:%M").replace(tzinfo=timezone.utc)
+    return utc.astimezone(zone).date().isoformat()
+
+
+def local_day(timestamp: str, zone: Optional[ZoneInfo] = None) -> str:
+    """
+    Día local ('YYYY-MM-DD') de una fecha en formato de CURRENT_TIMESTAMP (UTC).
+
+    Todas las zonas horarias tienen desfases de minutos enteros, así que la
+    conversión se cachea por minuto.
+    """
+    return _local_day(timestamp[:16].replace("T", " "), zone or STATS_ZONE)
+
+
+def local_today() -> date:
+    return datetime.now(STATS_ZONE).date()
+
+
+def count_by_day(sessions: Iterable[str], reviews: Iterable[Tuple[bool, str]],
+                 zone: Optional[ZoneInfo] = None) -> Dict[str, List[int]]:
+    """Agrupa sesiones y repasos (correct, fecha) en [sesiones, repasos, aciertos, fallos] por día."""
+    counts = defaultdict(lambda: [0, 0, 0, 0])
+    for created_at in sessions:
+        counts[local_day(created_at, zone)][0] += 1
+    for correct, created_at in reviews:
+        day = counts[local_day(created_at, zone)]
+        day[1] += 1
+        day[2 if correct else 3] += 1
+    return counts
+
+
+def build_daily_rows(counts: Dict[str, List[int]]) -> List[tuple]:
+    """Filas completas de `study_daily_stats`, con la racha calculada en orden."""
+    rows = []
+    previous = None
+    streak = 0
+    for day in sorted(counts):
+        current = date.fromisoformat(day)
+        streak = streak + 1 if previous is not None and current - previous == timedelta(days=1) else 1
+        rows.append((day, *counts[day], streak))
+        previous = current
+    return rows
+
+
+def _fix_streaks_from(db: Session, day: str):
+    """Recalcula la racha de `day` y de los días activos que le siguen sin hueco."""
+    current = date.fromisoformat(day)
+    previous = db.execute(
+        statements.DAILY_STREAK, {"day": (current - timedelta(days=1)).isoformat()}
+    ).scalar()
+    streak = (previous or 0) + 1
+
+    while True:
+        updated = db.execute(
+            statements.SET_DAILY_STREAK,
+            {"streak": streak, "day": current.isoformat()}
+        ).rowcount
+        if not updated and current.isoformat() != day:
+            # Este día ya tenía la racha correcta, y por tanto los siguientes también
+            return
+        current += timedelta(days=1)
+        streak += 1
+        exists = db.execute(statements.DAILY_STATS_EXISTS, {"day": current.isoformat()}).first()
+        if not exists:
+            return
+
+
+def add_daily_stats(db: Session, sessions: Iterable[str] = (), reviews: Iterable[Tuple[bool, str]] = ()):
+    """
+    Suma sesiones (fechas de creación) y repasos (correct, fecha) al resumen
+    diario en la transacción de `db`. Solo los días que pasan a estar activos
+    recalculan rachas, y solo las de los días siguientes sin hueco.
+    """
+    counts = count_by_day(sessions, reviews)
+    if not counts:
+        return
+
+    existing = {row.day for row in db.execute(statements.EXISTING_DAILY_STATS, {"days": list(counts)})}
+
+    db.execute(
+        statements.ADD_DAILY_STATS,
+        [
+            {"day": day, "sessions": s, "reviews": r, "correct_count": c, "incorrect_count": i}
+            # En orden de día, para que escritores concurrentes bloqueen las filas en el mismo orden
+            for day, (s, r, c, i) in sorted(counts.items())
+        ]
+    )
+
+    for day in sorted(set(counts) - existing):
+        _fix_streaks_from(db, day)
+
+
+def get_streaks(db: Session) -> Tuple[int, int]:
+    """
+    Racha actual y racha más larga, en días.
+
+    La racha actual sigue viva hasta que termina el día siguiente al último día
+    activo: si hoy aún no se ha estudiado, cuenta la que terminó ayer.
+    """
+    today = local_today()
+    current = db.execute(
+        statements.CURRENT_STREAK,
+        {"today": today.isoformat(), "yesterday": (today - timedelta(days=1)).isoformat()}
+    ).scalar()
+    longest = db.execute(statements.LONGEST_STREAK).scalar()
+    return current or 0, longest or 0
@@ -0,0 +1,177 @@
+"""
+Recalcula los contadores derivados a partir de las tablas de origen.
+
+Los triggers mantienen estos contadores exactos a partir de su creación; este
+comando hace la carga inicial (o repara una base de datos que haya sido
+modificada con los triggers desactivados, como hace `seed_data.py`):
+
+- `word_stats` a partir de `word_review_items` (migración 0006)
+- `groups.words_count` a partir de `word_groups`
+- el resumen de cada sesión (`study_sessions.correct_count`,
+  `incorrect_count` y `total_items`) a partir de `word_review_items`
+  (migración 0013)
+- el índice de búsqueda `words_fts` a partir de `words` (migración 0009)
+- el estado SM-2 de `word_schedules`, repitiendo el historial de repasos en
+  orden (migración 0011)
+- el resumen diario `study_daily_stats` en la zona `STATS_TIMEZONE`
+  (migración 0012)
+- los totales de `table_counts` (migración 0014)
+
+Solo funciona con SQLite: abre el fichero con `sqlite3`, reconstruye
+`words_fts` y usa la sintaxis de SQLite (`INSERT OR IGNORE`,
+`BEGIN IMMEDIATE`). En PostgreSQL los triggers de las migraciones mantienen
+los contadores desde su creación, y el comando se niega a ejecutarse si recibe
+(o `DATABASE_URL` apunta a) un servidor.
+"""
+
+import os
+import sys
+import sqlite3
+import time
+
+from app.scheduler import ScheduleState, schedule_review
+from app.stats import build_daily_rows, count_by_day
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'words.db')
+
+
+def sqlite_path(target):
+    """
+    Ruta del fichero SQLite de `target` (una ruta o una URL `sqlite:///...`).
+    Cualquier otra URL es un servidor y se rechaza antes de tocar nada.
+    """
+    if "://" not in target:
+        return target
+    if not target.startswith("sqlite"):
+        raise SystemExit(f"backfill_counters.py solo funciona con SQLite, no con {target.split('://')[0]}")
+    return target.split(":///", 1)[1]
+
+
+def rebuild_counters(conn):
+    """Recalcula todos los contadores derivados en la transacción actual."""
+    conn.execute("DELETE FROM word_stats")
+    conn.execute("""
+        INSERT INTO word_stats (word_id, correct_count, wrong_count)
+        SELECT
+            word_id,
+            COUNT(CASE WHEN correct THEN 1 END),
+            COUNT(CASE WHEN NOT correct THEN 1 END)
+        FROM word_review_items
+        GROUP BY word_id
+    """)
+    conn.execute("""
+        UPDATE groups SET words_count = (
+            SELECT COUNT(*) FROM word_groups wg WHERE wg.group_id = groups.id
+        )
+    """)
+    conn.execute("""
+        UPDATE study_sessions SET
+            correct_count = r.correct_count,
+            incorrect_count = r.incorrect_count,
+            total_items = r.total_items
+        FROM (
+            SELECT
+                ss.id,
+                COUNT(CASE WHEN wri.correct THEN 1 END) as correct_count,
+                COUNT(CASE WHEN NOT wri.correct THEN 1 END) as incorrect_count,
+                COUNT(wri.id) as total_items
+            FROM study_sessions ss
+            LEFT JOIN word_review_items wri ON wri.study_session_id = ss.id
+            GROUP BY ss.id
+        ) r
+        WHERE r.id = study_sessions.id
+    """)
+    conn.execute("INSERT INTO words_fts (words_fts) VALUES ('rebuild')")
+    rebuild_schedules(conn)
+    rebuild_daily_stats(conn)
+    rebuild_table_counts(conn)
+    # Las cachés y los ETag dependen de las versiones; se invalidan todas
+    conn.execute("UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP")
+
+
+def rebuild_schedules(conn):
+    """
+    Reconstruye `word_schedules`: un estado nuevo por cada palabra de cada grupo
+    y, encima, todos los repasos de sesiones de ese grupo en orden cronológico.
+    """
+    conn.execute("DELETE FROM word_schedules")
+    conn.execute("""
+        INSERT OR IGNORE INTO word_schedules (group_id, word_id)
+        SELECT group_id, word_id FROM word_groups
+    """)
+
+    states = {}
+    reviews = conn.execute("""
+        SELECT ss.group_id, wri.word_id, wri.correct, wri.created_at
+        FROM word_review_items wri
+        JOIN study_sessions ss ON ss.id = wri.study_session_id
+        ORDER BY wri.created_at, wri.id
+    """)
+    for group_id, word_id, correct, created_at in reviews:
+        key = (group_id, word_id)
+        states[key] = schedule_review(states.get(key, ScheduleState()), bool(correct), created_at)
+
+    # Las filas que no existen (palabras fuera del grupo) no se actualizan
+    conn.executemany(
+        """
+        UPDATE word_schedules SET
+            ease = ?, interval_days = ?, repetitions = ?, next_review_at = ?, last_reviewed_at = ?
+        WHERE group_id = ? AND word_id = ?
+        """,
+        ((*state, group_id, word_id) for (group_id, word_id), state in states.items())
+    )
+
+
+def rebuild_daily_stats(conn):
+    """Reconstruye `study_daily_stats` a partir de sesiones y repasos."""
+    conn.execute("DELETE FROM study_daily_stats")
+    sessions = [row[0] for row in conn.execute(
+        "SELECT created_at FROM study_sessions WHERE created_at IS NOT NULL"
+    )]
+    reviews = conn.execute(
+        "SELECT correct, created_at FROM word_review_items WHERE created_at IS NOT NULL"
+    )
+    counts = count_by_day(sessions, reviews)
+    conn.executemany(
+        """
+        INSERT INTO study_daily_stats (day, sessions, reviews, correct_count, incorrect_count, streak)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        build_daily_rows(counts)
+    )
+
+
+def rebuild_table_counts(conn):
+    """Reconstruye `table_counts` contando cada tabla (todo en el shard 0)."""
+    conn.execute("DELETE FROM table_counts")
+    conn.execute("""
+        INSERT INTO table_counts (name, shard, value)
+        SELECT 'words', 0, COUNT(*) FROM words
+        UNION ALL SELECT 'groups', 0, COUNT(*) FROM groups
+        UNION ALL SELECT 'study_sessions', 0, COUNT(*) FROM study_sessions
+        UNION ALL SELECT 'word_review_items', 0, COUNT(*) FROM word_review_items
+        UNION ALL SELECT 'correct_reviews', 0, COUNT(*) FROM word_review_items WHERE correct
+        UNION ALL SELECT 'words_studied', 0, COUNT(*) FROM word_stats ws
+            WHERE ws.correct_count > 0 AND EXISTS (SELECT 1 FROM words w WHERE w.id = ws.word_id)
+    """)
+
+
+def run_backfill(conn):
+    """Reconstruye los contadores dentro de una única transacción de escritura."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rebuild_counters(conn)
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+
+if __name__ == '__main__':
+    db_path = sqlite_path(sys.argv[1] if len(sys.argv) > 1 else os.getenv("DATABASE_URL") or DB_PATH)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    start = time.perf_counter()
+    run_backfill(conn)
+    rows = conn.execute("SELECT COUNT(*) FROM word_stats").fetchone()[0]
+    conn.close()
+    print(f"Contadores reconstruidos: {rows} palabras en {time.perf_counter() - start:.2f}s")
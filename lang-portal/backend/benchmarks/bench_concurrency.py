@@ -0,0 +1,111 @@
+"""
+Rendimiento de la API con clientes concurrentes.
+
+Lanza N clientes asíncronos contra la aplicación ASGI en el mismo proceso y
+mide peticiones por segundo. Como las consultas se ejecutan en el pool de hilos
+de `app.database` en lugar de bloquear el event loop, el rendimiento debe
+crecer con los clientes hasta saturar `DB_THREADPOOL_SIZE` (o los núcleos de
+la máquina).
+
+Mientras tanto una sonda consulta `/api/health` cada 10 ms: si el event loop
+quedara bloqueado por las consultas, su latencia crecería con la carga.
+
+    python benchmarks/bench_concurrency.py --clients 1,2,4,8,16
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from common import chunked, create_database, percentile, populate_vocabulary, use_database
+
+
+def populate_reviews(conn, reviews, words, rng):
+    rows = ((rng.randint(1, words), 1, rng.random() < 0.7) for _ in range(reviews))
+    for chunk in chunked(rows, 50_000):
+        conn.executemany(
+            "INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, ?, ?)",
+            chunk
+        )
+    conn.commit()
+
+
+async def run_clients(app, clients, requests_per_client, make_path):
+    import httpx
+
+    latencies = []
+    probe_latencies = []
+    done = asyncio.Event()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker():
+            for _ in range(requests_per_client):
+                start = time.perf_counter()
+                response = await client.get(make_path())
+                latencies.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.text
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/api/health")
+                probe_latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.01)
+
+        probe_task = asyncio.create_task(probe())
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+        done.set()
+        await probe_task
+
+    return clients * requests_per_client / elapsed, latencies, probe_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", default="1,2,4,8,16")
+    parser.add_argument("--requests", type=int, default=100, help="peticiones por cliente")
+    parser.add_argument("--words", type=int, default=20000)
+    parser.add_argument("--reviews", type=int, default=200000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_concurrency.db"))
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    create_database(args.db)
+    use_database(args.db)
+    conn = sqlite3.connect(args.db)
+    populate_vocabulary(conn, args.words)
+    populate_reviews(conn, args.reviews, args.words, rng)
+    conn.close()
+
+    from app.database import DB_THREADPOOL_SIZE
+    from app.main import app
+
+    reviews_pages = max(1, args.reviews // 100)
+    paths = [
+        lambda: f"/api/words?page={rng.randint(1, args.words // 100)}",
+        lambda: f"/api/groups/1/words?page={rng.randint(1, args.words // 100)}",
+        lambda: f"/api/study-sessions/1/words?page={rng.randint(1, reviews_pages)}",
+    ]
+
+    def make_path():
+        return rng.choice(paths)()
+
+    print(f"DB_THREADPOOL_SIZE={DB_THREADPOOL_SIZE} cpus={os.cpu_count()}")
+    print(f"{'clients':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'health p50':>11} {'health p99':>11}")
+    asyncio.run(run_clients(app, 1, 20, make_path))  # calentamiento
+    for clients in (int(value) for value in args.clients.split(",")):
+        throughput, latencies, probes = asyncio.run(run_clients(app, clients, args.requests, make_path))
+        print(
+            f"{clients:>8} {throughput:>10.1f} {percentile(latencies, 50):>8.2f} {percentile(latencies, 99):>8.2f}"
+            f" {percentile(probes, 50):>11.2f} {percentile(probes, 99):>11.2f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Carga del dashboard: los tres endpoints por separado frente a `GET /api/dashboard`.
+
+Crece `word_review_items` hasta cada tamaño de `--sizes` y mide la carga del
+dashboard justo después de una escritura (la caché no sirve nada): primero las
+tres peticiones de siempre, después la combinada. Para cada una se da p50/p99
+del tiempo de la carga completa y las sentencias SQL que ejecuta.
+
+    python benchmarks/bench_dashboard.py --sizes 10000,100000,1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from common import create_database, percentile, populate_vocabulary, use_database
+from bench_word_counters import grow_reviews
+
+LOADS = {
+    "three requests": ("/api/dashboard/last_study_session", "/api/dashboard/study_progress",
+                       "/api/dashboard/quick_stats"),
+    "GET /api/dashboard": ("/api/dashboard",),
+}
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def measure(client, counter, paths, iterations, rng, words):
+    samples = []
+    statements = 0
+    for _ in range(iterations):
+        # Un repaso nuevo invalida los agregados cacheados
+        response = client.post("/api/study-sessions/1/reviews",
+                               json={"items": [{"word_id": rng.randint(1, words), "correct": True}]})
+        assert response.status_code == 200, response.text
+        counter.count = 0
+        start = time.perf_counter()
+        for path in paths:
+            response = client.get(path)
+            assert response.status_code == 200, response.text
+        samples.append((time.perf_counter() - start) * 1000)
+        statements += counter.count
+    return samples, statements / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_dashboard.db"))
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    rng = random.Random(42)
+
+    create_database(args.db)
+    use_database(args.db)
+    conn = sqlite3.connect(args.db)
+    populate_vocabulary(conn, args.words)
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.database import read_engine
+    from app.main import app
+
+    client = TestClient(app)
+    counter = StatementCounter()
+    event.listen(read_engine, "after_cursor_execute", counter)
+
+    print(f"{'reviews':>10} {'load':<20} {'p50 ms':>8} {'p99 ms':>8} {'SQL':>5}")
+    current = 0
+    for size in sizes:
+        grow_reviews(conn, current, size, args.words, rng)
+        current = size
+        for name, paths in LOADS.items():
+            measure(client, counter, paths, 3, rng, args.words)  # calentamiento
+            samples, statements = measure(client, counter, paths, args.iterations, rng, args.words)
+            print(f"{size:>10} {name:<20} {percentile(samples, 50):>8.2f} {percentile(samples, 99):>8.2f} "
+                  f"{statements:>5.0f}")
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Coste de mantener al día `--clients` dashboards: sondeo frente a SSE.
+
+Durante `--seconds` segundos se crea una sesión de estudio cada `--write-ms`
+milisegundos. En el modo de sondeo cada cliente pide los tres endpoints del
+dashboard cada `--poll-ms`; en el modo SSE cada cliente está suscrito a
+`GET /api/dashboard/stream`, que sondea table_versions con el mismo intervalo.
+Para cada modo se cuentan las sentencias SQL ejecutadas (sin las escrituras),
+los cálculos del dashboard y el tiempo de CPU del proceso.
+
+    python benchmarks/bench_dashboard_stream.py --clients 1000 --seconds 5
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+
+from common import create_database, populate_vocabulary, use_database
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+async def writer(client, seconds, write_ms):
+    writes = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        response = await client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1})
+        assert response.status_code == 200, response.text
+        writes += 1
+        await asyncio.sleep(write_ms / 1000)
+    return writes
+
+
+async def run_polling(app, clients, seconds, poll_ms, write_ms):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.monotonic() + seconds
+        requests = 0
+
+        async def poller():
+            nonlocal requests
+            while time.monotonic() < deadline:
+                for path in ("last_study_session", "study_progress", "quick_stats"):
+                    response = await client.get(f"/api/dashboard/{path}")
+                    assert response.status_code == 200, response.text
+                    requests += 1
+                await asyncio.sleep(poll_ms / 1000)
+
+        results = await asyncio.gather(writer(client, seconds, write_ms), *(poller() for _ in range(clients)))
+        return results[0], requests
+
+
+async def run_stream(app, streams, clients, seconds, write_ms):
+    import httpx
+
+    from app.routers.api import compute_dashboard_state, dashboard_stamp
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        broadcaster = streams.get(dashboard_stamp, compute_dashboard_state)
+        events = 0
+
+        # Los suscriptores consumen el mismo generador que la respuesta SSE
+        async def subscriber():
+            nonlocal events
+            async for _ in streams.events(dashboard_stamp, compute_dashboard_state):
+                events += 1
+
+        tasks = [asyncio.create_task(subscriber()) for _ in range(clients)]
+        writes = await writer(client, seconds, write_ms)
+        await asyncio.sleep(4 * broadcaster.poll_interval)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return writes, events, broadcaster.computations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--poll-ms", type=float, default=500)
+    parser.add_argument("--write-ms", type=float, default=250)
+    parser.add_argument("--words", type=int, default=10000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_dashboard_stream.db"))
+    args = parser.parse_args()
+
+    create_database(args.db)
+    use_database(args.db)
+    conn = sqlite3.connect(args.db)
+    populate_vocabulary(conn, args.words)
+    conn.close()
+
+    from sqlalchemy import event
+
+    from app.dashboard_stream import DashboardStreams
+    from app.database import read_engine
+    from app.main import app
+
+    counter = StatementCounter()
+    event.listen(read_engine, "after_cursor_execute", counter)
+
+    print(f"cpus={os.cpu_count()} clients={args.clients} seconds={args.seconds:g} "
+          f"poll={args.poll_ms:g} ms write every {args.write_ms:g} ms")
+    print(f"{'mode':>8} {'writes':>7} {'requests/events':>16} {'computations':>13} {'read SQL':>9} {'cpu s':>7}")
+
+    counter.count, cpu = 0, time.process_time()
+    writes, requests = asyncio.run(run_polling(app, args.clients, args.seconds, args.poll_ms, args.write_ms))
+    print(f"{'polling':>8} {writes:>7} {requests:>16} {'-':>13} {counter.count:>9} {time.process_time() - cpu:>7.2f}")
+
+    streams = DashboardStreams(poll_ms=args.poll_ms)
+    counter.count, cpu = 0, time.process_time()
+    writes, events, computations = asyncio.run(run_stream(app, streams, args.clients, args.seconds, args.write_ms))
+    print(f"{'sse':>8} {writes:>7} {events:>16} {computations:>13} {counter.count:>9} {time.process_time() - cpu:>7.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Escrituras por segundo con una base compartida frente a una base por alumno.
+
+Lanza `--clients` clientes asíncronos que envían lotes de repasos a
+`POST /api/study-sessions/{id}/reviews`. Primero todos escriben en la base
+compartida (un único escritor), y después cada cliente es uno de `--learners`
+alumnos con su propia base (`LEARNER_DATA_DIR`), de modo que las transacciones
+de alumnos distintos no esperan por el mismo lock. La ganancia depende de
+cuánto de cada escritura es espera de E/S (fsync) frente a CPU; pruebe con
+`SQLITE_SYNCHRONOUS=FULL` para ver el caso de un disco lento.
+
+    python benchmarks/bench_learner_writes.py --clients 8 --learners 1,2,4,8
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from common import create_database, populate_vocabulary, use_database
+
+
+async def run_clients(app, clients, requests, batch_size, words, learners, rng):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Una sesión por alumno (o una sola en la base compartida)
+        sessions = {}
+        for learner in sorted(set(learners)):
+            headers = {"X-Learner-Id": learner} if learner else {}
+            response = await client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1},
+                                         headers=headers)
+            assert response.status_code == 200, response.text
+            sessions[learner] = (response.json()["id"], headers)
+
+        async def worker(learner):
+            session_id, headers = sessions[learner]
+            for _ in range(requests):
+                batch = {"items": [
+                    {"word_id": rng.randint(1, words), "correct": rng.random() < 0.7}
+                    for _ in range(batch_size)
+                ]}
+                response = await client.post(f"/api/study-sessions/{session_id}/reviews", json=batch,
+                                             headers=headers)
+                assert response.status_code == 200, response.text
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(learners[i]) for i in range(clients)))
+        return clients * requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--learners", default="1,2,4,8", help="número de alumnos entre los que se reparten los clientes")
+    parser.add_argument("--requests", type=int, default=100, help="peticiones por cliente")
+    parser.add_argument("--batch-size", type=int, default=20)
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_learner_writes.db"))
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    data_dir = args.db + ".learners"
+    shutil.rmtree(data_dir, ignore_errors=True)
+    create_database(args.db)
+    use_database(args.db)
+    os.environ["LEARNER_DATA_DIR"] = data_dir
+    conn = sqlite3.connect(args.db)
+    populate_vocabulary(conn, args.words)
+    conn.close()
+
+    from app.database import DB_THREADPOOL_SIZE
+    from app.main import app
+
+    print(f"DB_THREADPOOL_SIZE={DB_THREADPOOL_SIZE} cpus={os.cpu_count()} clients={args.clients}")
+    print(f"{'mode':>16} {'requests/s':>11} {'reviews/s':>10}")
+    runs = [("shared", [None] * args.clients)]
+    for count in (int(value) for value in args.learners.split(",")):
+        runs.append((f"{count} learners", [f"bench{i % count}" for i in range(args.clients)]))
+    for label, learners in runs:
+        throughput = asyncio.run(
+            run_clients(app, args.clients, args.requests, args.batch_size, args.words, learners, rng)
+        )
+        print(f"{label:>16} {throughput:>11.1f} {throughput * args.batch_size:>10.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Repasos por segundo con escritura directa frente al buffer de escritura diferida.
+
+Lanza `--clients` clientes asíncronos que envían un repaso por petición a
+`POST /api/study-sessions/{id}/reviews`, como un cuestionario que guarda cada
+respuesta. Primero cada petición es su propia transacción; después las
+peticiones se aceptan en el buffer (`app/review_buffer.py`) y se vuelcan en
+una transacción cada `--buffer-size` repasos o `--flush-ms` milisegundos. El
+tiempo del modo con buffer incluye el último volcado. Con
+`--synchronous FULL` cada commit espera al fsync, como en un disco lento.
+
+    python benchmarks/bench_review_buffer.py --clients 16 --requests 200
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from common import create_database, populate_vocabulary, use_database
+
+
+async def run_clients(app, clients, requests, words, rng, buffer=None):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1})
+        assert response.status_code == 200, response.text
+        session_id = response.json()["id"]
+
+        async def worker():
+            for _ in range(requests):
+                review = {"items": [{"word_id": rng.randint(1, words), "correct": rng.random() < 0.7}]}
+                response = await client.post(f"/api/study-sessions/{session_id}/reviews", json=review)
+                assert response.status_code in (200, 202), response.text
+
+        # ASGITransport no ejecuta el lifespan: el buffer se arranca y se para aquí
+        if buffer is not None:
+            buffer.start()
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        if buffer is not None:
+            await buffer.stop()
+        elapsed = time.perf_counter() - start
+
+        detail = (await client.get(f"/api/study-sessions/{session_id}")).json()
+        assert detail["review_items_count"] == clients * requests, detail
+        return clients * requests / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="peticiones (de un repaso) por cliente")
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--buffer-size", type=int, default=200)
+    parser.add_argument("--flush-ms", type=float, default=20)
+    parser.add_argument("--synchronous", default=None, help="SQLITE_SYNCHRONOUS (NORMAL por defecto)")
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_review_buffer.db"))
+    args = parser.parse_args()
+
+    if args.synchronous:
+        os.environ["SQLITE_SYNCHRONOUS"] = args.synchronous
+    rng = random.Random(42)
+    create_database(args.db)
+    use_database(args.db)
+    conn = sqlite3.connect(args.db)
+    populate_vocabulary(conn, args.words)
+    conn.close()
+
+    from app import review_buffer
+    from app.database import SQLITE_SYNCHRONOUS
+    from app.main import app
+    from app.review_buffer import ReviewBuffer
+
+    print(f"synchronous={SQLITE_SYNCHRONOUS} cpus={os.cpu_count()} clients={args.clients} "
+          f"reviews={args.clients * args.requests}")
+    print(f"{'mode':>28} {'reviews/s':>10} {'commits':>8}")
+
+    throughput = asyncio.run(run_clients(app, args.clients, args.requests, args.words, rng))
+    print(f"{'direct':>28} {throughput:>10.0f} {args.clients * args.requests:>8}")
+    direct = throughput
+
+    buffer = ReviewBuffer(args.buffer_size, args.flush_ms)
+    review_buffer.review_buffer = buffer
+    throughput = asyncio.run(run_clients(app, args.clients, args.requests, args.words, rng, buffer))
+    label = f"buffer ({args.buffer_size} / {args.flush_ms:g} ms)"
+    print(f"{label:>28} {throughput:>10.0f} {buffer.flushes:>8}")
+    print(f"speedup: {throughput / direct:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Repasos por segundo a través de `POST /api/study-sessions/{id}/reviews`.
+
+Envía lotes de repasos de distintos tamaños contra una base de datos creada
+con las migraciones (triggers incluidos) y mide el rendimiento de extremo a
+extremo: validación, `executemany` en una transacción y totales de la sesión.
+
+    python benchmarks/bench_review_ingest.py --batch-sizes 1,50,500,1000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from common import create_database, populate_vocabulary, use_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--batch-sizes", default="1,50,500,1000")
+    parser.add_argument("--reviews", type=int, default=20000, help="repasos por tamaño de lote")
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_review_ingest.db"))
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    create_database(args.db)
+    use_database(args.db)
+    conn = sqlite3.connect(args.db)
+    populate_vocabulary(conn, args.words)
+    conn.close()
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+
+    print(f"{'batch':>6} {'requests':>9} {'reviews/s':>10} {'ms/request':>11}")
+    for batch_size in (int(value) for value in args.batch_sizes.split(",")):
+        requests = max(1, args.reviews // batch_size)
+        batches = [
+            {"items": [
+                {"word_id": rng.randint(1, args.words), "correct": rng.random() < 0.7}
+                for _ in range(batch_size)
+            ]}
+            for _ in range(requests)
+        ]
+
+        start = time.perf_counter()
+        for batch in batches:
+            response = client.post("/api/study-sessions/1/reviews", json=batch)
+            assert response.status_code == 200, response.text
+        elapsed = time.perf_counter() - start
+
+        print(f"{batch_size:>6} {requests:>9} {requests * batch_size / elapsed:>10.0f} {elapsed / requests * 1000:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Latencia de `/api/words/search` (autocompletado) frente al tamaño del vocabulario.
+
+Genera palabras sintéticas a partir de sílabas, con y sin acentos, y mide
+p50/p95/p99 de búsquedas por prefijo de 2 a 6 letras y de palabras completas.
+
+    python benchmarks/bench_search.py --words 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from common import chunked, create_database, percentile, use_database
+
+SYLLABLES = ["ca", "sa", "lo", "má", "ri", "té", "pu", "ne", "gó", "di", "ba", "ño", "zu", "fe", "cha", "tri"]
+
+
+def make_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_search.db"))
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    create_database(args.db)
+    use_database(args.db)
+    conn = sqlite3.connect(args.db)
+    start = time.perf_counter()
+    words = ((make_word(rng), make_word(rng)) for _ in range(args.words))
+    for chunk in chunked(words, 50_000):
+        conn.executemany("INSERT INTO words (spanish, english, parts) VALUES (?, ?, '{}')", chunk)
+    conn.commit()
+    conn.close()
+    print(f"Indexadas {args.words} palabras en {time.perf_counter() - start:.1f}s")
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    results = []
+    for length in (2, 3, 4, 6, None):
+        samples = []
+        matches = []
+        for _ in range(args.iterations):
+            word = make_word(rng)
+            q = word if length is None else word[:length]
+            start = time.perf_counter()
+            response = client.get(f"/api/words/search?q={q}&items_per_page=10&include_total=false")
+            samples.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+            matches.append(len(response.json()["items"]))
+        result = {
+            "query": "word" if length is None else f"prefix{length}",
+            "p50_ms": round(percentile(samples, 50), 2),
+            "p95_ms": round(percentile(samples, 95), 2),
+            "p99_ms": round(percentile(samples, 99), 2),
+        }
+        results.append(result)
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Velocidad de carga de `seed_data.py` con un vocabulario sintético.
+
+Genera `--words` palabras en JSONL repartidas en `--categories` categorías,
+ejecuta el seeder contra una base de datos recién migrada y muestra las filas
+por segundo de cada tabla y del total.
+
+    python benchmarks/bench_seed.py --words 1000000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from common import create_database
+
+from seed_data import run_seed
+
+
+def write_words(path, words, categories):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(1, words + 1):
+            f.write(json.dumps({
+                "spanish": f"palabra{i}",
+                "english": f"word{i}",
+                "parts": {"category": "noun"},
+                "category": f"categoria{i % categories}",
+            }))
+            f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--words", type=int, default=1_000_000)
+    parser.add_argument("--categories", type=int, default=100)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_seed.db"))
+    args = parser.parse_args()
+
+    seeds_dir = tempfile.mkdtemp(prefix="bench_seed_")
+    start = time.perf_counter()
+    write_words(os.path.join(seeds_dir, "words.jsonl"), args.words, args.categories)
+    print(f"Generadas {args.words} palabras en {time.perf_counter() - start:.2f}s")
+
+    create_database(args.db)
+    start = time.perf_counter()
+    report = run_seed(args.db, seeds_dir)
+    elapsed = time.perf_counter() - start
+
+    conn = sqlite3.connect(args.db)
+    words = conn.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+    conn.close()
+    assert words == args.words, words
+
+    rows = sum(count for _, count, _ in report.tables)
+    print(json.dumps({
+        "words": args.words,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_second": round(rows / elapsed),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Coste de serializar un listado por cada 1.000 filas: camino anterior frente al rápido.
+
+- anterior: un modelo Pydantic por fila (`Word(...)`), el modelo de respuesta,
+  y después lo que hace FastAPI con `response_model` (volcarlo, validarlo otra
+  vez y codificarlo).
+- rápido: `rows_as_dicts` sobre las filas de SQL y `FastJSONResponse` (orjson).
+
+Las filas salen de una consulta real a SQLite para incluir el acceso a `Row`.
+
+    python benchmarks/bench_serialization.py --rows 100,1000,10000
+"""
+
+import argparse
+import json
+import time
+
+from common import BACKEND_DIR  # noqa: F401  (añade el backend al sys.path)
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, text
+
+from app.responses import FastJSONResponse, rows_as_dicts
+from app.routers.api import Pagination, Word, WordsResponse
+
+
+def fetch_rows(engine, rows):
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT id, spanish, english, correct_count, wrong_count, 1000000 AS total_count
+            FROM bench_words
+            ORDER BY id
+            LIMIT :rows
+        """), {"rows": rows}).fetchall()
+
+
+def previous_path(rows, pagination, adapter):
+    response = WordsResponse(
+        items=[
+            Word(
+                id=row.id,
+                spanish=row.spanish,
+                english=row.english,
+                correct_count=row.correct_count or 0,
+                wrong_count=row.wrong_count or 0
+            ) for row in rows
+        ],
+        pagination=pagination
+    )
+    # FastAPI: _prepare_response_content, validación contra response_model y
+    # codificación a JSON con Pydantic
+    validated = adapter.validate_python(response.model_dump())
+    return adapter.dump_json(validated)
+
+
+def fast_path(rows, pagination):
+    return FastJSONResponse({
+        "items": rows_as_dicts(rows, Word),
+        "pagination": pagination.model_dump()
+    }).body
+
+
+def measure(func, *args, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.rows.split(",")]
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE bench_words (
+                id INTEGER PRIMARY KEY, spanish TEXT, english TEXT,
+                correct_count INTEGER, wrong_count INTEGER
+            )
+        """))
+        conn.execute(text("INSERT INTO bench_words VALUES (:id, :spanish, :english, :correct, :wrong)"), [
+            {"id": i, "spanish": f"palabra{i}", "english": f"word{i}", "correct": i % 7, "wrong": i % 3}
+            for i in range(1, max(sizes) + 1)
+        ])
+
+    adapter = TypeAdapter(WordsResponse)
+    for size in sizes:
+        rows = fetch_rows(engine, size)
+        pagination = Pagination(current_page=1, total_pages=1, total_items=size, items_per_page=size)
+        assert json.loads(previous_path(rows, pagination, adapter)) == json.loads(fast_path(rows, pagination))
+
+        previous = measure(previous_path, rows, pagination, adapter, repeat=args.repeat)
+        fast = measure(fast_path, rows, pagination, repeat=args.repeat)
+        print(json.dumps({
+            "rows": size,
+            "previous_ms_per_1000_rows": round(previous * 1000 * 1000 / size, 3),
+            "fast_ms_per_1000_rows": round(fast * 1000 * 1000 / size, 3),
+            "speedup": round(previous / fast, 1),
+        }))
+
+
+if __name__ == "__main__":
+    main()
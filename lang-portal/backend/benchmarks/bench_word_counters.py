@@ -0,0 +1,92 @@
+"""
+Latencia de las páginas de palabras frente al tamaño del historial de repasos.
+
+Crece `word_review_items` de 10k a 5M filas y mide p50/p99 de `/api/words`,
+`/api/words/{id}` y `/api/groups/{id}/words`. Con los contadores mantenidos por
+triggers en `word_stats` la latencia debe mantenerse plana.
+
+    python benchmarks/bench_word_counters.py --sizes 10000,100000,1000000,5000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from common import chunked, create_database, percentile, populate_vocabulary, use_database
+
+
+def grow_reviews(conn, current, target, words, rng):
+    reviews = (
+        (rng.randint(1, words), 1, rng.random() < 0.7)
+        for _ in range(target - current)
+    )
+    for chunk in chunked(reviews, 50_000):
+        conn.executemany(
+            "INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, ?, ?)",
+            chunk
+        )
+    conn.commit()
+
+
+def measure(client, paths, iterations):
+    samples = {name: [] for name in paths}
+    for _ in range(iterations):
+        for name, make_path in paths.items():
+            path = make_path()
+            start = time.perf_counter()
+            response = client.get(path)
+            samples[name].append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.text
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000,5000000")
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--db", default=os.path.join(tempfile.gettempdir(), "bench_word_counters.db"))
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    rng = random.Random(42)
+
+    create_database(args.db)
+    use_database(args.db)
+    conn = sqlite3.connect(args.db)
+    populate_vocabulary(conn, args.words)
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+
+    last_page = max(1, args.words // 100)
+    paths = {
+        "/api/words": lambda: f"/api/words?page={rng.randint(1, last_page)}",
+        "/api/words/{id}": lambda: f"/api/words/{rng.randint(1, args.words)}",
+        "/api/groups/1/words": lambda: f"/api/groups/1/words?page={rng.randint(1, last_page)}",
+    }
+
+    measure(client, paths, 10)  # calentamiento
+
+    print(f"{'reviews':>10} {'endpoint':<22} {'p50 ms':>8} {'p99 ms':>8}")
+    current = 0
+    for size in sizes:
+        start = time.perf_counter()
+        grow_reviews(conn, current, size, args.words, rng)
+        current = size
+        load_seconds = time.perf_counter() - start
+
+        samples = measure(client, paths, args.iterations)
+        for name, values in samples.items():
+            print(f"{size:>10} {name:<22} {percentile(values, 50):>8.2f} {percentile(values, 99):>8.2f}")
+        print(f"{'':>10} (carga de repasos: {load_seconds:.1f}s)")
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
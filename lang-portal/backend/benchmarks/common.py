@@ -0,0 +1,70 @@
+"""
+Utilidades compartidas por los benchmarks del backend.
+
+Los benchmarks se ejecutan como scripts desde el directorio `backend/`, por
+ejemplo `python benchmarks/bench_word_counters.py`, y cada uno crea su propia
+base de datos temporal a partir de las migraciones.
+"""
+
+import contextlib
+import io
+import os
+import sys
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from init_db import run_migrations
+
+
+def create_database(db_path):
+    """Crea una base de datos vacía con el esquema de las migraciones."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_migrations(db_path)
+
+
+def use_database(db_path):
+    """Apunta la aplicación a `db_path`; debe llamarse antes de importar `app`."""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+
+def percentile(samples, pct):
+    """Percentil por el método del rango más cercano."""
+    ordered = sorted(samples)
+    index = max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def chunked(iterable, size):
+    """Agrupa un iterable en listas de como máximo `size` elementos."""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def populate_vocabulary(conn, words):
+    """Crea `words` palabras en un único grupo, una actividad y una sesión."""
+    conn.execute("INSERT INTO groups (id, name, words_count) VALUES (1, 'Benchmark', ?)", (words,))
+    conn.executemany(
+        "INSERT INTO words (id, spanish, english, parts) VALUES (?, ?, ?, '{}')",
+        ((i, f"palabra{i}", f"word{i}") for i in range(1, words + 1))
+    )
+    conn.executemany(
+        "INSERT INTO word_groups (word_id, group_id) VALUES (?, 1)",
+        ((i,) for i in range(1, words + 1))
+    )
+    conn.execute(
+        "INSERT INTO study_activities (id, name, description, launch_url) "
+        "VALUES (1, 'Benchmark', 'Benchmark', '/bench')"
+    )
+    conn.execute("INSERT INTO study_sessions (id, group_id, study_activity_id) VALUES (1, 1, 1)")
+    conn.commit()
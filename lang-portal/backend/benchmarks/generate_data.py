@@ -0,0 +1,160 @@
+"""
+Generador determinista de datos sintéticos para los benchmarks.
+
+Escribe un directorio de semillas JSONL (palabras por categoría, grupos,
+actividades, sesiones y repasos) y lo carga con `seed_data.run_seed`, de modo
+que la base de datos resultante pasa por la misma carga masiva y reconstrucción
+de contadores, índice FTS, estados SM-2 y resumen diario que la de producción.
+La misma talla y semilla producen siempre exactamente los mismos datos.
+
+Tallas predefinidas (palabras, repasos y sesiones escalan juntos):
+
+    10k   10.000 palabras, 10.000 sesiones, 10.000 repasos
+    100k  100.000 palabras, 100.000 sesiones, 100.000 repasos
+    1m    1.000.000 palabras, 1.000.000 sesiones, 1.000.000 repasos
+
+    python benchmarks/generate_data.py --size 100k --db /tmp/lang-portal-100k.db
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from common import create_database
+
+from seed_data import run_seed
+
+SIZES = {
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+SYLLABLES = ["ca", "sa", "lo", "má", "ri", "té", "pu", "ne", "gó", "di", "ba", "ño", "zu", "fe", "cha", "tri"]
+
+ACTIVITIES = ["Flashcards", "Memory Game", "Typing Practice", "Listening Quiz"]
+
+# Las fechas se generan a partir de un instante fijo para que el resultado no
+# dependa del día en que se ejecuta
+START = datetime(2024, 1, 1)
+HISTORY_DAYS = 365
+
+
+def size_counts(size):
+    """Recuentos de cada tabla para una talla predefinida."""
+    count = SIZES[size]
+    return {
+        "words": count,
+        "groups": max(10, count // 1000),
+        "sessions": count,
+        "reviews": count,
+    }
+
+
+def make_word(rng):
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False))
+            f.write("\n")
+
+
+def write_seeds(seeds_dir, words, groups, sessions, reviews, seed=42):
+    """Escribe las semillas JSONL en `seeds_dir`."""
+    rng = random.Random(seed)
+    os.makedirs(seeds_dir, exist_ok=True)
+
+    # Cada grupo es una categoría de words.jsonl; el seeder crea los enlaces
+    write_jsonl(os.path.join(seeds_dir, "groups.jsonl"), (
+        {"id": group_id, "name": f"Grupo {group_id:05d}"} for group_id in range(1, groups + 1)
+    ))
+    write_jsonl(os.path.join(seeds_dir, "words.jsonl"), (
+        {
+            "id": word_id,
+            "spanish": make_word(rng),
+            "english": make_word(rng),
+            "parts": {"category": rng.choice(["noun", "verb", "adjective"])},
+            "category": f"Grupo {rng.randint(1, groups):05d}",
+        }
+        for word_id in range(1, words + 1)
+    ))
+    write_jsonl(os.path.join(seeds_dir, "study_activities.jsonl"), (
+        {"id": activity_id, "name": name, "description": name, "launch_url": f"/activities/{activity_id}"}
+        for activity_id, name in enumerate(ACTIVITIES, start=1)
+    ))
+
+    # Sesiones repartidas a lo largo del último año, en orden cronológico
+    step = HISTORY_DAYS * 86400 / max(1, sessions)
+    session_starts = []
+
+    def session_rows():
+        for session_id in range(1, sessions + 1):
+            created_at = START + timedelta(seconds=int(session_id * step))
+            session_starts.append(created_at)
+            yield {
+                "id": session_id,
+                "group_id": rng.randint(1, groups),
+                "study_activity_id": rng.randint(1, len(ACTIVITIES)),
+                "created_at": created_at.isoformat(),
+                "end_time": (created_at + timedelta(minutes=10)).isoformat(),
+            }
+
+    write_jsonl(os.path.join(seeds_dir, "study_sessions.jsonl"), session_rows())
+
+    def review_rows():
+        for review in range(reviews):
+            session_id = rng.randint(1, sessions)
+            created_at = session_starts[session_id - 1] + timedelta(seconds=rng.randint(0, 600))
+            yield {
+                "word_id": rng.randint(1, words),
+                "study_session_id": session_id,
+                "correct": rng.random() < 0.7,
+                "created_at": created_at.isoformat(),
+            }
+
+    write_jsonl(os.path.join(seeds_dir, "word_review_items.jsonl"), review_rows())
+
+
+def build_database(db_path, words, groups, sessions, reviews, seed=42, verbose=False):
+    """Crea `db_path` desde las migraciones y lo llena con datos sintéticos."""
+    seeds_dir = tempfile.mkdtemp(prefix="lang_portal_seeds_")
+    write_seeds(seeds_dir, words, groups, sessions, reviews, seed)
+    create_database(db_path)
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        run_seed(db_path, seeds_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", choices=sorted(SIZES), default="10k")
+    parser.add_argument("--words", type=int, help="sobrescribe la talla")
+    parser.add_argument("--groups", type=int, help="sobrescribe la talla")
+    parser.add_argument("--sessions", type=int, help="sobrescribe la talla")
+    parser.add_argument("--reviews", type=int, help="sobrescribe la talla")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="por defecto, lang-portal-<talla>-<semilla>.db en el directorio temporal")
+    args = parser.parse_args()
+
+    counts = size_counts(args.size)
+    for table in counts:
+        if getattr(args, table) is not None:
+            counts[table] = getattr(args, table)
+    db_path = args.db or os.path.join(tempfile.gettempdir(), f"lang-portal-{args.size}-{args.seed}.db")
+
+    start = time.perf_counter()
+    build_database(db_path, seed=args.seed, verbose=True, **counts)
+    print(json.dumps({"db": db_path, **counts, "seconds": round(time.perf_counter() - start, 2)}))
+
+
+if __name__ == "__main__":
+    main()
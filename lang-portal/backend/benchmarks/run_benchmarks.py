@@ -0,0 +1,225 @@
+"""
+Benchmark de todos los endpoints de `/api`.
+
+Genera (o reutiliza) la base de datos sintética de `generate_data.py` para la
+talla pedida, copia el fichero para no alterar el original con las escrituras
+y lanza contra la aplicación ASGI, en el mismo proceso, `--concurrency`
+clientes por endpoint. Para cada endpoint registra p50/p95/p99 de latencia,
+peticiones por segundo y respuestas con error, y guarda el resultado en JSON
+junto con el commit, la talla y la máquina, de modo que dos ejecuciones se
+pueden comparar con `--compare`.
+
+    python benchmarks/run_benchmarks.py --size 100k --concurrency 8
+    python benchmarks/run_benchmarks.py --size 100k --compare benchmarks/results/<anterior>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from common import BACKEND_DIR, percentile, use_database
+from generate_data import SIZES, build_database, size_counts
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def build_endpoints(counts, rng):
+    """
+    Devuelve {nombre: (método, función que genera (ruta, cuerpo))} con ids
+    válidos al azar para la talla generada.
+    """
+    words, groups, sessions = counts["words"], counts["groups"], counts["sessions"]
+
+    def word():
+        return rng.randint(1, words)
+
+    def group():
+        return rng.randint(1, groups)
+
+    def session():
+        return rng.randint(1, sessions)
+
+    def get(path):
+        return lambda: (path(), None)
+
+    return {
+        "GET /api/health": ("GET", get(lambda: "/api/health")),
+        "GET /api/dashboard": ("GET", get(lambda: "/api/dashboard")),
+        "GET /api/dashboard/last_study_session": ("GET", get(lambda: "/api/dashboard/last_study_session")),
+        "GET /api/dashboard/study_progress": ("GET", get(lambda: "/api/dashboard/study_progress")),
+        "GET /api/dashboard/quick_stats": ("GET", get(lambda: "/api/dashboard/quick_stats")),
+        "GET /api/stats/daily": ("GET", get(lambda: "/api/stats/daily?from=2024-01-01&to=2024-12-31")),
+        "GET /api/study-activities": ("GET", get(lambda: "/api/study-activities")),
+        "GET /api/study-activities/{id}": ("GET", get(lambda: f"/api/study-activities/{rng.randint(1, 4)}")),
+        "GET /api/study-activities/{id}/study-sessions": (
+            "GET", get(lambda: f"/api/study-activities/{rng.randint(1, 4)}/study-sessions")),
+        "GET /api/words": ("GET", get(lambda: f"/api/words?page={rng.randint(1, max(1, words // 100))}")),
+        "GET /api/words/search": ("GET", get(lambda: f"/api/words/search?q={rng.choice('bcdfglmnprstz')}a")),
+        "GET /api/words/{id}": ("GET", get(lambda: f"/api/words/{word()}")),
+        "GET /api/groups": ("GET", get(lambda: "/api/groups?sort_by=words_count&order=desc")),
+        "GET /api/groups/{id}": ("GET", get(lambda: f"/api/groups/{group()}")),
+        "GET /api/groups/{id}/words": ("GET", get(lambda: f"/api/groups/{group()}/words")),
+        "GET /api/groups/{id}/due-words": ("GET", get(lambda: f"/api/groups/{group()}/due-words?limit=20")),
+        "GET /api/groups/{id}/study-sessions": ("GET", get(lambda: f"/api/groups/{group()}/study-sessions")),
+        "GET /api/study-sessions": ("GET", get(lambda: f"/api/study-sessions?page={rng.randint(1, 50)}")),
+        "GET /api/study-sessions/{id}": ("GET", get(lambda: f"/api/study-sessions/{session()}")),
+        "GET /api/study-sessions/{id}/words": ("GET", get(lambda: f"/api/study-sessions/{session()}/words")),
+        "POST /api/study-activities": ("POST", lambda: (
+            "/api/study-activities", {"group_id": group(), "study_activity_id": rng.randint(1, 4)})),
+        "POST /api/study-sessions/{id}/reviews": ("POST", lambda: (
+            f"/api/study-sessions/{session()}/reviews",
+            {"items": [{"word_id": word(), "correct": rng.random() < 0.7} for _ in range(20)]})),
+    }
+
+
+async def run_endpoint(client, method, make_request, concurrency, requests):
+    """Reparte `requests` peticiones entre `concurrency` clientes."""
+    latencies = []
+    errors = 0
+    pending = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in pending:
+            path, body = make_request()
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+    }
+
+
+async def run_all(app, endpoints, concurrency, requests, warmup, only=None):
+    import httpx
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, (method, make_request) in endpoints.items():
+            if only and only not in name:
+                continue
+            await run_endpoint(client, method, make_request, 1, warmup)
+            results[name] = await run_endpoint(client, method, make_request, concurrency, requests)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results, baseline=None):
+    header = f"{'endpoint':<48} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'err':>5}"
+    if baseline:
+        header += f" {'Δ p50':>8} {'Δ p99':>8}"
+    print(header)
+    for name, result in results.items():
+        line = (
+            f"{name:<48} {result['throughput']:>9.1f} {result['p50_ms']:>8.2f}"
+            f" {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['errors']:>5}"
+        )
+        previous = (baseline or {}).get(name)
+        if previous:
+            # Variación relativa frente a la ejecución anterior (positiva = más lento)
+            for key in ("p50_ms", "p99_ms"):
+                change = (result[key] - previous[key]) / previous[key] * 100 if previous[key] else 0
+                line += f" {change:>+7.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", choices=sorted(SIZES), default="10k")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200, help="peticiones por endpoint")
+    parser.add_argument("--warmup", type=int, default=10, help="peticiones de calentamiento por endpoint")
+    parser.add_argument("--endpoint", help="solo los endpoints cuyo nombre contenga este texto")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-db", help="base generada a reutilizar (por defecto, en el directorio temporal)")
+    parser.add_argument("--regenerate", action="store_true", help="vuelve a generar los datos")
+    parser.add_argument("--output", help=f"fichero JSON de resultados (por defecto, en {RESULTS_DIR})")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior con el que comparar")
+    args = parser.parse_args()
+
+    counts = size_counts(args.size)
+    data_db = args.data_db or os.path.join(tempfile.gettempdir(), f"lang-portal-{args.size}-{args.seed}.db")
+    if args.regenerate or not os.path.exists(data_db):
+        start = time.perf_counter()
+        build_database(data_db, seed=args.seed, **counts)
+        print(f"Datos {args.size} generados en {time.perf_counter() - start:.1f}s: {data_db}")
+
+    # Las escrituras del benchmark van a una copia para que cada ejecución parta de los mismos datos
+    work_db = os.path.join(tempfile.gettempdir(), "run_benchmarks.db")
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(work_db + suffix):
+            os.remove(work_db + suffix)
+    shutil.copyfile(data_db, work_db)
+    use_database(work_db)
+
+    from app.database import DB_THREADPOOL_SIZE
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    endpoints = build_endpoints(counts, rng)
+    results = asyncio.run(run_all(app, endpoints, args.concurrency, args.requests, args.warmup, args.endpoint))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["endpoints"]
+    print_results(results, baseline)
+
+    revision = git_revision()
+    report = {
+        "meta": {
+            "git_revision": revision,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "size": args.size,
+            "counts": counts,
+            "seed": args.seed,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "db_threadpool_size": DB_THREADPOOL_SIZE,
+            "cpus": os.cpu_count(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "endpoints": results,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{revision or 'nogit'}-{args.size}-c{args.concurrency}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+    print(f"Resultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
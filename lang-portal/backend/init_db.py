@@ -1,26 +1,84 @@
 import os
+import re
 import sqlite3
 
 MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), 'migrations')
+POSTGRES_MIGRATIONS_DIR = os.path.join(MIGRATIONS_DIR, 'postgresql')
 DB_PATH = os.path.join(os.path.dirname(__file__), 'words.db')
 
-def run_migrations():
-    conn = sqlite3.connect(DB_PATH)
+# SQLite no admite ADD COLUMN IF NOT EXISTS; run_migrations lo resuelve con
+# PRAGMA table_info para que las migraciones se puedan repetir
+ADD_COLUMN_IF_NOT_EXISTS = re.compile(
+    r"ALTER TABLE (\w+) ADD COLUMN IF NOT EXISTS (\w+)([^;]*);", re.IGNORECASE
+)
+
+
+def execute_sqlite_script(cursor, sql_script):
+    """`executescript` con soporte para `ALTER TABLE ... ADD COLUMN IF NOT EXISTS`."""
+    position = 0
+    for match in ADD_COLUMN_IF_NOT_EXISTS.finditer(sql_script):
+        cursor.executescript(sql_script[position:match.start()])
+        table, column, definition = match.groups()
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}{definition}")
+        position = match.end()
+    cursor.executescript(sql_script[position:])
+
+
+def run_migrations(db_path=DB_PATH, verbose=True):
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
     migration_files = sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith('.sql'))
     
     for migration in migration_files:
         migration_path = os.path.join(MIGRATIONS_DIR, migration)
-        print(f"Ejecutando migración: {migration}")
+        if verbose:
+            print(f"Ejecutando migración: {migration}")
         with open(migration_path, 'r', encoding='utf-8') as f:
             sql_script = f.read()
-        cursor.executescript(sql_script)
+        execute_sqlite_script(cursor, sql_script)
         conn.commit()
     
     conn.close()
 
+def run_postgres_migrations(database_url, verbose=True):
+    """
+    Aplica las migraciones de migrations/postgresql a `database_url`. Son
+    idempotentes, igual que las de SQLite, y cada fichero va en su transacción.
+    """
+    from sqlalchemy import create_engine
+
+    engine = create_engine(database_url)
+    try:
+        migration_files = sorted(f for f in os.listdir(POSTGRES_MIGRATIONS_DIR) if f.endswith('.sql'))
+        for migration in migration_files:
+            if verbose:
+                print(f"Ejecutando migración: postgresql/{migration}")
+            with open(os.path.join(POSTGRES_MIGRATIONS_DIR, migration), 'r', encoding='utf-8') as f:
+                sql_script = f.read()
+            # Conexión DBAPI directa: el script lleva varias sentencias y
+            # cuerpos $$...$$ que no deben pasar por el formateo de parámetros
+            conn = engine.raw_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(sql_script)
+                cursor.close()
+                conn.commit()
+            finally:
+                conn.close()
+    finally:
+        engine.dispose()
+
 if __name__ == '__main__':
+    database_url = os.getenv("DATABASE_URL", "")
+    if database_url and not database_url.startswith("sqlite"):
+        # Servidor de base de datos: las migraciones se aplican sobre la base existente
+        run_postgres_migrations(database_url)
+        print("Migraciones ejecutadas correctamente.")
+        raise SystemExit(0)
+
     # Para forzar la reinicialización, descomenta la siguiente línea:
     if os.path.exists(DB_PATH): os.remove(DB_PATH)
     
@@ -0,0 +1,51 @@
+-- Create word_stats summary table
+-- Per-word review counters, kept exact by triggers on word_review_items so
+-- word listings never need to aggregate the whole review history.
+CREATE TABLE IF NOT EXISTS word_stats (
+    word_id INTEGER PRIMARY KEY,
+    correct_count INTEGER NOT NULL DEFAULT 0,
+    wrong_count INTEGER NOT NULL DEFAULT 0,
+    FOREIGN KEY (word_id) REFERENCES words(id)
+);
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_stats_insert
+AFTER INSERT ON word_review_items
+BEGIN
+    INSERT INTO word_stats (word_id, correct_count, wrong_count)
+    VALUES (
+        NEW.word_id,
+        CASE WHEN NEW.correct THEN 1 ELSE 0 END,
+        CASE WHEN NOT NEW.correct THEN 1 ELSE 0 END
+    )
+    ON CONFLICT (word_id) DO UPDATE SET
+        correct_count = correct_count + excluded.correct_count,
+        wrong_count = wrong_count + excluded.wrong_count;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_stats_delete
+AFTER DELETE ON word_review_items
+BEGIN
+    UPDATE word_stats SET
+        correct_count = correct_count - CASE WHEN OLD.correct THEN 1 ELSE 0 END,
+        wrong_count = wrong_count - CASE WHEN NOT OLD.correct THEN 1 ELSE 0 END
+    WHERE word_id = OLD.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_stats_update
+AFTER UPDATE OF word_id, correct ON word_review_items
+BEGIN
+    UPDATE word_stats SET
+        correct_count = correct_count - CASE WHEN OLD.correct THEN 1 ELSE 0 END,
+        wrong_count = wrong_count - CASE WHEN NOT OLD.correct THEN 1 ELSE 0 END
+    WHERE word_id = OLD.word_id;
+
+    INSERT INTO word_stats (word_id, correct_count, wrong_count)
+    VALUES (
+        NEW.word_id,
+        CASE WHEN NEW.correct THEN 1 ELSE 0 END,
+        CASE WHEN NOT NEW.correct THEN 1 ELSE 0 END
+    )
+    ON CONFLICT (word_id) DO UPDATE SET
+        correct_count = correct_count + excluded.correct_count,
+        wrong_count = wrong_count + excluded.wrong_count;
+END;
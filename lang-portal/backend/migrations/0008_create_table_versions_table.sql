@@ -0,0 +1,143 @@
+-- Create table_versions write counters
+-- One row per table, bumped by triggers on every insert/update/delete. Readers
+-- compare the counters to decide whether a cached response is still valid, and
+-- because the counters live in the database every worker process sees them.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO table_versions (table_name) VALUES
+    ('words'),
+    ('groups'),
+    ('word_groups'),
+    ('study_activities'),
+    ('study_sessions'),
+    ('word_review_items');
+
+CREATE TRIGGER IF NOT EXISTS words_version_insert
+AFTER INSERT ON words
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_version_update
+AFTER UPDATE ON words
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_version_delete
+AFTER DELETE ON words
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_version_insert
+AFTER INSERT ON groups
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_version_update
+AFTER UPDATE ON groups
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_version_delete
+AFTER DELETE ON groups
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_version_insert
+AFTER INSERT ON word_groups
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_version_update
+AFTER UPDATE ON word_groups
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_version_delete
+AFTER DELETE ON word_groups
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_activities_version_insert
+AFTER INSERT ON study_activities
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_activities_version_update
+AFTER UPDATE ON study_activities
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_activities_version_delete
+AFTER DELETE ON study_activities
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_version_insert
+AFTER INSERT ON study_sessions
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_version_update
+AFTER UPDATE ON study_sessions
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_version_delete
+AFTER DELETE ON study_sessions
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'study_sessions';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_version_insert
+AFTER INSERT ON word_review_items
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'word_review_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_version_update
+AFTER UPDATE ON word_review_items
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'word_review_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_version_delete
+AFTER DELETE ON word_review_items
+BEGIN
+    UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+    WHERE table_name = 'word_review_items';
+END;
@@ -0,0 +1,38 @@
+-- Create words_fts full-text index
+-- External-content FTS5 index over words.spanish and words.english. The
+-- unicode61 tokenizer folds case and diacritics ("adios" matches "adiós") and
+-- the prefix indexes serve autocomplete queries ("adi*") without scanning terms.
+CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+    spanish,
+    english,
+    content='words',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='1 2 3'
+);
+
+-- Index the words that already exist
+INSERT INTO words_fts (words_fts) VALUES ('rebuild');
+
+CREATE TRIGGER IF NOT EXISTS words_fts_insert
+AFTER INSERT ON words
+BEGIN
+    INSERT INTO words_fts (rowid, spanish, english)
+    VALUES (NEW.id, NEW.spanish, NEW.english);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_fts_delete
+AFTER DELETE ON words
+BEGIN
+    INSERT INTO words_fts (words_fts, rowid, spanish, english)
+    VALUES ('delete', OLD.id, OLD.spanish, OLD.english);
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_fts_update
+AFTER UPDATE OF spanish, english ON words
+BEGIN
+    INSERT INTO words_fts (words_fts, rowid, spanish, english)
+    VALUES ('delete', OLD.id, OLD.spanish, OLD.english);
+    INSERT INTO words_fts (rowid, spanish, english)
+    VALUES (NEW.id, NEW.spanish, NEW.english);
+END;
@@ -0,0 +1,31 @@
+-- Keep groups.words_count exact
+-- Triggers on word_groups adjust the owning group's counter on every link
+-- change, so group listings never count word_groups per group.
+UPDATE groups SET words_count = (
+    SELECT COUNT(*) FROM word_groups wg WHERE wg.group_id = groups.id
+);
+
+CREATE TRIGGER IF NOT EXISTS word_groups_words_count_insert
+AFTER INSERT ON word_groups
+BEGIN
+    UPDATE groups SET words_count = words_count + 1 WHERE id = NEW.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_words_count_delete
+AFTER DELETE ON word_groups
+BEGIN
+    UPDATE groups SET words_count = words_count - 1 WHERE id = OLD.group_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_words_count_update
+AFTER UPDATE OF group_id ON word_groups
+WHEN NEW.group_id IS NOT OLD.group_id
+BEGIN
+    UPDATE groups SET words_count = words_count - 1 WHERE id = OLD.group_id;
+    UPDATE groups SET words_count = words_count + 1 WHERE id = NEW.group_id;
+END;
+
+-- Group listing sorted by name or size (the rowid breaks ties for the cursor),
+-- and the ?min_words= range filter
+CREATE INDEX IF NOT EXISTS idx_groups_name ON groups (name);
+CREATE INDEX IF NOT EXISTS idx_groups_words_count ON groups (words_count);
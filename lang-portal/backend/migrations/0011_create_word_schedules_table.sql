@@ -0,0 +1,48 @@
+-- Create word_schedules table
+-- Spaced-repetition (SM-2) state of each word within each group. Reviews
+-- update it incrementally (app/reviews.py), so the due queue of a group is a
+-- range scan on (group_id, next_review_at) instead of a pass over the history.
+CREATE TABLE IF NOT EXISTS word_schedules (
+    group_id INTEGER NOT NULL,
+    word_id INTEGER NOT NULL,
+    ease REAL NOT NULL DEFAULT 2.5,
+    interval_days INTEGER NOT NULL DEFAULT 0,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    -- New words are due as soon as they are added to the group
+    next_review_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_reviewed_at DATETIME,
+    PRIMARY KEY (group_id, word_id),
+    FOREIGN KEY (group_id) REFERENCES groups(id),
+    FOREIGN KEY (word_id) REFERENCES words(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_word_schedules_due
+    ON word_schedules (group_id, next_review_at, word_id);
+
+-- Every word already linked to a group starts with a fresh schedule;
+-- backfill_counters.py replays the existing review history on top of it
+INSERT OR IGNORE INTO word_schedules (group_id, word_id)
+SELECT group_id, word_id FROM word_groups;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_schedules_insert
+AFTER INSERT ON word_groups
+BEGIN
+    INSERT OR IGNORE INTO word_schedules (group_id, word_id)
+    VALUES (NEW.group_id, NEW.word_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_schedules_delete
+AFTER DELETE ON word_groups
+BEGIN
+    DELETE FROM word_schedules
+    WHERE group_id = OLD.group_id AND word_id = OLD.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_groups_schedules_update
+AFTER UPDATE OF group_id, word_id ON word_groups
+BEGIN
+    DELETE FROM word_schedules
+    WHERE group_id = OLD.group_id AND word_id = OLD.word_id;
+    INSERT OR IGNORE INTO word_schedules (group_id, word_id)
+    VALUES (NEW.group_id, NEW.word_id);
+END;
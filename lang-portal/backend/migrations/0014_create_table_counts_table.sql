@@ -0,0 +1,112 @@
+-- Create table_counts row counters
+-- Totals the dashboard and the paginated listings need: rows in words, groups,
+-- study_sessions and word_review_items, correct reviews, and words with at
+-- least one correct review. Kept exact by triggers, so no read ever counts a
+-- growing table. PostgreSQL spreads each counter over shards (one per backend,
+-- modulo 16) and readers add them up; SQLite has a single writer and uses
+-- shard 0 only. Rebuilt from the tables on every run and by
+-- backfill_counters.py.
+CREATE TABLE IF NOT EXISTS table_counts (
+    name TEXT NOT NULL,
+    shard INTEGER NOT NULL DEFAULT 0,
+    value INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, shard)
+);
+
+DELETE FROM table_counts;
+INSERT INTO table_counts (name, shard, value)
+SELECT 'words', 0, COUNT(*) FROM words
+UNION ALL SELECT 'groups', 0, COUNT(*) FROM groups
+UNION ALL SELECT 'study_sessions', 0, COUNT(*) FROM study_sessions
+UNION ALL SELECT 'word_review_items', 0, COUNT(*) FROM word_review_items
+UNION ALL SELECT 'correct_reviews', 0, COUNT(*) FROM word_review_items WHERE correct
+UNION ALL SELECT 'words_studied', 0, COUNT(*) FROM word_stats ws
+    WHERE ws.correct_count > 0 AND EXISTS (SELECT 1 FROM words w WHERE w.id = ws.word_id);
+
+-- A deleted word takes its counters with it, as ON DELETE CASCADE does on
+-- PostgreSQL (SQLite does not enforce the foreign key)
+CREATE TRIGGER IF NOT EXISTS words_stats_delete
+AFTER DELETE ON words
+BEGIN
+    DELETE FROM word_stats WHERE word_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_count_insert
+AFTER INSERT ON words
+BEGIN
+    UPDATE table_counts SET value = value + 1 WHERE name = 'words' AND shard = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_count_delete
+AFTER DELETE ON words
+BEGIN
+    UPDATE table_counts SET value = value - 1 WHERE name = 'words' AND shard = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_count_insert
+AFTER INSERT ON groups
+BEGIN
+    UPDATE table_counts SET value = value + 1 WHERE name = 'groups' AND shard = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS groups_count_delete
+AFTER DELETE ON groups
+BEGIN
+    UPDATE table_counts SET value = value - 1 WHERE name = 'groups' AND shard = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_count_insert
+AFTER INSERT ON study_sessions
+BEGIN
+    UPDATE table_counts SET value = value + 1 WHERE name = 'study_sessions' AND shard = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_sessions_count_delete
+AFTER DELETE ON study_sessions
+BEGIN
+    UPDATE table_counts SET value = value - 1 WHERE name = 'study_sessions' AND shard = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_count_insert
+AFTER INSERT ON word_review_items
+BEGIN
+    UPDATE table_counts SET value = value + 1 WHERE name = 'word_review_items' AND shard = 0;
+    UPDATE table_counts SET value = value + 1 WHERE name = 'correct_reviews' AND shard = 0 AND NEW.correct;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_count_delete
+AFTER DELETE ON word_review_items
+BEGIN
+    UPDATE table_counts SET value = value - 1 WHERE name = 'word_review_items' AND shard = 0;
+    UPDATE table_counts SET value = value - 1 WHERE name = 'correct_reviews' AND shard = 0 AND OLD.correct;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_review_items_count_update
+AFTER UPDATE OF correct ON word_review_items
+WHEN NEW.correct IS NOT OLD.correct
+BEGIN
+    UPDATE table_counts SET value = value + CASE WHEN NEW.correct THEN 1 ELSE -1 END
+    WHERE name = 'correct_reviews' AND shard = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_stats_studied_insert
+AFTER INSERT ON word_stats
+WHEN NEW.correct_count > 0
+BEGIN
+    UPDATE table_counts SET value = value + 1 WHERE name = 'words_studied' AND shard = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_stats_studied_update
+AFTER UPDATE OF correct_count ON word_stats
+WHEN (NEW.correct_count > 0) <> (OLD.correct_count > 0)
+BEGIN
+    UPDATE table_counts SET value = value + CASE WHEN NEW.correct_count > 0 THEN 1 ELSE -1 END
+    WHERE name = 'words_studied' AND shard = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_stats_studied_delete
+AFTER DELETE ON word_stats
+WHEN OLD.correct_count > 0
+BEGIN
+    UPDATE table_counts SET value = value - 1 WHERE name = 'words_studied' AND shard = 0;
+END;
@@ -0,0 +1,20 @@
+-- Helper functions shared by the PostgreSQL schema
+
+-- Timestamps are stored as text in SQLite's CURRENT_TIMESTAMP format (UTC,
+-- 'YYYY-MM-DD HH:MM:SS'), so the API returns the same strings, keyset cursors
+-- compare the same way and app/stats.py parses them unchanged on both backends.
+CREATE OR REPLACE FUNCTION utc_timestamp_text() RETURNS TEXT AS $$
+    SELECT to_char(now() AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS')
+$$ LANGUAGE SQL STABLE;
+
+-- Case and accent folding for the word search, like FTS5's
+-- 'unicode61 remove_diacritics' tokenizer ("adios" matches "adiós"). Upper
+-- case accented letters are listed too because lower() leaves them alone
+-- under the C locale.
+CREATE OR REPLACE FUNCTION fold_accents(value TEXT) RETURNS TEXT AS $$
+    SELECT translate(
+        lower(value),
+        'áàâäãéèêëíìîïóòôöõúùûüñçÁÀÂÄÃÉÈÊËÍÌÎÏÓÒÔÖÕÚÙÛÜÑÇ',
+        'aaaaaeeeeiiiiooooouuuuncaaaaaeeeeiiiiooooouuuunc'
+    )
+$$ LANGUAGE SQL IMMUTABLE;
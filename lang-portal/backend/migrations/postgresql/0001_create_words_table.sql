@@ -0,0 +1,7 @@
+-- Create words table
+CREATE TABLE IF NOT EXISTS words (
+    id SERIAL PRIMARY KEY,
+    spanish TEXT NOT NULL,
+    english TEXT NOT NULL,
+    parts JSON NOT NULL
+);
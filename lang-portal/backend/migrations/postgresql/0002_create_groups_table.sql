@@ -0,0 +1,8 @@
+-- Create groups table
+-- The C collation sorts names byte by byte, as SQLite does, so the
+-- ?sort_by=name order (and its cursors) is the same on both backends.
+CREATE TABLE IF NOT EXISTS groups (
+    id SERIAL PRIMARY KEY,
+    name TEXT COLLATE "C" NOT NULL,
+    words_count INTEGER DEFAULT 0
+);
@@ -0,0 +1,5 @@
+-- Create word_groups join table
+CREATE TABLE IF NOT EXISTS word_groups (
+    word_id INTEGER NOT NULL REFERENCES words(id),
+    group_id INTEGER NOT NULL REFERENCES groups(id)
+);
@@ -0,0 +1,8 @@
+-- Create study_activities table
+CREATE TABLE IF NOT EXISTS study_activities (
+    id SERIAL PRIMARY KEY,
+    name TEXT NOT NULL,
+    thumbnail_url TEXT,
+    description TEXT,
+    launch_url TEXT NOT NULL
+);
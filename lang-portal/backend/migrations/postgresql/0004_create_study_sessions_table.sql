@@ -0,0 +1,8 @@
+-- Create study_sessions table
+CREATE TABLE IF NOT EXISTS study_sessions (
+    id SERIAL PRIMARY KEY,
+    group_id INTEGER NOT NULL REFERENCES groups(id),
+    study_activity_id INTEGER NOT NULL REFERENCES study_activities(id),
+    created_at TEXT DEFAULT utc_timestamp_text(),
+    end_time TEXT
+);
@@ -0,0 +1,10 @@
+-- Create word_review_items table
+-- PostgreSQL enforces the foreign keys (SQLite, without PRAGMA foreign_keys,
+-- does not), so deleting a session also deletes its reviews instead of failing.
+CREATE TABLE IF NOT EXISTS word_review_items (
+    id SERIAL PRIMARY KEY,
+    word_id INTEGER NOT NULL REFERENCES words(id),
+    study_session_id INTEGER NOT NULL REFERENCES study_sessions(id) ON DELETE CASCADE,
+    correct BOOLEAN NOT NULL,
+    created_at TEXT DEFAULT utc_timestamp_text()
+);
@@ -0,0 +1,45 @@
+-- Create word_stats summary table
+-- Per-word review counters, kept exact by triggers on word_review_items so
+-- word listings never need to aggregate the whole review history. A deleted
+-- word takes its counters with it.
+CREATE TABLE IF NOT EXISTS word_stats (
+    word_id INTEGER PRIMARY KEY REFERENCES words(id) ON DELETE CASCADE,
+    correct_count INTEGER NOT NULL DEFAULT 0,
+    wrong_count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION word_review_items_stats() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE word_stats SET
+            correct_count = correct_count - CASE WHEN OLD.correct THEN 1 ELSE 0 END,
+            wrong_count = wrong_count - CASE WHEN NOT OLD.correct THEN 1 ELSE 0 END
+        WHERE word_id = OLD.word_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO word_stats AS ws (word_id, correct_count, wrong_count)
+        VALUES (
+            NEW.word_id,
+            CASE WHEN NEW.correct THEN 1 ELSE 0 END,
+            CASE WHEN NOT NEW.correct THEN 1 ELSE 0 END
+        )
+        ON CONFLICT (word_id) DO UPDATE SET
+            correct_count = ws.correct_count + excluded.correct_count,
+            wrong_count = ws.wrong_count + excluded.wrong_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER word_review_items_stats_insert
+AFTER INSERT ON word_review_items
+FOR EACH ROW EXECUTE FUNCTION word_review_items_stats();
+
+CREATE OR REPLACE TRIGGER word_review_items_stats_delete
+AFTER DELETE ON word_review_items
+FOR EACH ROW EXECUTE FUNCTION word_review_items_stats();
+
+CREATE OR REPLACE TRIGGER word_review_items_stats_update
+AFTER UPDATE OF word_id, correct ON word_review_items
+FOR EACH ROW EXECUTE FUNCTION word_review_items_stats();
@@ -0,0 +1,27 @@
+-- Create secondary indexes for the access paths used by the API
+-- PostgreSQL does not append the row id to secondary indexes the way SQLite
+-- does, so the id is listed explicitly where it is part of a keyset order.
+
+-- Reviews of a session, in review order (/study-sessions/{id}/words and the
+-- per-session review counts)
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session
+    ON word_review_items (study_session_id, created_at, id);
+
+-- Reviews of a word (/dashboard/study_progress, backfill_counters.py)
+CREATE INDEX IF NOT EXISTS idx_word_review_items_word
+    ON word_review_items (word_id, correct);
+
+-- Words of a group, in word order (/groups/{id}/words)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_groups_group_word
+    ON word_groups (group_id, word_id);
+
+-- Session listings, newest first (/study-sessions, /dashboard/*)
+CREATE INDEX IF NOT EXISTS idx_study_sessions_created_at
+    ON study_sessions (created_at, id);
+
+-- Session listings filtered by group or by activity
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group
+    ON study_sessions (group_id, created_at, id);
+
+CREATE INDEX IF NOT EXISTS idx_study_sessions_activity
+    ON study_sessions (study_activity_id, created_at, id);
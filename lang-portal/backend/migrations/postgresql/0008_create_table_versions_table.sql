@@ -0,0 +1,75 @@
+-- Create table_versions write counters
+-- One row per table, bumped by triggers on every insert/update/delete. Readers
+-- compare the counters to decide whether a cached response is still valid, and
+-- because the counters live in the database every worker process sees them.
+--
+-- The triggers are deferred to commit time and bump each table at most once
+-- per transaction: a batch of reviews costs one counter update, and the
+-- counter's row lock (the one lock every writer of a table shares) is only
+-- taken at the very end, after the transaction holds all its other locks, so
+-- concurrent writers queue on it briefly instead of deadlocking around it.
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT DEFAULT utc_timestamp_text()
+);
+
+INSERT INTO table_versions (table_name) VALUES
+    ('words'),
+    ('groups'),
+    ('word_groups'),
+    ('study_activities'),
+    ('study_sessions'),
+    ('word_review_items')
+ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+DECLARE
+    bumped TEXT := 'lang_portal.version_bumped_' || TG_TABLE_NAME;
+BEGIN
+    -- Transaction-local flag: the first changed row bumps, the rest skip
+    IF current_setting(bumped, true) = 'on' THEN
+        RETURN NULL;
+    END IF;
+    PERFORM set_config(bumped, 'on', true);
+    UPDATE table_versions SET version = version + 1, updated_at = utc_timestamp_text()
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS words_version ON words;
+CREATE CONSTRAINT TRIGGER words_version
+AFTER INSERT OR UPDATE OR DELETE ON words
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS groups_version ON groups;
+CREATE CONSTRAINT TRIGGER groups_version
+AFTER INSERT OR UPDATE OR DELETE ON groups
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS word_groups_version ON word_groups;
+CREATE CONSTRAINT TRIGGER word_groups_version
+AFTER INSERT OR UPDATE OR DELETE ON word_groups
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS study_activities_version ON study_activities;
+CREATE CONSTRAINT TRIGGER study_activities_version
+AFTER INSERT OR UPDATE OR DELETE ON study_activities
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS study_sessions_version ON study_sessions;
+CREATE CONSTRAINT TRIGGER study_sessions_version
+AFTER INSERT OR UPDATE OR DELETE ON study_sessions
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION bump_table_version();
+
+DROP TRIGGER IF EXISTS word_review_items_version ON word_review_items;
+CREATE CONSTRAINT TRIGGER word_review_items_version
+AFTER INSERT OR UPDATE OR DELETE ON word_review_items
+DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION bump_table_version();
@@ -0,0 +1,12 @@
+-- Create the words full-text index
+-- PostgreSQL counterpart of the FTS5 table: a generated tsvector over the
+-- accent-folded spanish and english columns, kept up to date by the database
+-- itself, and a GIN index that also serves prefix queries ('adi':*). The
+-- 'simple' configuration neither stems nor drops stop words, like unicode61.
+ALTER TABLE words ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        to_tsvector('simple', fold_accents(spanish) || ' ' || fold_accents(english))
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_words_search_vector
+    ON words USING GIN (search_vector);
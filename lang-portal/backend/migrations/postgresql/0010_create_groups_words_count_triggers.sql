@@ -0,0 +1,38 @@
+-- Keep groups.words_count exact
+-- Triggers on word_groups adjust the owning group's counter on every link
+-- change, so group listings never count word_groups per group.
+UPDATE groups SET words_count = (
+    SELECT COUNT(*) FROM word_groups wg WHERE wg.group_id = groups.id
+);
+
+CREATE OR REPLACE FUNCTION word_groups_words_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' AND NEW.group_id IS NOT DISTINCT FROM OLD.group_id THEN
+        RETURN NULL;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE groups SET words_count = words_count - 1 WHERE id = OLD.group_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE groups SET words_count = words_count + 1 WHERE id = NEW.group_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER word_groups_words_count_insert
+AFTER INSERT ON word_groups
+FOR EACH ROW EXECUTE FUNCTION word_groups_words_count();
+
+CREATE OR REPLACE TRIGGER word_groups_words_count_delete
+AFTER DELETE ON word_groups
+FOR EACH ROW EXECUTE FUNCTION word_groups_words_count();
+
+CREATE OR REPLACE TRIGGER word_groups_words_count_update
+AFTER UPDATE OF group_id ON word_groups
+FOR EACH ROW EXECUTE FUNCTION word_groups_words_count();
+
+-- Group listing sorted by name or size (the id breaks ties for the cursor),
+-- and the ?min_words= range filter
+CREATE INDEX IF NOT EXISTS idx_groups_name ON groups (name, id);
+CREATE INDEX IF NOT EXISTS idx_groups_words_count ON groups (words_count, id);
@@ -0,0 +1,51 @@
+-- Create word_schedules table
+-- Spaced-repetition (SM-2) state of each word within each group. Reviews
+-- update it incrementally (app/reviews.py), so the due queue of a group is a
+-- range scan on (group_id, next_review_at) instead of a pass over the history.
+CREATE TABLE IF NOT EXISTS word_schedules (
+    group_id INTEGER NOT NULL REFERENCES groups(id),
+    word_id INTEGER NOT NULL REFERENCES words(id),
+    ease DOUBLE PRECISION NOT NULL DEFAULT 2.5,
+    interval_days INTEGER NOT NULL DEFAULT 0,
+    repetitions INTEGER NOT NULL DEFAULT 0,
+    -- New words are due as soon as they are added to the group
+    next_review_at TEXT NOT NULL DEFAULT utc_timestamp_text(),
+    last_reviewed_at TEXT,
+    PRIMARY KEY (group_id, word_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_word_schedules_due
+    ON word_schedules (group_id, next_review_at, word_id);
+
+-- Every word already linked to a group starts with a fresh schedule;
+-- backfill_counters.py replays the existing review history on top of it
+INSERT INTO word_schedules (group_id, word_id)
+SELECT group_id, word_id FROM word_groups
+ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION word_groups_schedules() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        DELETE FROM word_schedules
+        WHERE group_id = OLD.group_id AND word_id = OLD.word_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO word_schedules (group_id, word_id)
+        VALUES (NEW.group_id, NEW.word_id)
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER word_groups_schedules_insert
+AFTER INSERT ON word_groups
+FOR EACH ROW EXECUTE FUNCTION word_groups_schedules();
+
+CREATE OR REPLACE TRIGGER word_groups_schedules_delete
+AFTER DELETE ON word_groups
+FOR EACH ROW EXECUTE FUNCTION word_groups_schedules();
+
+CREATE OR REPLACE TRIGGER word_groups_schedules_update
+AFTER UPDATE OF group_id, word_id ON word_groups
+FOR EACH ROW EXECUTE FUNCTION word_groups_schedules();
@@ -0,0 +1,16 @@
+-- Create study_daily_stats rollup
+-- One row per local day (STATS_TIMEZONE) with study activity, kept by the
+-- write paths in app/stats.py. `streak` is the length of the run of
+-- consecutive active days ending on that day, so the current streak is a
+-- primary-key lookup and the longest one is the maximum of an index.
+CREATE TABLE IF NOT EXISTS study_daily_stats (
+    day TEXT PRIMARY KEY,
+    sessions INTEGER NOT NULL DEFAULT 0,
+    reviews INTEGER NOT NULL DEFAULT 0,
+    correct_count INTEGER NOT NULL DEFAULT 0,
+    incorrect_count INTEGER NOT NULL DEFAULT 0,
+    streak INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE INDEX IF NOT EXISTS idx_study_daily_stats_streak
+    ON study_daily_stats (streak);
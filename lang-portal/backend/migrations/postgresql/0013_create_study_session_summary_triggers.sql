@@ -0,0 +1,55 @@
+-- Keep the study session summary exact
+-- Triggers on word_review_items adjust the owning session's correct_count,
+-- incorrect_count and total_items on every review change, so session reads
+-- never aggregate word_review_items per session.
+ALTER TABLE study_sessions
+    ADD COLUMN IF NOT EXISTS correct_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS incorrect_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS total_items INTEGER NOT NULL DEFAULT 0;
+
+UPDATE study_sessions SET
+    correct_count = (
+        SELECT COUNT(*) FROM word_review_items wri
+        WHERE wri.study_session_id = study_sessions.id AND wri.correct
+    ),
+    incorrect_count = (
+        SELECT COUNT(*) FROM word_review_items wri
+        WHERE wri.study_session_id = study_sessions.id AND NOT wri.correct
+    ),
+    total_items = (
+        SELECT COUNT(*) FROM word_review_items wri
+        WHERE wri.study_session_id = study_sessions.id
+    );
+
+CREATE OR REPLACE FUNCTION word_review_items_session_summary() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE study_sessions SET
+            correct_count = correct_count - CASE WHEN OLD.correct THEN 1 ELSE 0 END,
+            incorrect_count = incorrect_count - CASE WHEN NOT OLD.correct THEN 1 ELSE 0 END,
+            total_items = total_items - 1
+        WHERE id = OLD.study_session_id;
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE study_sessions SET
+            correct_count = correct_count + CASE WHEN NEW.correct THEN 1 ELSE 0 END,
+            incorrect_count = incorrect_count + CASE WHEN NOT NEW.correct THEN 1 ELSE 0 END,
+            total_items = total_items + 1
+        WHERE id = NEW.study_session_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER word_review_items_session_insert
+AFTER INSERT ON word_review_items
+FOR EACH ROW EXECUTE FUNCTION word_review_items_session_summary();
+
+CREATE OR REPLACE TRIGGER word_review_items_session_delete
+AFTER DELETE ON word_review_items
+FOR EACH ROW EXECUTE FUNCTION word_review_items_session_summary();
+
+CREATE OR REPLACE TRIGGER word_review_items_session_update
+AFTER UPDATE OF study_session_id, correct ON word_review_items
+FOR EACH ROW EXECUTE FUNCTION word_review_items_session_summary();
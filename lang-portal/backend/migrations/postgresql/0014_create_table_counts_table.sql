@@ -0,0 +1,133 @@
+-- Create table_counts row counters
+-- Totals the dashboard and the paginated listings need: rows in words, groups,
+-- study_sessions and word_review_items, correct reviews, and words with at
+-- least one correct review. Kept exact by triggers, so no read ever counts a
+-- growing table.
+--
+-- Each counter is spread over 16 shards and readers add them up. A writer
+-- only touches the shard of its backend (pg_backend_pid() % 16), so
+-- concurrent transactions do not queue on one counter row. The triggers run
+-- once per statement over its transition tables, and skip zero deltas: a
+-- batch of reviews costs one update per counter, not one per row.
+CREATE TABLE IF NOT EXISTS table_counts (
+    name TEXT NOT NULL,
+    shard INTEGER NOT NULL DEFAULT 0,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, shard)
+);
+
+DELETE FROM table_counts;
+INSERT INTO table_counts (name, shard, value)
+SELECT 'words', 0, COUNT(*) FROM words
+UNION ALL SELECT 'groups', 0, COUNT(*) FROM groups
+UNION ALL SELECT 'study_sessions', 0, COUNT(*) FROM study_sessions
+UNION ALL SELECT 'word_review_items', 0, COUNT(*) FROM word_review_items
+UNION ALL SELECT 'correct_reviews', 0, COUNT(*) FROM word_review_items WHERE correct
+UNION ALL SELECT 'words_studied', 0, COUNT(*) FROM word_stats WHERE correct_count > 0;
+
+CREATE OR REPLACE FUNCTION add_table_count(counter TEXT, delta BIGINT) RETURNS void AS $$
+BEGIN
+    IF delta <> 0 THEN
+        INSERT INTO table_counts AS tc (name, shard, value)
+        VALUES (counter, pg_backend_pid() % 16, delta)
+        ON CONFLICT (name, shard) DO UPDATE SET value = tc.value + excluded.value;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- words, groups, study_sessions: rows inserted minus rows deleted
+CREATE OR REPLACE FUNCTION count_inserted_rows() RETURNS trigger AS $$
+BEGIN
+    PERFORM add_table_count(TG_TABLE_NAME, (SELECT COUNT(*) FROM new_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION count_deleted_rows() RETURNS trigger AS $$
+BEGIN
+    PERFORM add_table_count(TG_TABLE_NAME, -(SELECT COUNT(*) FROM old_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER words_count_insert
+AFTER INSERT ON words REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION count_inserted_rows();
+
+CREATE OR REPLACE TRIGGER words_count_delete
+AFTER DELETE ON words REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION count_deleted_rows();
+
+CREATE OR REPLACE TRIGGER groups_count_insert
+AFTER INSERT ON groups REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION count_inserted_rows();
+
+CREATE OR REPLACE TRIGGER groups_count_delete
+AFTER DELETE ON groups REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION count_deleted_rows();
+
+CREATE OR REPLACE TRIGGER study_sessions_count_insert
+AFTER INSERT ON study_sessions REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION count_inserted_rows();
+
+CREATE OR REPLACE TRIGGER study_sessions_count_delete
+AFTER DELETE ON study_sessions REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION count_deleted_rows();
+
+-- word_review_items: all reviews and the correct ones
+CREATE OR REPLACE FUNCTION word_review_items_counts() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM add_table_count('word_review_items', (SELECT COUNT(*) FROM new_rows));
+        PERFORM add_table_count('correct_reviews', (SELECT COUNT(*) FROM new_rows WHERE correct));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM add_table_count('word_review_items', -(SELECT COUNT(*) FROM old_rows));
+        PERFORM add_table_count('correct_reviews', -(SELECT COUNT(*) FROM old_rows WHERE correct));
+    ELSE
+        PERFORM add_table_count('correct_reviews',
+            (SELECT COUNT(*) FROM new_rows WHERE correct) - (SELECT COUNT(*) FROM old_rows WHERE correct));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER word_review_items_count_insert
+AFTER INSERT ON word_review_items REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION word_review_items_counts();
+
+CREATE OR REPLACE TRIGGER word_review_items_count_delete
+AFTER DELETE ON word_review_items REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION word_review_items_counts();
+
+CREATE OR REPLACE TRIGGER word_review_items_count_update
+AFTER UPDATE ON word_review_items REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION word_review_items_counts();
+
+-- word_stats: words whose correct_count is above zero (a deleted word's row
+-- goes with it through ON DELETE CASCADE, which fires the delete trigger)
+CREATE OR REPLACE FUNCTION word_stats_studied() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM add_table_count('words_studied', (SELECT COUNT(*) FROM new_rows WHERE correct_count > 0));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM add_table_count('words_studied', -(SELECT COUNT(*) FROM old_rows WHERE correct_count > 0));
+    ELSE
+        PERFORM add_table_count('words_studied',
+            (SELECT COUNT(*) FROM new_rows WHERE correct_count > 0)
+            - (SELECT COUNT(*) FROM old_rows WHERE correct_count > 0));
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE TRIGGER word_stats_studied_insert
+AFTER INSERT ON word_stats REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION word_stats_studied();
+
+CREATE OR REPLACE TRIGGER word_stats_studied_delete
+AFTER DELETE ON word_stats REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION word_stats_studied();
+
+CREATE OR REPLACE TRIGGER word_stats_studied_update
+AFTER UPDATE ON word_stats REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION word_stats_studied();
@@ -1,121 +1,361 @@
-import os
+"""
+Carga los datos semilla en la base de datos.
+
+Los ficheros se leen de forma incremental (JSON o JSONL) y cada tabla se inserta
+con `executemany` dentro de una única transacción. Los índices secundarios y los
+triggers se eliminan antes de la carga y se recrean al final, y los contadores
+derivados se recalculan una sola vez con `backfill_counters.rebuild_counters`.
+
+    python seed_data.py [--db words.db] [--seeds-dir seeds]
+"""
+
+import argparse
 import json
+import os
 import sqlite3
+import time
+
+from backfill_counters import rebuild_counters
 
 # Ruta del directorio donde se encuentran los archivos seed y la base de datos.
 SEEDS_DIR = os.path.join(os.path.dirname(__file__), 'seeds')
 DB_PATH = os.path.join(os.path.dirname(__file__), 'words.db')
 
-def run_seed():
-    conn = sqlite3.connect(DB_PATH)
+# Tamaño de los bloques leídos del fichero por el parser incremental
+CHUNK_SIZE = 1 << 20
+
+# Tamaño de los lotes enviados a executemany
+BATCH_SIZE = 10_000
+
+
+# ======================
+# Lectura incremental
+# ======================
+
+class JSONStream:
+    """
+    Lector incremental de un documento JSON.
+
+    Mantiene en memoria solo el bloque actual del fichero; `decode_value`
+    decodifica el siguiente valor completo y lee más bloques cuando hace falta.
+    """
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Devuelve el siguiente carácter que no sea espacio ('' al final)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Se esperaba {char!r} y se encontró {found!r}")
+        self.pos += 1
+
+    def decode_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # Un número al final del bloque puede estar cortado
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self):
+        """Itera los elementos de un array cuyo '[' es el siguiente carácter."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode_value()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+
+def iter_records(path, chunk_size=CHUNK_SIZE):
+    """
+    Itera los registros de un fichero semilla como pares (categoría, registro).
+
+    Admite JSONL (un objeto por línea, con la categoría opcional en el campo
+    "category"), un array JSON, o un objeto JSON cuyas claves son categorías y
+    cuyos valores son arrays de registros (el formato de `words.json`).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.get("category"), record
+            return
+
+        stream = JSONStream(f, chunk_size)
+        if stream.peek() == "[":
+            for record in stream.iter_array():
+                yield record.get("category"), record
+            return
+
+        stream.expect("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            category = stream.decode_value()
+            stream.expect(":")
+            for record in stream.iter_array():
+                yield category, record
+            if stream.peek() == ",":
+                stream.pos += 1
+                continue
+            stream.expect("}")
+            return
+
+
+def find_seed_file(seeds_dir, name):
+    """Devuelve `<name>.jsonl` o `<name>.json` dentro de `seeds_dir`, si existe."""
+    for extension in ('.jsonl', '.ndjson', '.json'):
+        path = os.path.join(seeds_dir, name + extension)
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def normalize_timestamp(value):
+    """Convierte '2025-02-15T15:00:00' al formato de CURRENT_TIMESTAMP."""
+    if value is None:
+        return None
+    return value.replace("T", " ")[:19]
+
+
+def batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ======================
+# Carga
+# ======================
+
+class LoadReport:
+    """Acumula filas y tiempo por tabla para informar de filas/segundo."""
+
+    def __init__(self):
+        self.tables = []
+
+    def insert(self, cursor, table, sql, rows):
+        start = time.perf_counter()
+        count = 0
+        for batch in batched(rows):
+            cursor.executemany(sql, batch)
+            # rowcount descuenta las filas filtradas por el propio INSERT ... SELECT
+            count += cursor.rowcount
+        elapsed = time.perf_counter() - start
+        self.tables.append((table, count, elapsed))
+        rate = count / elapsed if elapsed > 0 else 0
+        print(f"{table}: {count} filas en {elapsed:.2f}s ({rate:,.0f} filas/s)")
+        return count
+
+
+def drop_deferred_objects(cursor):
+    """
+    Elimina índices secundarios y triggers y devuelve su SQL para recrearlos.
+    Los índices automáticos (PRIMARY KEY, UNIQUE en línea) no tienen SQL y se quedan.
+    """
+    objects = cursor.execute("""
+        SELECT type, name, sql
+        FROM sqlite_master
+        WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+        ORDER BY type, name
+    """).fetchall()
+    for object_type, name, _ in objects:
+        cursor.execute(f"DROP {object_type.upper()} IF EXISTS {name}")
+    return [sql for _, _, sql in objects]
+
+
+def load_words(cursor, report, seeds_dir):
+    """
+    Inserta las palabras y, si el fichero está agrupado por categorías, crea un
+    grupo por categoría (o reutiliza el que tenga ese nombre) y sus enlaces.
+    """
+    words_file = find_seed_file(seeds_dir, 'words')
+    if not words_file:
+        return
+
+    group_ids = dict(cursor.execute("SELECT name, id FROM groups").fetchall())
+    next_word_id = (cursor.execute("SELECT MAX(id) FROM words").fetchone()[0] or 0) + 1
+    links = []
+
+    def rows():
+        nonlocal next_word_id
+        for category, word in iter_records(words_file):
+            word_id = word.get("id", next_word_id)
+            next_word_id = max(next_word_id, word_id) + 1
+            if category is not None:
+                if category not in group_ids:
+                    group_ids[category] = cursor.execute(
+                        "INSERT INTO groups (name) VALUES (?)", (category,)
+                    ).lastrowid
+                links.append((word_id, group_ids[category]))
+            yield (word_id, word.get("spanish"), word.get("english"), json.dumps(word.get("parts", {})))
+
+    report.insert(
+        cursor, "words",
+        "INSERT INTO words (id, spanish, english, parts) VALUES (?, ?, ?, ?)",
+        rows()
+    )
+    if links:
+        report.insert(
+            cursor, "word_groups (categorías)",
+            "INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)",
+            links
+        )
+
+
+def load_word_groups(cursor, report, seeds_dir):
+    """Inserta los enlaces explícitos, descartando los de palabras inexistentes."""
+    word_groups_file = find_seed_file(seeds_dir, 'word_groups')
+    if not word_groups_file:
+        return
+
+    report.insert(
+        cursor, "word_groups",
+        """INSERT INTO word_groups (word_id, group_id)
+           SELECT ?, ? WHERE EXISTS (SELECT 1 FROM words WHERE id = ?)""",
+        ((link["word_id"], link["group_id"], link["word_id"]) for _, link in iter_records(word_groups_file))
+    )
+    # Sin el índice único durante la carga pueden quedar enlaces repetidos
+    cursor.execute("""
+        DELETE FROM word_groups
+        WHERE rowid NOT IN (SELECT MIN(rowid) FROM word_groups GROUP BY group_id, word_id)
+    """)
+
+
+def run_seed(db_path=DB_PATH, seeds_dir=SEEDS_DIR):
+    conn = sqlite3.connect(db_path, isolation_level=None)
     cursor = conn.cursor()
+    cursor.execute("PRAGMA cache_size = -262144")
+    report = LoadReport()
+    start = time.perf_counter()
 
-    # Limpiar tablas existentes
-    cursor.execute("DELETE FROM word_review_items")
-    cursor.execute("DELETE FROM study_sessions")
-    cursor.execute("DELETE FROM study_activities")
-    cursor.execute("DELETE FROM word_groups")
-    cursor.execute("DELETE FROM words")
-    cursor.execute("DELETE FROM groups")
-    
-    # Reiniciar secuencias
-    cursor.execute("DELETE FROM sqlite_sequence")
-    
-    conn.commit()
-    print("Existing data cleaned successfully.")
-
-    # Seed words
-    seed_file = os.path.join(SEEDS_DIR, 'words.json')
-    if os.path.exists(seed_file):
-        with open(seed_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        for word in data:
-            spanish = word.get("spanish")
-            english = word.get("english")
-            parts = json.dumps(word.get("parts", {}))
-            cursor.execute(
-                "INSERT INTO words (spanish, english, parts) VALUES (?, ?, ?)",
-                (spanish, english, parts)
-            )
-        print("Words seed data inserted successfully.")
-    
-    # Seed groups
-    groups_file = os.path.join(SEEDS_DIR, 'groups.json')
-    if os.path.exists(groups_file):
-        with open(groups_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        for group in data:
-            cursor.execute(
-                "INSERT INTO groups (id, name, words_count) VALUES (?, ?, ?)",
-                (group["id"], group["name"], group["word_count"])
-            )
-        print("Groups seed data inserted successfully.")
-    
-    # Seed word_groups
-    word_groups_file = os.path.join(SEEDS_DIR, 'word_groups.json')
-    if os.path.exists(word_groups_file):
-        with open(word_groups_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        for word_group in data:
-            cursor.execute(
-                "INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)",
-                (word_group["word_id"], word_group["group_id"])
+    cursor.execute("BEGIN IMMEDIATE")
+    try:
+        deferred = drop_deferred_objects(cursor)
+
+        # Limpiar tablas existentes
+        for table in ("word_review_items", "word_stats", "study_sessions", "study_activities",
+                      "word_groups", "words", "groups"):
+            cursor.execute(f"DELETE FROM {table}")
+
+        # Reiniciar secuencias
+        cursor.execute("DELETE FROM sqlite_sequence")
+        print("Existing data cleaned successfully.")
+
+        # Seed groups (antes que las palabras para reutilizar sus nombres)
+        groups_file = find_seed_file(seeds_dir, 'groups')
+        if groups_file:
+            report.insert(
+                cursor, "groups",
+                "INSERT INTO groups (id, name) VALUES (?, ?)",
+                ((group["id"], group["name"]) for _, group in iter_records(groups_file))
             )
-        print("Word-groups relationships seed data inserted successfully.")
-
-    # Seed study_activities
-    study_activities_file = os.path.join(SEEDS_DIR, 'study_activities.json')
-    if os.path.exists(study_activities_file):
-        with open(study_activities_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        for activity in data:
-            cursor.execute(
-                """INSERT INTO study_activities 
-                   (id, name, thumbnail_url, description, launch_url) 
+
+        load_words(cursor, report, seeds_dir)
+        load_word_groups(cursor, report, seeds_dir)
+
+        study_activities_file = find_seed_file(seeds_dir, 'study_activities')
+        if study_activities_file:
+            report.insert(
+                cursor, "study_activities",
+                """INSERT INTO study_activities
+                   (id, name, thumbnail_url, description, launch_url)
                    VALUES (?, ?, ?, ?, ?)""",
-                (activity["id"], activity["name"], activity.get("thumbnail_url"),
-                 activity["description"], activity["launch_url"])
+                ((activity["id"], activity["name"], activity.get("thumbnail_url"),
+                  activity.get("description"), activity["launch_url"])
+                 for _, activity in iter_records(study_activities_file))
             )
-        print("Study activities seed data inserted successfully.")
-
-    # Seed study_sessions
-    study_sessions_file = os.path.join(SEEDS_DIR, 'study_sessions.json')
-    if os.path.exists(study_sessions_file):
-        with open(study_sessions_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        for session in data:
-            cursor.execute(
-                """INSERT INTO study_sessions 
-                   (id, group_id, study_activity_id, created_at, end_time) 
+
+        study_sessions_file = find_seed_file(seeds_dir, 'study_sessions')
+        if study_sessions_file:
+            report.insert(
+                cursor, "study_sessions",
+                """INSERT INTO study_sessions
+                   (id, group_id, study_activity_id, created_at, end_time)
                    VALUES (?, ?, ?, ?, ?)""",
-                (session["id"], session["group_id"], session["study_activity_id"],
-                 session["created_at"], session["end_time"])
+                ((session["id"], session["group_id"], session["study_activity_id"],
+                  normalize_timestamp(session.get("created_at")), normalize_timestamp(session.get("end_time")))
+                 for _, session in iter_records(study_sessions_file))
             )
-        print("Study sessions seed data inserted successfully.")
-
-    # Seed word_review_items
-    word_review_items_file = os.path.join(SEEDS_DIR, 'word_review_items.json')
-    if os.path.exists(word_review_items_file):
-        with open(word_review_items_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        for review in data:
-            cursor.execute(
-                """INSERT INTO word_review_items 
-                   (word_id, study_session_id, correct, created_at) 
+
+        word_review_items_file = find_seed_file(seeds_dir, 'word_review_items')
+        if word_review_items_file:
+            report.insert(
+                cursor, "word_review_items",
+                """INSERT INTO word_review_items
+                   (word_id, study_session_id, correct, created_at)
                    VALUES (?, ?, ?, ?)""",
-                (review["word_id"], review["study_session_id"],
-                 review["correct"], review["created_at"])
+                ((review["word_id"], review["study_session_id"], review["correct"],
+                  normalize_timestamp(review.get("created_at")))
+                 for _, review in iter_records(word_review_items_file))
             )
-        print("Word review items seed data inserted successfully.")
-    
-    conn.commit()
-    conn.close()
+
+        # Recrear índices y triggers, y recalcular lo que mantienen los triggers
+        index_start = time.perf_counter()
+        for sql in deferred:
+            cursor.execute(sql)
+        rebuild_counters(conn)
+        print(f"Índices, triggers y contadores recreados en {time.perf_counter() - index_start:.2f}s")
+
+        cursor.execute("COMMIT")
+    except Exception:
+        cursor.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    rows = sum(count for _, count, _ in report.tables)
+    print(f"Total: {rows} filas en {elapsed:.2f}s ({rows / elapsed if elapsed > 0 else 0:,.0f} filas/s)")
+    return report
+
 
 if __name__ == '__main__':
-    run_seed()
+    parser = argparse.ArgumentParser(description="Carga los datos semilla en la base de datos.")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--seeds-dir", default=SEEDS_DIR)
+    args = parser.parse_args()
+    run_seed(args.db, args.seeds_dir)
@@ -5,94 +5,141 @@ import sys
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
+import tempfile
+
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url, text
+
+# The suite runs against SQLite by default. TEST_DATABASE_BACKEND=postgresql
+# runs it against PostgreSQL instead: the server in TEST_POSTGRES_URL if set,
+# otherwise a throwaway local one started with the `pgserver` package.
+TEST_DATABASE_BACKEND = os.getenv("TEST_DATABASE_BACKEND", "sqlite")
+TEST_POSTGRES_DATABASE = "lang_portal_test"
+
+
+def postgres_server_url():
+    url = os.getenv("TEST_POSTGRES_URL")
+    if url:
+        return url
+    try:
+        import pgserver
+    except ImportError:
+        raise RuntimeError(
+            "TEST_DATABASE_BACKEND=postgresql needs TEST_POSTGRES_URL or the pgserver package"
+        )
+    server = pgserver.get_server(os.path.join(tempfile.gettempdir(), "lang-portal-pgdata"), cleanup_mode=None)
+    return server.get_uri()
+
+
+def create_postgres_database():
+    """Recreate the test database on the PostgreSQL server and return its URL."""
+    server_url = make_url(postgres_server_url())
+    admin = create_engine(server_url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.exec_driver_sql(f"DROP DATABASE IF EXISTS {TEST_POSTGRES_DATABASE} WITH (FORCE)")
+        conn.exec_driver_sql(f"CREATE DATABASE {TEST_POSTGRES_DATABASE}")
+    admin.dispose()
+    return server_url.set(database=TEST_POSTGRES_DATABASE).render_as_string(hide_password=False)
+
+
+# Point the application at the test database before it is imported, and build
+# that database from the SQL migrations so triggers and tables match production.
+from init_db import run_migrations, run_postgres_migrations
+
+if TEST_DATABASE_BACKEND == "sqlite":
+    TEST_DB_PATH = os.path.join(project_root, "test.db")
+    TEST_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
+    # With WAL on, the database is three files
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(TEST_DB_PATH + suffix):
+            os.remove(TEST_DB_PATH + suffix)
+    run_migrations(TEST_DB_PATH)
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
+elif TEST_DATABASE_BACKEND == "postgresql":
+    TEST_DB_PATH = None
+    TEST_DATABASE_URL = create_postgres_database()
+    run_postgres_migrations(TEST_DATABASE_URL, verbose=False)
+    engine = create_engine(TEST_DATABASE_URL)
+else:
+    raise RuntimeError(f"Unknown TEST_DATABASE_BACKEND: {TEST_DATABASE_BACKEND!r}")
+os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
 from sqlalchemy.orm import sessionmaker
-from app.models import Base, Word, Group, WordGroup, StudySession, WordReviewItem, StudyActivity
 from app.main import app
+from app import database as app_database
 from fastapi.testclient import TestClient
 from datetime import datetime
 
-# Create a test database
-TEST_DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def seed_test_data(db):
     """Seed the test database with initial data"""
-    # Create a group
-    group = Group(name="Test Group", words_count=2)
-    db.add(group)
-    db.commit()
+    now = datetime.now().isoformat(sep=" ", timespec="seconds")
+
+    # Create a group (words_count is kept by the word_groups triggers)
+    group_id = db.execute(
+        text("INSERT INTO groups (name) VALUES ('Test Group') RETURNING id")
+    ).scalar()
 
     # Create some words
-    words = [
-        Word(
-            spanish="hola", 
-            english="hello", 
-            correct_count=1,
-            wrong_count=0
-        ),
-        Word(
-            spanish="adiós", 
-            english="goodbye", 
-            correct_count=0,
-            wrong_count=1
-        )
+    word_ids = [
+        db.execute(
+            text("""
+                INSERT INTO words (spanish, english, parts)
+                VALUES (:spanish, :english, '{}')
+                RETURNING id
+            """),
+            {"spanish": spanish, "english": english}
+        ).scalar()
+        for spanish, english in [("hola", "hello"), ("adiós", "goodbye")]
     ]
-    db.add_all(words)
-    db.commit()
 
     # Link words to group
-    for word in words:
-        word_group = WordGroup(word_id=word.id, group_id=group.id)
-        db.add(word_group)
-    
+    for word_id in word_ids:
+        db.execute(
+            text("INSERT INTO word_groups (word_id, group_id) VALUES (:word_id, :group_id)"),
+            {"word_id": word_id, "group_id": group_id}
+        )
+
     # Create a study activity
-    study_activity = StudyActivity(
-        name="Test Vocabulary Quiz", 
-        thumbnail_url="http://example.com/thumbnail.png",
-        description="A test vocabulary quiz",
-        launch_url="http://example.com/quiz",
-        created_at=datetime.now()
-    )
-    db.add(study_activity)
-    
+    study_activity_id = db.execute(
+        text("""
+            INSERT INTO study_activities (name, thumbnail_url, description, launch_url)
+            VALUES ('Test Vocabulary Quiz', 'http://example.com/thumbnail.png',
+                    'A test vocabulary quiz', 'http://example.com/quiz')
+            RETURNING id
+        """)
+    ).scalar()
+
     # Create a study session
-    study_session = StudySession(
-        group_id=group.id, 
-        created_at=datetime.now(),
-        study_activity_id=study_activity.id,
-        correct_count=1,
-        incorrect_count=1,
-        total_items=2
-    )
-    db.add(study_session)
-    
-    # Create word review items
-    review_items = [
-        WordReviewItem(
-            word_id=words[0].id, 
-            study_session_id=study_session.id, 
-            correct=True, 
-            created_at=datetime.now()
-        ),
-        WordReviewItem(
-            word_id=words[1].id, 
-            study_session_id=study_session.id, 
-            correct=False, 
-            created_at=datetime.now()
+    study_session_id = db.execute(
+        text("""
+            INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+            VALUES (:group_id, :study_activity_id, :created_at)
+            RETURNING id
+        """),
+        {"group_id": group_id, "study_activity_id": study_activity_id, "created_at": now}
+    ).scalar()
+
+    # Create word review items (word_stats is filled in by the triggers)
+    for word_id, correct in zip(word_ids, [True, False]):
+        db.execute(
+            text("""
+                INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+                VALUES (:word_id, :study_session_id, :correct, :created_at)
+            """),
+            {
+                "word_id": word_id,
+                "study_session_id": study_session_id,
+                "correct": correct,
+                "created_at": now
+            }
         )
-    ]
-    db.add_all(review_items)
-    
+
     db.commit()
 
-@pytest.fixture(scope="session")
+@pytest.fixture(scope="session", autouse=True)
 def test_db():
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
-    
     # Create a database session
     db = TestingSessionLocal()
     try:
@@ -101,8 +148,34 @@ def test_db():
         yield db
     finally:
         db.close()
-        # Drop all tables after tests
-        Base.metadata.drop_all(bind=engine)
+        # Close every connection (the app's engines too) so SQLite checkpoints
+        # the WAL, then remove the test database and its -wal/-shm files
+        engine.dispose()
+        app_database.engine.dispose()
+        app_database.read_engine.dispose()
+        if TEST_DB_PATH:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(TEST_DB_PATH + suffix):
+                    os.remove(TEST_DB_PATH + suffix)
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "sqlite_only: test of SQLite-specific behaviour, skipped on other backends"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if TEST_DATABASE_BACKEND == "sqlite":
+        return
+    skip = pytest.mark.skip(reason=f"SQLite only (TEST_DATABASE_BACKEND={TEST_DATABASE_BACKEND})")
+    for item in items:
+        if "sqlite_only" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def db_path():
+    return TEST_DB_PATH
 
 @pytest.fixture(scope="module")
 def client():
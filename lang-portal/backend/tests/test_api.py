@@ -1,6 +1,11 @@
 from fastapi.testclient import TestClient
 from app.main import app
+import json
 import pytest
+from sqlalchemy import event, text
+
+from app.database import read_engine
+from app.routers.api import dashboard_cache
 
 def test_list_words(client):
     """Prueba el endpoint de listar palabras"""
@@ -35,6 +40,24 @@ def test_get_word(client):
     assert "correct_count" in word
     assert "wrong_count" in word
 
+def test_get_words_batch(client):
+    """Varias palabras por id en una petición, en el orden pedido y con los ids que faltan"""
+    response = client.post("/api/words/batch", json={"ids": [2, 999999, 1, 2]})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert [word["id"] for word in data["items"]] == [2, 1]
+    assert data["missing_ids"] == [999999]
+    # Los mismos contadores de repasos que /words/{id}
+    for word in data["items"]:
+        assert word == client.get(f"/api/words/{word['id']}").json()
+
+def test_get_words_batch_limits(client):
+    """Una lista vacía no consulta nada y una demasiado larga se rechaza"""
+    assert client.post("/api/words/batch", json={"ids": []}).json() == {"items": [], "missing_ids": []}
+    response = client.post("/api/words/batch", json={"ids": list(range(1, 5002))})
+    assert response.status_code == 422
+
 def test_get_words_by_group(client):
     """Prueba obtener palabras de un grupo"""
     # Asumiendo que existe al menos un grupo
@@ -101,3 +124,533 @@ def test_quick_stats(client):
     assert isinstance(data["total_study_sessions"], int)
     assert isinstance(data["total_active_groups"], int)
     assert isinstance(data["study_streak_days"], int)
+
+def test_dashboard_combines_the_three_payloads(client):
+    """GET /dashboard devuelve lo mismo que los tres endpoints, con una sola consulta"""
+    dashboard_cache.clear()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(read_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get("/api/dashboard")
+        combined = len(statements)
+        separate = {
+            name: client.get(f"/api/dashboard/{name}").json()
+            for name in ("last_study_session", "study_progress", "quick_stats")
+        }
+    finally:
+        event.remove(read_engine, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200
+    assert response.json() == separate
+    # Versiones de las tablas y la sentencia del dashboard, frente a 8 por separado
+    assert combined == 2
+    assert len(statements) - combined >= 3 * combined
+
+def test_word_counts_follow_review_writes(client, test_db):
+    """Los triggers mantienen word_stats al insertar y borrar repasos"""
+
+    before = client.get("/api/words/1").json()
+
+    review_id = test_db.execute(text("""
+        INSERT INTO word_review_items (word_id, study_session_id, correct)
+        VALUES (1, 1, TRUE)
+        RETURNING id
+    """)).scalar()
+    test_db.commit()
+
+    after_insert = client.get("/api/words/1").json()
+    assert after_insert["correct_count"] == before["correct_count"] + 1
+    assert after_insert["wrong_count"] == before["wrong_count"]
+
+    test_db.execute(text("UPDATE word_review_items SET correct = FALSE WHERE id = :id"), {"id": review_id})
+    test_db.commit()
+
+    after_update = client.get("/api/words/1").json()
+    assert after_update["correct_count"] == before["correct_count"]
+    assert after_update["wrong_count"] == before["wrong_count"] + 1
+
+    test_db.execute(text("DELETE FROM word_review_items WHERE id = :id"), {"id": review_id})
+    test_db.commit()
+
+    assert client.get("/api/words/1").json() == before
+
+def test_table_counts_follow_writes(test_db):
+    """Los triggers mantienen table_counts igual a contar las tablas"""
+    actual_counts = text("""
+        SELECT 'words', COUNT(*) FROM words
+        UNION ALL SELECT 'groups', COUNT(*) FROM groups
+        UNION ALL SELECT 'study_sessions', COUNT(*) FROM study_sessions
+        UNION ALL SELECT 'word_review_items', COUNT(*) FROM word_review_items
+        UNION ALL SELECT 'correct_reviews', COUNT(*) FROM word_review_items WHERE correct
+        UNION ALL SELECT 'words_studied', COUNT(*) FROM word_stats WHERE correct_count > 0
+    """)
+    stored_counts = text("SELECT name, SUM(value) FROM table_counts GROUP BY name")
+
+    def check():
+        test_db.commit()
+        assert dict(test_db.execute(stored_counts).all()) == dict(test_db.execute(actual_counts).all())
+
+    check()
+    word_id = test_db.execute(text(
+        "INSERT INTO words (spanish, english, parts) VALUES ('contar', 'count', '{}') RETURNING id"
+    )).scalar()
+    test_db.execute(text("""
+        INSERT INTO word_review_items (word_id, study_session_id, correct)
+        VALUES (:word_id, 1, FALSE), (:word_id, 1, FALSE)
+    """), {"word_id": word_id})
+    check()
+    test_db.execute(text("UPDATE word_review_items SET correct = TRUE WHERE word_id = :word_id"),
+                    {"word_id": word_id})
+    check()
+    test_db.execute(text("DELETE FROM word_review_items WHERE word_id = :word_id"), {"word_id": word_id})
+    test_db.execute(text("DELETE FROM words WHERE id = :word_id"), {"word_id": word_id})
+    check()
+
+@pytest.mark.sqlite_only
+def test_backfill_rebuilds_word_stats(client, db_path):
+    """El backfill reconstruye los contadores a partir del historial"""
+    import sqlite3
+    from backfill_counters import run_backfill
+
+    expected = client.get("/api/words").json()["items"]
+    expected_session = client.get("/api/study-sessions/1").json()
+
+    expected_dashboard = client.get("/api/dashboard").json()
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("UPDATE table_counts SET value = 99")
+        conn.execute("UPDATE word_stats SET correct_count = 99, wrong_count = 99")
+        conn.execute("UPDATE study_sessions SET correct_count = 99, incorrect_count = 99, total_items = 99")
+        run_backfill(conn)
+    finally:
+        conn.close()
+
+    assert client.get("/api/words").json()["items"] == expected
+    assert client.get("/api/study-sessions/1").json() == expected_session
+    # Las rachas sí cambian: los datos de prueba no pasan por study_daily_stats
+    dashboard = client.get("/api/dashboard").json()
+    assert dashboard["study_progress"] == expected_dashboard["study_progress"]
+    for key in ("success_rate", "total_study_sessions", "total_active_groups"):
+        assert dashboard["quick_stats"][key] == expected_dashboard["quick_stats"][key]
+
+def test_backfill_rejects_server_urls():
+    """El backfill es solo para SQLite: una URL de servidor falla antes de conectarse"""
+    from backfill_counters import sqlite_path
+
+    assert sqlite_path("sqlite:///./words.db") == "./words.db"
+    assert sqlite_path("words.db") == "words.db"
+    with pytest.raises(SystemExit):
+        sqlite_path("postgresql+psycopg://localhost/lang_portal")
+
+def test_words_cursor_pagination(client):
+    """Recorrer /words con cursor devuelve lo mismo que la paginación por offset"""
+    expected = [word["id"] for word in client.get("/api/words").json()["items"]]
+
+    seen = []
+    params = {"items_per_page": 1}
+    while True:
+        data = client.get("/api/words", params=params).json()
+        seen.extend(word["id"] for word in data["items"])
+        assert data["pagination"]["total_items"] == len(expected)
+        if not data["pagination"]["next_cursor"]:
+            break
+        params["cursor"] = data["pagination"]["next_cursor"]
+
+    assert seen == expected
+
+def test_study_session_words_cursor_pagination(client):
+    """El cursor (created_at, id) desempata repasos con la misma hora"""
+    expected = client.get("/api/study-sessions/1/words").json()["words"]
+
+    first = client.get("/api/study-sessions/1/words", params={"items_per_page": 1}).json()
+    cursor = first["pagination"]["next_cursor"]
+    second = client.get("/api/study-sessions/1/words", params={"items_per_page": 1, "cursor": cursor}).json()
+
+    assert first["words"] + second["words"] == expected
+    assert second["pagination"]["next_cursor"] is None
+
+def test_pagination_without_total(client):
+    """include_total=false omite el total y mantiene el cursor"""
+    data = client.get("/api/study-sessions", params={"include_total": False}).json()
+
+    assert data["pagination"]["total_items"] is None
+    assert data["pagination"]["total_pages"] is None
+    assert data["study_sessions"]
+
+def test_invalid_cursor(client):
+    """Un cursor mal formado devuelve 400"""
+    response = client.get("/api/words", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+def test_create_study_activity(client):
+    """Lanzar una actividad crea una sesión de estudio"""
+    response = client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["launch_url"] == "http://example.com/quiz"
+
+    session = client.get(f"/api/study-sessions/{data['id']}")
+    assert session.status_code == 200
+    assert session.json()["review_items_count"] == 0
+
+def test_create_study_activity_unknown_activity(client):
+    """Una actividad inexistente devuelve 404 y no deja la sesión creada"""
+    before = client.get("/api/study-sessions").json()["pagination"]["total_items"]
+
+    response = client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 999})
+    assert response.status_code == 404
+
+    assert client.get("/api/study-sessions").json()["pagination"]["total_items"] == before
+
+def test_create_study_session_reviews(client):
+    """Un lote de repasos se inserta de una vez y devuelve los totales de la sesión"""
+    session_id = client.post(
+        "/api/study-activities", json={"group_id": 1, "study_activity_id": 1}
+    ).json()["id"]
+    word_before = client.get("/api/words/2").json()
+
+    response = client.post(f"/api/study-sessions/{session_id}/reviews", json={"items": [
+        {"word_id": 1, "correct": True},
+        {"word_id": 2, "correct": False, "created_at": "2025-03-01T10:00:00+02:00"},
+        {"word_id": 2, "correct": True},
+    ]})
+    assert response.status_code == 200
+    assert response.json() == {
+        "study_session_id": session_id,
+        "inserted": 3,
+        "review_items_count": 3,
+        "correct_count": 2,
+        "incorrect_count": 1
+    }
+
+    word_after = client.get("/api/words/2").json()
+    assert word_after["correct_count"] == word_before["correct_count"] + 1
+    assert word_after["wrong_count"] == word_before["wrong_count"] + 1
+
+    words = client.get(f"/api/study-sessions/{session_id}/words").json()["words"]
+    assert words[0]["review_time"] == "2025-03-01 08:00:00"
+
+def test_create_study_session_reviews_unknown_word(client):
+    """Si alguna palabra no existe no se inserta nada y se informan los ids"""
+    response = client.post("/api/study-sessions/1/reviews", json={"items": [
+        {"word_id": 1, "correct": True},
+        {"word_id": 9999, "correct": True},
+    ]})
+    assert response.status_code == 422
+    assert response.json()["detail"]["word_ids"] == [9999]
+    assert client.get("/api/study-sessions/1").json()["review_items_count"] == 2
+
+def test_create_study_session_reviews_unknown_session(client):
+    response = client.post("/api/study-sessions/9999/reviews", json={"items": [
+        {"word_id": 1, "correct": True},
+    ]})
+    assert response.status_code == 404
+
+def test_session_summary_follows_review_writes(client, test_db):
+    """Los triggers mantienen el resumen de la sesión que leen todos los endpoints"""
+    session_id = client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1}).json()["id"]
+    client.post(f"/api/study-sessions/{session_id}/reviews", json={"items": [
+        {"word_id": 1, "correct": True},
+        {"word_id": 2, "correct": True},
+        {"word_id": 1, "correct": False},
+    ]})
+
+    detail = client.get(f"/api/study-sessions/{session_id}").json()
+    assert (detail["review_items_count"], detail["correct_count"], detail["incorrect_count"]) == (3, 2, 1)
+    listed = {s["id"]: s for s in client.get("/api/study-sessions").json()["study_sessions"]}
+    assert listed[session_id]["review_items_count"] == 3
+    last = client.get("/api/dashboard/last_study_session").json()
+    assert (last["id"], last["correct_count"], last["incorrect_count"], last["total_items"]) == (session_id, 2, 1, 3)
+
+    test_db.execute(text("UPDATE word_review_items SET correct = FALSE WHERE study_session_id = :id"), {"id": session_id})
+    test_db.commit()
+    detail = client.get(f"/api/study-sessions/{session_id}").json()
+    assert (detail["review_items_count"], detail["correct_count"], detail["incorrect_count"]) == (3, 0, 3)
+
+    test_db.execute(text("DELETE FROM word_review_items WHERE study_session_id = :id"), {"id": session_id})
+    test_db.commit()
+    detail = client.get(f"/api/study-sessions/{session_id}").json()
+    assert (detail["review_items_count"], detail["correct_count"], detail["incorrect_count"]) == (0, 0, 0)
+
+def test_finish_study_session(client):
+    """Finalizar una sesión fija su end_time una sola vez"""
+    session_id = client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1}).json()["id"]
+    assert client.get(f"/api/study-sessions/{session_id}").json()["end_time"] is None
+
+    response = client.post(f"/api/study-sessions/{session_id}/finish")
+    assert response.status_code == 200
+    end_time = response.json()["end_time"]
+    assert end_time is not None
+    assert client.get(f"/api/study-sessions/{session_id}").json()["end_time"] == end_time
+    assert client.post(f"/api/study-sessions/{session_id}/finish").json()["end_time"] == end_time
+
+    assert client.post("/api/study-sessions/9999/finish").status_code == 404
+
+def test_search_words_ignores_accents(client):
+    """La búsqueda no distingue acentos y encuentra por prefijo"""
+    response = client.get("/api/words/search?q=adios")
+    assert response.status_code == 200
+    assert [word["spanish"] for word in response.json()["items"]] == ["adiós"]
+
+    assert [word["english"] for word in client.get("/api/words/search?q=ADI").json()["items"]] == ["goodbye"]
+    assert [word["spanish"] for word in client.get("/api/words/search?q=hel").json()["items"]] == ["hola"]
+    assert client.get("/api/words/search?q=xyz").json()["items"] == []
+
+def test_search_words_quotes_fts_syntax(client):
+    """Los operadores de FTS5 en la búsqueda se tratan como texto"""
+    response = client.get('/api/words/search?q=hola" OR NEAR(*')
+    assert response.status_code == 200
+    assert response.json()["items"] == []
+
+    response = client.get('/api/words/search?q="*')
+    assert response.status_code == 200
+    assert response.json()["pagination"]["total_items"] == 0
+    # Sin términos se responde igual que cualquier otra búsqueda
+    assert response.json()["pagination"].keys() == client.get("/api/words/search?q=hola").json()["pagination"].keys()
+
+def test_search_words_follows_updates(client, test_db):
+    """Los triggers mantienen el índice al insertar, editar y borrar palabras"""
+    word_id = test_db.execute(text(
+        "INSERT INTO words (spanish, english, parts) VALUES ('ratón', 'mouse', '{}') RETURNING id"
+    )).scalar()
+    test_db.commit()
+    try:
+        assert [word["id"] for word in client.get("/api/words/search?q=raton").json()["items"]] == [word_id]
+
+        test_db.execute(text("UPDATE words SET english = 'computer mouse' WHERE id = :id"), {"id": word_id})
+        test_db.commit()
+        assert [word["id"] for word in client.get("/api/words/search?q=computer").json()["items"]] == [word_id]
+    finally:
+        test_db.execute(text("DELETE FROM words WHERE id = :id"), {"id": word_id})
+        test_db.commit()
+
+    assert client.get("/api/words/search?q=raton").json()["items"] == []
+
+def test_search_words_cursor_pagination(client, test_db):
+    """El cursor recorre todos los resultados por relevancia sin repetir"""
+    test_db.execute(text("""
+        INSERT INTO words (spanish, english, parts)
+        VALUES ('casa', 'house', '{}'), ('casado', 'married', '{}'),
+               ('casa grande', 'big house', '{}'), ('cascada', 'waterfall', '{}')
+    """))
+    test_db.commit()
+    try:
+        first = client.get("/api/words/search?q=cas&items_per_page=3").json()
+        assert first["pagination"]["total_items"] == 4
+        assert len(first["items"]) == 3
+        cursor = first["pagination"]["next_cursor"]
+
+        second = client.get(f"/api/words/search?q=cas&items_per_page=3&cursor={cursor}").json()
+        assert second["pagination"]["next_cursor"] is None
+
+        ids = [word["id"] for word in first["items"] + second["items"]]
+        assert len(set(ids)) == 4
+
+        # bm25 pondera por longitud: la coincidencia más corta va primero
+        ranked = client.get("/api/words/search?q=house").json()["items"]
+        assert [word["spanish"] for word in ranked] == ["casa", "casa grande"]
+    finally:
+        test_db.execute(text("DELETE FROM words WHERE spanish IN ('casa', 'casado', 'casa grande', 'cascada')"))
+        test_db.commit()
+
+def test_search_words_broad_prefix_uses_id_order(client, test_db, monkeypatch):
+    """Con más coincidencias que SEARCH_RANKED_MATCHES se pagina por id"""
+    monkeypatch.setattr("app.routers.api.SEARCH_RANKED_MATCHES", 2)
+    test_db.execute(text("""
+        INSERT INTO words (spanish, english, parts)
+        VALUES ('perro', 'dog', '{}'), ('pera', 'pear', '{}'), ('perla', 'pearl', '{}')
+    """))
+    test_db.commit()
+    try:
+        first = client.get("/api/words/search?q=pe&items_per_page=2").json()
+        second = client.get(
+            f"/api/words/search?q=pe&items_per_page=2&cursor={first['pagination']['next_cursor']}"
+        ).json()
+        ids = [word["id"] for word in first["items"] + second["items"]]
+        assert ids == sorted(ids) and len(ids) == 3
+        assert second["pagination"]["next_cursor"] is None
+    finally:
+        test_db.execute(text("DELETE FROM words WHERE spanish IN ('perro', 'pera', 'perla')"))
+        test_db.commit()
+
+@pytest.mark.parametrize("path, model, key", [
+    ("/api/words", "WordsResponse", "items"),
+    ("/api/words/search?q=hola", "WordsResponse", "items"),
+    ("/api/groups", "GroupsResponse", "groups"),
+    ("/api/groups/1/words", "WordsResponse", "items"),
+    ("/api/study-activities", "StudyActivitiesResponse", "study_activities"),
+    ("/api/study-activities/1/study-sessions", "StudySessionsResponse", "study_sessions"),
+    ("/api/groups/1/study-sessions", "StudySessionsResponse", "study_sessions"),
+    ("/api/study-sessions", "StudySessionsResponse", "study_sessions"),
+    ("/api/study-sessions/1/words", "WordReviewResponse", "words"),
+])
+def test_list_responses_match_response_model(client, path, model, key):
+    """Los listados sin validar siguen cumpliendo exactamente su response_model"""
+    from app.routers import api
+
+    response_model = getattr(api, model)
+    data = client.get(path).json()
+    assert data[key]
+
+    # Validar no cambia nada: ni tipos (bool frente a 0/1) ni claves sobrantes
+    assert response_model.model_validate(data).model_dump_json() == json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def test_group_words_count_follows_links(client, test_db):
+    """Los triggers de word_groups mantienen groups.words_count exacto"""
+    assert client.get("/api/groups/1").json()["word_count"] == 2
+
+    group_id = test_db.execute(text("INSERT INTO groups (name) VALUES ('Otro') RETURNING id")).scalar()
+    word_id = test_db.execute(text(
+        "INSERT INTO words (spanish, english, parts) VALUES ('gato', 'cat', '{}') RETURNING id"
+    )).scalar()
+    test_db.execute(text("INSERT INTO word_groups (word_id, group_id) VALUES (:w, :g)"), {"w": word_id, "g": group_id})
+    test_db.commit()
+    try:
+        assert client.get(f"/api/groups/{group_id}").json()["word_count"] == 1
+
+        test_db.execute(text("UPDATE word_groups SET group_id = 1 WHERE word_id = :w"), {"w": word_id})
+        test_db.commit()
+        assert client.get(f"/api/groups/{group_id}").json()["word_count"] == 0
+        assert client.get("/api/groups/1").json()["word_count"] == 3
+    finally:
+        test_db.execute(text("DELETE FROM word_groups WHERE word_id = :w"), {"w": word_id})
+        test_db.execute(text("DELETE FROM words WHERE id = :w"), {"w": word_id})
+        test_db.execute(text("DELETE FROM groups WHERE id = :g"), {"g": group_id})
+        test_db.commit()
+
+    assert client.get("/api/groups/1").json()["word_count"] == 2
+
+def test_list_groups_sorting_and_cursor(client, test_db):
+    """El listado de grupos ordena por nombre o tamaño y pagina por cursor"""
+    ids = []
+    for name, words in [("Animales", 1), ("Colores", 2), ("Bebidas", 0)]:
+        group_id = test_db.execute(text("INSERT INTO groups (name) VALUES (:name) RETURNING id"), {"name": name}).scalar()
+        ids.append(group_id)
+        for word_id in (1, 2)[:words]:
+            test_db.execute(text("INSERT INTO word_groups (word_id, group_id) VALUES (:w, :g)"), {"w": word_id, "g": group_id})
+    test_db.commit()
+    try:
+        data = client.get("/api/groups").json()
+        assert [group["name"] for group in data["groups"]] == ["Animales", "Bebidas", "Colores", "Test Group"]
+        assert data["pagination"]["total_items"] == 4
+
+        by_size = client.get("/api/groups?sort_by=words_count&order=desc").json()["groups"]
+        assert [group["word_count"] for group in by_size] == [2, 2, 1, 0]
+        # Los empates se deshacen por id, en el mismo sentido
+        assert [group["name"] for group in by_size[:2]] == ["Colores", "Test Group"]
+
+        names = []
+        path = "/api/groups?sort_by=words_count&order=desc&items_per_page=3"
+        while path:
+            page = client.get(path).json()
+            names += [group["name"] for group in page["groups"]]
+            cursor = page["pagination"]["next_cursor"]
+            path = f"/api/groups?sort_by=words_count&order=desc&items_per_page=3&cursor={cursor}" if cursor else None
+        assert names == [group["name"] for group in by_size]
+
+        filtered = client.get("/api/groups?min_words=2").json()
+        assert [group["name"] for group in filtered["groups"]] == ["Colores", "Test Group"]
+        assert filtered["pagination"]["total_items"] == 2
+
+        assert client.get("/api/groups?sort_by=size").status_code == 422
+    finally:
+        test_db.execute(text("DELETE FROM word_groups WHERE group_id != 1"))
+        test_db.execute(text("DELETE FROM groups WHERE id != 1"))
+        test_db.commit()
+
+def test_due_words_follow_reviews(client, test_db):
+    """La cola de repaso de un grupo refleja el estado SM-2 tras cada repaso"""
+    group_id = test_db.execute(text("INSERT INTO groups (name) VALUES ('Repaso') RETURNING id")).scalar()
+    word_ids = [
+        test_db.execute(text(
+            "INSERT INTO words (spanish, english, parts) VALUES (:s, :e, '{}') RETURNING id"
+        ), {"s": spanish, "e": english}).scalar()
+        for spanish, english in [("perro", "dog"), ("gato", "cat")]
+    ]
+    for word_id in word_ids:
+        test_db.execute(text("INSERT INTO word_groups (word_id, group_id) VALUES (:w, :g)"), {"w": word_id, "g": group_id})
+    test_db.commit()
+    try:
+        # Las palabras nuevas están pendientes desde que se añaden al grupo
+        due = client.get(f"/api/groups/{group_id}/due-words").json()
+        assert sorted(word["id"] for word in due["items"]) == word_ids
+        assert all(word["repetitions"] == 0 and word["last_reviewed_at"] is None for word in due["items"])
+
+        session_id = client.post(
+            "/api/study-activities", json={"group_id": group_id, "study_activity_id": 1}
+        ).json()["id"]
+        client.post(f"/api/study-sessions/{session_id}/reviews", json={"items": [
+            {"word_id": word_ids[0], "correct": True},
+            # Repaso ajeno al grupo: no crea estado
+            {"word_id": 1, "correct": True},
+        ]})
+
+        due = client.get(f"/api/groups/{group_id}/due-words").json()["items"]
+        assert [word["id"] for word in due] == [word_ids[1]]
+
+        state = test_db.execute(text("""
+            SELECT interval_days, repetitions, next_review_at > last_reviewed_at AS scheduled
+            FROM word_schedules WHERE group_id = :g AND word_id = :w
+        """), {"g": group_id, "w": word_ids[0]}).one()
+        assert tuple(state) == (1, 1, 1)
+        assert test_db.execute(
+            text("SELECT COUNT(*) FROM word_schedules WHERE group_id = :g"), {"g": group_id}
+        ).scalar() == 2
+
+        assert client.get(f"/api/groups/{group_id}/due-words?limit=0").status_code == 422
+    finally:
+        test_db.execute(text("DELETE FROM word_review_items WHERE study_session_id IN (SELECT id FROM study_sessions WHERE group_id = :g)"), {"g": group_id})
+        test_db.execute(text("DELETE FROM study_sessions WHERE group_id = :g"), {"g": group_id})
+        test_db.execute(text("DELETE FROM word_groups WHERE group_id = :g"), {"g": group_id})
+        test_db.execute(text("DELETE FROM words WHERE id IN (:a, :b)"), {"a": word_ids[0], "b": word_ids[1]})
+        test_db.execute(text("DELETE FROM groups WHERE id = :g"), {"g": group_id})
+        test_db.commit()
+
+    assert test_db.execute(text("SELECT COUNT(*) FROM word_schedules WHERE group_id = :g"), {"g": group_id}).scalar() == 0
+
+def test_backdated_review_replays_the_schedule(client, test_db):
+    """Un repaso con fecha anterior al último no mueve el próximo repaso hacia atrás: se rehace el historial"""
+    from app.scheduler import ScheduleState, schedule_review
+
+    group_id = test_db.execute(text("INSERT INTO groups (name) VALUES ('Atrasado') RETURNING id")).scalar()
+    word_id = test_db.execute(text(
+        "INSERT INTO words (spanish, english, parts) VALUES ('pato', 'duck', '{}') RETURNING id"
+    )).scalar()
+    test_db.execute(text("INSERT INTO word_groups (word_id, group_id) VALUES (:w, :g)"), {"w": word_id, "g": group_id})
+    test_db.commit()
+    try:
+        session_id = client.post(
+            "/api/study-activities", json={"group_id": group_id, "study_activity_id": 1}
+        ).json()["id"]
+        history = [(True, "2025-03-10 10:00:00"), (True, "2025-03-11 10:00:00"), (False, "2025-03-05 10:00:00")]
+        for correct, reviewed_at in history:
+            response = client.post(f"/api/study-sessions/{session_id}/reviews", json={"items": [
+                {"word_id": word_id, "correct": correct, "created_at": reviewed_at.replace(" ", "T") + "Z"},
+            ]})
+            assert response.status_code == 200
+
+        expected = ScheduleState()
+        for correct, reviewed_at in sorted(history, key=lambda review: review[1]):
+            expected = schedule_review(expected, correct, reviewed_at)
+        state = test_db.execute(text("""
+            SELECT ease, interval_days, repetitions, next_review_at, last_reviewed_at
+            FROM word_schedules WHERE group_id = :g AND word_id = :w
+        """), {"g": group_id, "w": word_id}).one()
+        assert ScheduleState(*state) == expected
+        assert expected.last_reviewed_at == "2025-03-11 10:00:00"
+        assert expected.next_review_at == "2025-03-17 10:00:00"
+    finally:
+        test_db.execute(text("DELETE FROM word_review_items WHERE study_session_id IN (SELECT id FROM study_sessions WHERE group_id = :g)"), {"g": group_id})
+        test_db.execute(text("DELETE FROM study_sessions WHERE group_id = :g"), {"g": group_id})
+        test_db.execute(text("DELETE FROM word_groups WHERE group_id = :g"), {"g": group_id})
+        test_db.execute(text("DELETE FROM words WHERE id = :w"), {"w": word_id})
+        test_db.execute(text("DELETE FROM groups WHERE id = :g"), {"g": group_id})
+        test_db.commit()
+
+def test_due_words_unknown_group(client):
+    assert client.get("/api/groups/9999/due-words").status_code == 404
@@ -0,0 +1,61 @@
+from sqlalchemy import text
+
+from app.cache import VersionedCache
+from app.routers.api import dashboard_cache
+
+
+def test_dashboard_cache_hits_until_write(client, test_db):
+    """Los agregados del dashboard se sirven de caché hasta la siguiente escritura"""
+    dashboard_cache.clear()
+
+    first = client.get("/api/dashboard/quick_stats").json()
+    second = client.get("/api/dashboard/quick_stats").json()
+    assert first == second
+    assert client.get("/api/dashboard/cache_stats").json()["hits"] == 1
+
+    test_db.execute(text("""
+        INSERT INTO study_sessions (group_id, study_activity_id, created_at)
+        VALUES (1, 1, CURRENT_TIMESTAMP)
+    """))
+    test_db.commit()
+    try:
+        after_write = client.get("/api/dashboard/quick_stats").json()
+        assert after_write["total_study_sessions"] == first["total_study_sessions"] + 1
+
+        stats = client.get("/api/dashboard/cache_stats").json()
+        assert stats == {"hits": 1, "misses": 2, "entries": 1}
+    finally:
+        test_db.execute(text("DELETE FROM study_sessions WHERE id > 1"))
+        test_db.commit()
+
+
+def test_dashboard_cache_ignores_unrelated_tables(client, test_db):
+    """Escribir en una tabla de la que no depende el agregado no lo invalida"""
+    dashboard_cache.clear()
+
+    client.get("/api/dashboard/study_progress")
+    test_db.execute(text("UPDATE study_activities SET description = description WHERE id = 1"))
+    test_db.commit()
+    client.get("/api/dashboard/study_progress")
+
+    assert client.get("/api/dashboard/cache_stats").json()["hits"] == 1
+
+
+def test_versioned_cache_evicts_least_recently_used(test_db):
+    """Al superar el tamaño se descarta la entrada usada hace más tiempo (p. ej. la de ayer)"""
+    cache = VersionedCache(size=2)
+    computed = []
+
+    def compute(key):
+        computed.append(key)
+        return key
+
+    for key in (("quick_stats", "yesterday"), ("quick_stats", "today")):
+        cache.get_or_compute(test_db, key, ["study_sessions"], lambda: compute(key))
+    cache.get_or_compute(test_db, ("quick_stats", "today"), ["study_sessions"], lambda: compute("again"))
+    cache.get_or_compute(test_db, "study_progress", ["words"], lambda: compute("study_progress"))
+
+    assert cache.stats() == {"hits": 1, "misses": 3, "entries": 2}
+    cache.get_or_compute(test_db, ("quick_stats", "today"), ["study_sessions"], lambda: compute("again"))
+    cache.get_or_compute(test_db, ("quick_stats", "yesterday"), ["study_sessions"], lambda: compute("again"))
+    assert computed == [("quick_stats", "yesterday"), ("quick_stats", "today"), "study_progress", "again"]
@@ -0,0 +1,114 @@
+from datetime import timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+
+from sqlalchemy import event, text
+
+from app.database import read_engine
+
+
+def count_statements(client, path, headers):
+    """Ejecuta `path` y devuelve la respuesta y las sentencias SQL emitidas."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(read_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(path, headers=headers)
+    finally:
+        event.remove(read_engine, "before_cursor_execute", before_cursor_execute)
+    return response, statements
+
+
+def test_etag_returns_304_with_only_a_version_lookup(client):
+    """Un If-None-Match vigente se responde con 304 sin ejecutar la consulta"""
+    for path in ("/api/words", "/api/groups/1", "/api/groups/1/words"):
+        first = client.get(path)
+        assert first.status_code == 200
+        etag = first.headers["etag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+        assert "last-modified" in first.headers
+
+        response, statements = count_statements(client, path, {"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert len(statements) == 1 and "table_versions" in statements[0]
+
+
+def test_etag_depends_on_url(client):
+    """Cada página y cada grupo tienen su propio ETag"""
+    etags = {
+        client.get(path).headers["etag"]
+        for path in ("/api/words", "/api/words?items_per_page=1", "/api/groups/1/words", "/api/groups/2/words")
+    }
+    assert len(etags) == 4
+
+
+def test_etag_changes_after_write(client, test_db):
+    """Una escritura en una tabla de la que depende la respuesta cambia el ETag"""
+    etag = client.get("/api/words").headers["etag"]
+    group_etag = client.get("/api/groups/1").headers["etag"]
+
+    review_id = test_db.execute(text("""
+        INSERT INTO word_review_items (word_id, study_session_id, correct)
+        VALUES (1, 1, TRUE)
+        RETURNING id
+    """)).scalar()
+    test_db.commit()
+    try:
+        response = client.get("/api/words", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+        # Los repasos no afectan al grupo
+        assert client.get("/api/groups/1", headers={"If-None-Match": group_etag}).status_code == 304
+    finally:
+        test_db.execute(text("DELETE FROM word_review_items WHERE id = :id"), {"id": review_id})
+        test_db.commit()
+
+
+def test_if_modified_since(client):
+    """Sin If-None-Match se usa If-Modified-Since; solo una fecha posterior a la última escritura da 304"""
+    last_modified = client.get("/api/groups/1/words").headers["last-modified"]
+    later = format_datetime(parsedate_to_datetime(last_modified) + timedelta(seconds=1), usegmt=True)
+
+    assert client.get("/api/groups/1/words", headers={"If-Modified-Since": later}).status_code == 304
+    # En el mismo segundo pudo haber otra escritura: no se puede validar
+    assert client.get("/api/groups/1/words", headers={"If-Modified-Since": last_modified}).status_code == 200
+    assert client.get(
+        "/api/groups/1/words", headers={"If-Modified-Since": "Thu, 01 Jan 1970 00:00:00 GMT"}
+    ).status_code == 200
+    assert client.get("/api/groups/1/words", headers={"If-Modified-Since": "not a date"}).status_code == 200
+
+    # If-None-Match tiene prioridad
+    assert client.get(
+        "/api/groups/1/words", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    ).status_code == 200
+
+
+def test_if_modified_since_with_two_writes_in_the_same_second(client, test_db):
+    """Una segunda escritura en el mismo segundo que la copia del cliente no da un 304 con datos viejos"""
+    first = client.get("/api/groups/1")
+    last_modified = first.headers["last-modified"]
+    updated_at = test_db.execute(
+        text("SELECT updated_at FROM table_versions WHERE table_name = 'groups'")
+    ).scalar()
+
+    test_db.execute(text("UPDATE groups SET name = name || '!' WHERE id = 1"))
+    test_db.commit()
+    # La escritura cae en el mismo segundo que la anterior (en otra transacción:
+    # en PostgreSQL el trigger de table_versions se ejecuta al hacer commit)
+    test_db.execute(text("UPDATE table_versions SET updated_at = :updated_at WHERE table_name = 'groups'"),
+                    {"updated_at": updated_at})
+    test_db.commit()
+    try:
+        response = client.get("/api/groups/1", headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 200
+        assert response.headers["last-modified"] == last_modified
+        assert response.headers["etag"] != first.headers["etag"]
+        assert response.json()["name"] == first.json()["name"] + "!"
+    finally:
+        test_db.execute(text("UPDATE groups SET name = rtrim(name, '!') WHERE id = 1"))
+        test_db.commit()
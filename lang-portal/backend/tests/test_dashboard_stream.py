@@ -0,0 +1,144 @@
+import asyncio
+
+import httpx
+import orjson
+import pytest
+
+from app import database
+from app.dashboard_stream import DashboardStreams, diff
+from app.main import app
+from app.routers import api
+
+
+@pytest.fixture
+def streams(monkeypatch):
+    """Broadcasters nuevos que sondean cada 20 ms."""
+    streams = DashboardStreams(poll_ms=20)
+    monkeypatch.setattr(api, "dashboard_streams", streams)
+    return streams
+
+
+class Stream:
+    """
+    Una conexión a /api/dashboard/stream llamando a la aplicación ASGI a mano:
+    TestClient y ASGITransport esperan al cuerpo completo de la respuesta.
+    """
+
+    def __init__(self):
+        self.events = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.status = None
+        self._buffer = b""
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body":
+            self._buffer += message.get("body", b"")
+            while b"\n\n" in self._buffer:
+                chunk, self._buffer = self._buffer.split(b"\n\n", 1)
+                fields = dict(line.split(b": ", 1) for line in chunk.split(b"\n") if not line.startswith(b":"))
+                if fields:
+                    self.events.put_nowait((fields[b"event"].decode(), orjson.loads(fields[b"data"])))
+
+    async def __aenter__(self):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/api/dashboard/stream", "raw_path": b"/api/dashboard/stream",
+            "query_string": b"", "root_path": "", "headers": [(b"host", b"test")],
+            "client": ("test", 1), "server": ("test", 80),
+        }
+        self._task = asyncio.create_task(app(scope, self.receive, self.send))
+        return self
+
+    async def __aexit__(self, *exc):
+        self.disconnected.set()
+        await asyncio.wait_for(self._task, 5)
+
+    async def next_event(self):
+        return await asyncio.wait_for(self.events.get(), 5)
+
+
+async def new_session():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1})
+        assert response.status_code == 200
+        return response.json()["id"]
+
+
+def test_diff_keeps_only_changed_fields():
+    """La diferencia solo lleva las claves que cambian, también dentro de diccionarios"""
+    old = {"a": {"x": 1, "y": 2}, "b": 3, "c": None}
+    assert diff(old, old) is None
+    assert diff(old, {"a": {"x": 1, "y": 5}, "b": 3, "c": None}) == {"a": {"y": 5}}
+    assert diff(old, {"a": {"x": 1, "y": 2}, "b": 3, "c": {"z": 1}}) == {"c": {"z": 1}}
+    assert diff({"a": 1}, {"a": None}) == {"a": None}
+
+
+def test_stream_sends_snapshot_then_deltas(streams):
+    """Primero el dashboard completo; tras una escritura, solo lo que ha cambiado"""
+    async def scenario():
+        async with Stream() as stream:
+            event, snapshot = await stream.next_event()
+            assert stream.status == 200
+            assert event == "snapshot"
+            assert set(snapshot) == {"last_study_session", "study_progress", "quick_stats"}
+
+            session_id = await new_session()
+            event, delta = await stream.next_event()
+            assert event == "delta"
+            assert delta["last_study_session"]["id"] == session_id
+            assert delta["quick_stats"]["total_study_sessions"] == snapshot["quick_stats"]["total_study_sessions"] + 1
+            assert "study_progress" not in delta
+
+    asyncio.run(scenario())
+
+
+def test_subscribers_share_one_computation(streams):
+    """Todos los clientes reciben el mismo delta de un único cálculo por cambio"""
+    async def scenario():
+        async with Stream() as first, Stream() as second, Stream() as third:
+            for stream in (first, second, third):
+                assert (await stream.next_event())[0] == "snapshot"
+            broadcaster = api.dashboard_streams.get(None, None)
+            assert len(broadcaster.subscribers) == 3
+            computations = broadcaster.computations
+
+            await new_session()
+            deltas = [await stream.next_event() for stream in (first, second, third)]
+            assert deltas[0][0] == "delta"
+            assert deltas[0] == deltas[1] == deltas[2]
+
+            # Sin más escrituras, los sondeos siguientes no vuelven a calcular nada
+            await asyncio.sleep(0.1)
+            assert broadcaster.computations == computations + 1
+
+        assert not broadcaster.subscribers
+        assert broadcaster._task is None
+        assert not streams.open_learners()
+
+    asyncio.run(scenario())
+
+
+def test_broadcaster_is_dropped_with_its_last_client(streams):
+    """Al desconectarse el último cliente de un alumno su broadcaster se detiene y se descarta"""
+    async def scenario():
+        for learner_id in ("ana", "luis", "marta"):
+            token = database.current_learner.set(learner_id)
+            try:
+                events = streams.events(lambda: 0, lambda: {"learner": learner_id})
+                assert b"event: snapshot" in await events.__anext__()
+                broadcaster = streams.get(None, None)
+                assert streams.open_learners() == {learner_id}
+                await events.aclose()
+            finally:
+                database.current_learner.reset(token)
+            assert broadcaster._task is None
+        assert not streams.open_learners()
+
+    asyncio.run(scenario())
@@ -0,0 +1,144 @@
+import asyncio
+import contextvars
+import threading
+
+from app.database import run_in_db_thread
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_run_in_db_thread_leaves_event_loop():
+    """Las llamadas bloqueantes se ejecutan en el pool de hilos de la base de datos"""
+    async def main():
+        loop_thread = threading.current_thread()
+        worker_thread = await run_in_db_thread(threading.current_thread)
+        return loop_thread, worker_thread
+
+    loop_thread, worker_thread = asyncio.run(main())
+    assert worker_thread is not loop_thread
+    assert worker_thread.name.startswith("db")
+
+
+def test_run_in_db_thread_propagates_context():
+    """Las variables de contexto de la petición llegan al hilo de trabajo"""
+    async def main():
+        request_id.set("abc")
+        return await run_in_db_thread(request_id.get)
+
+    assert asyncio.run(main()) == "abc"
+
+
+def test_mixed_read_write_load_has_no_lock_errors(tmp_path):
+    """Varios escritores (como varios workers) y lectores concurrentes sin "database is locked" """
+    import contextlib
+    import io
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from sqlalchemy.orm import sessionmaker
+    from app.database import create_read_engine, create_write_engine
+    from init_db import run_migrations
+
+    db_path = str(tmp_path / "load.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_migrations(db_path)
+    url = f"sqlite:///{db_path}"
+
+    # Each writer engine stands in for a separate uvicorn worker process
+    writers = [sessionmaker(bind=create_write_engine(url)) for _ in range(3)]
+    reader = sessionmaker(bind=create_read_engine(url))
+
+    with writers[0].begin() as db:
+        db.execute(text("INSERT INTO words (id, spanish, english, parts) VALUES (1, 'hola', 'hello', '{}')"))
+        db.execute(text("INSERT INTO groups (id, name) VALUES (1, 'Load')"))
+        db.execute(text("INSERT INTO study_activities (id, name, launch_url) VALUES (1, 'Load', '/load')"))
+        db.execute(text("INSERT INTO study_sessions (id, group_id, study_activity_id) VALUES (1, 1, 1)"))
+
+    errors = []
+    transactions, reviews_per_transaction = 40, 5
+
+    def write(make_session):
+        try:
+            for _ in range(transactions):
+                with make_session.begin() as db:
+                    for _ in range(reviews_per_transaction):
+                        db.execute(text("""
+                            INSERT INTO word_review_items (word_id, study_session_id, correct)
+                            VALUES (1, 1, 1)
+                        """))
+        except OperationalError as exc:
+            errors.append(exc)
+
+    def read():
+        try:
+            for _ in range(100):
+                with reader() as db:
+                    db.execute(text("""
+                        SELECT COUNT(*) FROM word_review_items wri
+                        JOIN word_stats ws ON ws.word_id = wri.word_id
+                    """)).scalar()
+        except OperationalError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=write, args=(writer,)) for writer in writers]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with reader() as db:
+        total = db.execute(text("SELECT correct_count FROM word_stats WHERE word_id = 1")).scalar()
+        journal_mode = db.execute(text("PRAGMA journal_mode")).scalar()
+    assert total == len(writers) * transactions * reviews_per_transaction
+    assert journal_mode == "wal"
+
+
+def test_read_engine_is_read_only(tmp_path):
+    """El pool de lectura no puede escribir"""
+    import pytest
+    from sqlalchemy import text
+    from sqlalchemy.exc import OperationalError
+    from app.database import create_read_engine
+
+    read_engine = create_read_engine(f"sqlite:///{tmp_path / 'ro.db'}")
+    with read_engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("CREATE TABLE t (id INTEGER)"))
+
+
+def test_migrations_add_session_summary_to_existing_database(tmp_path):
+    """Una base creada antes de la migración 0013 recibe las columnas del resumen, ya rellenas"""
+    import contextlib
+    import io
+    import os
+    import sqlite3
+    from init_db import MIGRATIONS_DIR, execute_sqlite_script, run_migrations
+
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    for migration in sorted(f for f in os.listdir(MIGRATIONS_DIR) if f.endswith(".sql") and f < "0013"):
+        with open(os.path.join(MIGRATIONS_DIR, migration), encoding="utf-8") as f:
+            execute_sqlite_script(conn.cursor(), f.read())
+    conn.executescript("""
+        INSERT INTO words (id, spanish, english, parts) VALUES (1, 'hola', 'hello', '{}');
+        INSERT INTO groups (id, name) VALUES (1, 'Old');
+        INSERT INTO study_activities (id, name, launch_url) VALUES (1, 'Old', '/old');
+        INSERT INTO study_sessions (id, group_id, study_activity_id) VALUES (1, 1, 1);
+        INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (1, 1, 1), (1, 1, 0), (1, 1, 1);
+    """)
+    conn.commit()
+    assert "total_items" not in {row[1] for row in conn.execute("PRAGMA table_info(study_sessions)")}
+    conn.close()
+
+    # Dos veces: las migraciones se pueden repetir sobre la misma base
+    for _ in range(2):
+        with contextlib.redirect_stdout(io.StringIO()):
+            run_migrations(db_path)
+
+    conn = sqlite3.connect(db_path)
+    summary = conn.execute(
+        "SELECT correct_count, incorrect_count, total_items FROM study_sessions WHERE id = 1"
+    ).fetchone()
+    conn.close()
+    assert summary == (2, 1, 3)
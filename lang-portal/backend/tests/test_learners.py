@@ -0,0 +1,117 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import text
+
+from app import database
+from app.database import LearnerEngines
+
+# Las bases por alumno son ficheros SQLite que adjuntan la base compartida
+pytestmark = pytest.mark.sqlite_only
+
+
+@pytest.fixture
+def learners(tmp_path, monkeypatch, db_path):
+    """Activa el modo por alumno con el vocabulario de la base de pruebas."""
+    engines = LearnerEngines(str(tmp_path / "learners"), db_path, size=2)
+    monkeypatch.setattr(database, "learner_engines", engines)
+    yield engines
+    engines.dispose()
+
+
+def as_learner(learner_id):
+    return {"X-Learner-Id": learner_id}
+
+
+def test_learner_writes_go_to_their_own_database(client, learners, db_path):
+    """Las sesiones de un alumno se guardan en su base y solo él las ve"""
+    shared_sessions = client.get("/api/study-sessions").json()["pagination"]["total_items"]
+
+    response = client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1},
+                           headers=as_learner("ana"))
+    assert response.status_code == 200
+    session_id = response.json()["id"]
+    reviews = client.post(f"/api/study-sessions/{session_id}/reviews",
+                          json={"items": [{"word_id": 1, "correct": True}]}, headers=as_learner("ana"))
+    assert reviews.status_code == 200
+
+    ana = client.get("/api/study-sessions", headers=as_learner("ana")).json()
+    assert ana["pagination"]["total_items"] == 1
+    assert ana["study_sessions"][0]["group_name"] == "Test Group"
+    assert client.get("/api/study-sessions", headers=as_learner("luis")).json()["pagination"]["total_items"] == 0
+    assert client.get("/api/study-sessions").json()["pagination"]["total_items"] == shared_sessions
+
+    with sqlite3.connect(learners.path("ana")) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM word_review_items").fetchone()[0] == 1
+        # El vocabulario no se copia: se lee de la base compartida adjunta
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert "words" not in tables and "study_sessions" in tables
+
+
+def test_learner_reads_shared_vocabulary(client, learners):
+    """Palabras, grupos y búsqueda salen del vocabulario compartido"""
+    shared = client.get("/api/groups/1/words").json()
+    learner = client.get("/api/groups/1/words", headers=as_learner("ana")).json()
+    assert [word["spanish"] for word in learner["items"]] == [word["spanish"] for word in shared["items"]]
+    # Los contadores de repasos son los del alumno, que aún no ha repasado nada
+    assert all(word["correct_count"] == 0 and word["wrong_count"] == 0 for word in learner["items"])
+
+    search = client.get("/api/words/search?q=adios", headers=as_learner("ana")).json()
+    assert [word["spanish"] for word in search["items"]] == ["adiós"]
+
+    due = client.get("/api/groups/1/due-words", headers=as_learner("ana")).json()
+    assert len(due["items"]) == len(shared["items"])
+
+
+def test_learner_totals_count_shared_vocabulary(client, learners):
+    """Los totales de palabras y grupos salen del vocabulario compartido; los de estudio, del alumno"""
+    for path in ("/api/words", "/api/groups"):
+        shared = client.get(path).json()["pagination"]["total_items"]
+        assert shared > 0
+        assert client.get(path, headers=as_learner("ana")).json()["pagination"]["total_items"] == shared
+
+    session_id = client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1},
+                             headers=as_learner("ana")).json()["id"]
+    client.post(f"/api/study-sessions/{session_id}/reviews",
+                json={"items": [{"word_id": 1, "correct": True}]}, headers=as_learner("ana"))
+
+    shared = client.get("/api/dashboard").json()
+    dashboard = client.get("/api/dashboard", headers=as_learner("ana")).json()
+    assert dashboard["study_progress"]["total_available_words"] == shared["study_progress"]["total_available_words"]
+    assert dashboard["study_progress"]["total_words_studied"] == 1
+    assert dashboard["study_progress"]["mastery_percentage"] > 0
+    assert dashboard["quick_stats"]["total_study_sessions"] == 1
+    assert dashboard["quick_stats"]["total_active_groups"] == 1
+    assert dashboard["quick_stats"]["success_rate"] == 100
+
+
+def test_learner_cannot_write_shared_vocabulary(learners):
+    """La base compartida se adjunta en solo lectura"""
+    with learners.get("ana").write_sessions() as db:
+        with pytest.raises(Exception, match="readonly"):
+            db.execute(text("INSERT INTO words (spanish, english, parts) VALUES ('x', 'y', '{}')"))
+
+
+def test_learner_etags_differ_per_learner(client, learners):
+    """El mismo recurso tiene un ETag distinto para cada alumno"""
+    ana = client.get("/api/words", headers=as_learner("ana"))
+    luis = client.get("/api/words", headers=as_learner("luis"))
+    assert ana.headers["etag"] != luis.headers["etag"]
+    assert "X-Learner-Id" in ana.headers["vary"]
+    assert client.get("/api/words", headers={**as_learner("ana"), "If-None-Match": ana.headers["etag"]}).status_code == 304
+
+
+def test_invalid_learner_id_is_rejected(client, learners):
+    """El id de alumno no puede salir del directorio de datos"""
+    response = client.get("/api/words", headers=as_learner("../shared"))
+    assert response.status_code == 400
+
+
+def test_learner_engines_are_an_lru(learners):
+    """Al superar el tamaño se cierra el alumno usado hace más tiempo"""
+    first = learners.get("a")
+    learners.get("b")
+    learners.get("a")
+    learners.get("c")
+    assert learners.open_learners() == ["a", "c"]
+    assert learners.get("a") is first
@@ -0,0 +1,87 @@
+import re
+
+from sqlalchemy import event
+
+from app.database import read_engine
+from app.metrics import Histogram, registry, route_template
+
+
+def metric_value(body, name, **labels):
+    """Devuelve el valor de la serie `name` con exactamente esas etiquetas."""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}\{{{re.escape(label_text)}\}} (\S+)$", body, re.MULTILINE)
+    assert match, f"{name}{{{label_text}}} no está en /metrics"
+    return float(match.group(1))
+
+
+def test_metrics_group_requests_by_route_template(client):
+    """Las peticiones se agrupan por la plantilla de la ruta, con su código de estado"""
+    registry.clear()
+    client.get("/api/words/1")
+    client.get("/api/words/2")
+    client.get("/api/no-existe")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert metric_value(
+        body, "http_requests_total", method="GET", route="/api/words/{word_id}", status="200"
+    ) == 2
+    assert metric_value(body, "http_requests_total", method="GET", route="<unmatched>", status="404") == 1
+    assert "/api/words/1" not in body
+
+
+def test_metrics_count_queries_and_rows_per_request(client):
+    """Cada petición suma sus sentencias, filas leídas, tiempo de SQL y espera del pool"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    registry.clear()
+    event.listen(read_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        page = client.get("/api/groups/1/words", headers={"If-None-Match": "x"})
+    finally:
+        event.remove(read_engine, "before_cursor_execute", before_cursor_execute)
+    assert page.status_code == 200
+
+    body = client.get("/metrics").text
+    labels = {"method": "GET", "route": "/api/groups/{group_id}/words"}
+    assert metric_value(body, "db_queries_per_request_sum", **labels) == len(statements)
+    assert metric_value(body, "db_queries_per_request_count", **labels) == 1
+    # Al menos las filas de la página (más la de table_versions)
+    assert metric_value(body, "db_rows_per_request_sum", **labels) >= len(page.json()["items"])
+    assert metric_value(body, "db_sql_seconds_per_request_sum", **labels) > 0
+    assert metric_value(body, "db_pool_wait_seconds_per_request_count", **labels) == 1
+    assert metric_value(body, "http_request_duration_seconds_count", **labels) == 1
+
+
+def test_histogram_buckets_are_cumulative():
+    """Los buckets se publican acumulados, con +Inf igual al total"""
+    histogram = Histogram((1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+
+    lines = []
+    histogram.render("demo", 'route="/x"', lines)
+    assert lines == [
+        'demo_bucket{route="/x",le="1"} 2',
+        'demo_bucket{route="/x",le="5"} 3',
+        'demo_bucket{route="/x",le="+Inf"} 4',
+        'demo_sum{route="/x"} 14.5',
+        'demo_count{route="/x"} 4',
+    ]
+
+
+def test_route_template_includes_router_prefix():
+    """La plantilla incluye el prefijo con el que se montó el router"""
+    class Route:
+        def __init__(self, path):
+            self.path = path
+
+    assert route_template({"path": "/api/words/7", "route": Route("/words/{word_id}")}) == "/api/words/{word_id}"
+    assert route_template({"path": "/api", "route": Route("")}) == "/api"
+    assert route_template({"path": "/metrics", "route": Route("/metrics")}) == "/metrics"
+    assert route_template({"path": "/otra"}) == "<unmatched>"
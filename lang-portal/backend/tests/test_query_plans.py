@@ -0,0 +1,128 @@
+"""
+Pruebas de regresión de planes de consulta.
+
+Cada endpoint se ejecuta contra la base de datos de pruebas mientras se
+capturan las sentencias SQL que emite; después se pasa cada una por
+`EXPLAIN QUERY PLAN` y se falla si alguna recorre (SCAN) una de las tablas que
+crecen con el uso, también si lo hace sobre un índice: un agregado que recorre
+un índice entero sigue creciendo con la tabla. Solo se acepta el recorrido en
+orden de un índice (o de la clave primaria) en las sentencias con ORDER BY ...
+LIMIT, que lo cortan en cuanto tienen sus filas: fuera de una subconsulta
+escalar (un total) y sin un `USE TEMP B-TREE FOR ORDER BY`, que indicaría que
+se lee todo para ordenarlo después.
+"""
+
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app.database import engine, read_engine
+from app.pagination import encode_cursor
+
+# Los planes se leen con EXPLAIN QUERY PLAN de SQLite
+pytestmark = pytest.mark.sqlite_only
+
+# Tablas que crecen con el historial de estudio (y los grupos, que se listan
+# ordenados por índice)
+LARGE_TABLES = {"word_review_items", "word_groups", "study_sessions", "groups", "word_schedules",
+                "words", "word_stats"}
+
+SESSION_CURSOR = encode_cursor(["9999-12-31 00:00:00", 1000000])
+
+ENDPOINTS = [
+    "/api/dashboard",
+    "/api/dashboard/last_study_session",
+    "/api/dashboard/study_progress",
+    "/api/dashboard/quick_stats",
+    "/api/stats/daily",
+    "/api/words",
+    f"/api/words?cursor={encode_cursor([0])}",
+    "/api/words/1",
+    "/api/words/search?q=ho",
+    f"/api/words/search?q=ho&cursor={encode_cursor([0.0, 0])}",
+    "/api/groups",
+    "/api/groups?sort_by=words_count&order=desc&min_words=1",
+    f"/api/groups?cursor={encode_cursor(['', 0])}",
+    "/api/groups/1",
+    "/api/groups/1/words",
+    f"/api/groups/1/words?cursor={encode_cursor([0])}",
+    "/api/groups/1/due-words",
+    "/api/groups/1/study-sessions",
+    f"/api/groups/1/study-sessions?cursor={SESSION_CURSOR}",
+    "/api/study-activities/1/study-sessions",
+    f"/api/study-activities/1/study-sessions?cursor={SESSION_CURSOR}",
+    "/api/study-sessions",
+    f"/api/study-sessions?cursor={SESSION_CURSOR}",
+    "/api/study-sessions/1",
+    "/api/study-sessions/1/words",
+    f"/api/study-sessions/1/words?cursor={encode_cursor(['0000-01-01 00:00:00', 0])}",
+]
+
+TABLE_REFERENCE = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+TABLE_SCAN = re.compile(r"^SCAN (\w+)( USING (?:COVERING )?INDEX \w+)?")
+ORDER_BY_LIMIT = re.compile(r"\bORDER BY\b.*\bLIMIT\b", re.IGNORECASE | re.DOTALL)
+
+
+def capture_statements(client, path):
+    """Ejecuta `path` y devuelve las sentencias SQL (con parámetros) que emitió."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    for target in (engine, read_engine):
+        event.listen(target, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(path)
+    finally:
+        for target in (engine, read_engine):
+            event.remove(target, "before_cursor_execute", before_cursor_execute)
+
+    assert response.status_code == 200, response.text
+    return statements
+
+
+def scanned_large_tables(statement, parameters):
+    """Devuelve las tablas grandes que el plan recorre sin usar un índice."""
+    aliases = {}
+    for table, alias in TABLE_REFERENCE.findall(statement):
+        aliases[table] = table
+        if alias and alias.upper() not in {"ON", "WHERE", "JOIN", "LEFT", "GROUP", "ORDER", "LIMIT", "CROSS"}:
+            aliases[alias] = table
+
+    with read_engine.connect() as conn:
+        plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+
+    parents = {row.id: row.parent for row in plan}
+    details = {row.id: row.detail for row in plan}
+
+    def in_scalar_subquery(row):
+        parent = row.parent
+        while parent:
+            if "SCALAR SUBQUERY" in details.get(parent, ""):
+                return True
+            parent = parents.get(parent)
+        return False
+
+    ordered_walk = (ORDER_BY_LIMIT.search(statement) is not None
+                    and not any("USE TEMP B-TREE FOR ORDER BY" in row.detail for row in plan))
+    scanned = []
+    for row in plan:
+        match = TABLE_SCAN.match(row.detail)
+        if not match or aliases.get(match.group(1), match.group(1)) not in LARGE_TABLES:
+            continue
+        if ordered_walk and not in_scalar_subquery(row):
+            continue
+        scanned.append(row.detail)
+    return scanned
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_endpoint_does_not_scan_large_tables(client, path):
+    statements = capture_statements(client, path)
+    assert statements
+
+    for statement, parameters in statements:
+        scans = scanned_large_tables(statement, parameters)
+        assert not scans, f"{path} scans {scans} in:\n{statement}"
@@ -0,0 +1,172 @@
+import json
+import logging
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app import database, review_buffer
+from app.main import app
+from app.review_buffer import ReviewBuffer
+
+
+@pytest.fixture
+def buffer(monkeypatch):
+    """Buffer que solo se vuelca a mano (o al llenarse con 3 repasos)."""
+    buffer = ReviewBuffer(size=3, flush_ms=60_000)
+    monkeypatch.setattr(review_buffer, "review_buffer", buffer)
+    return buffer
+
+
+@pytest.fixture
+def buffered_client(buffer):
+    # Con el bloque with se ejecuta el lifespan, que arranca y para el buffer
+    with TestClient(app) as client:
+        yield client
+
+
+def new_session(client):
+    return client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1}).json()["id"]
+
+
+def stored_reviews(test_db, session_id):
+    test_db.rollback()
+    return test_db.execute(
+        text("SELECT COUNT(*) FROM word_review_items WHERE study_session_id = :id"), {"id": session_id}
+    ).scalar()
+
+
+def test_buffered_reviews_are_acknowledged_before_they_are_written(buffered_client, buffer, test_db):
+    """El lote se acepta con 202 y el detalle de la sesión ya lo cuenta antes del volcado"""
+    session_id = new_session(buffered_client)
+    response = buffered_client.post(f"/api/study-sessions/{session_id}/reviews", json={"items": [
+        {"word_id": 1, "correct": True},
+        {"word_id": 2, "correct": False},
+    ]})
+    assert response.status_code == 202
+    assert response.json() == {"study_session_id": session_id, "queued": 2}
+    assert stored_reviews(test_db, session_id) == 0
+
+    detail = buffered_client.get(f"/api/study-sessions/{session_id}").json()
+    assert (detail["review_items_count"], detail["correct_count"], detail["incorrect_count"]) == (2, 1, 1)
+
+    buffered_client.portal.call(buffer.flush)
+    assert stored_reviews(test_db, session_id) == 2
+    assert not buffer.has_unflushed(session_id)
+    assert buffered_client.get(f"/api/study-sessions/{session_id}").json() == detail
+
+
+def test_buffer_flushes_when_full(buffered_client, buffer, test_db):
+    """Al llegar a `size` repasos se vuelcan todos en una transacción"""
+    session_id = new_session(buffered_client)
+    for word_id in (1, 2, 1):
+        response = buffered_client.post(f"/api/study-sessions/{session_id}/reviews",
+                                        json={"items": [{"word_id": word_id, "correct": True}]})
+        assert response.status_code == 202
+
+    deadline = time.monotonic() + 5
+    while buffer.flushes == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert buffer.flushes == 1
+    assert stored_reviews(test_db, session_id) == 3
+
+
+def test_buffer_flushes_on_shutdown(buffer, test_db):
+    """Al parar la aplicación se vuelca lo pendiente"""
+    with TestClient(app) as client:
+        session_id = new_session(client)
+        client.post(f"/api/study-sessions/{session_id}/reviews", json={"items": [{"word_id": 1, "correct": True}]})
+        assert stored_reviews(test_db, session_id) == 0
+
+    assert stored_reviews(test_db, session_id) == 1
+    assert not buffer.running
+
+
+def test_buffered_reviews_are_still_validated(buffered_client, buffer):
+    """Las sesiones y palabras desconocidas se rechazan antes de encolar"""
+    assert buffered_client.post("/api/study-sessions/9999/reviews",
+                                json={"items": [{"word_id": 1, "correct": True}]}).status_code == 404
+    response = buffered_client.post("/api/study-sessions/1/reviews",
+                                    json={"items": [{"word_id": 9999, "correct": True}]})
+    assert response.status_code == 422
+    assert not buffer.has_unflushed(1)
+
+
+def test_failed_flush_is_retried(buffered_client, buffer, test_db, monkeypatch):
+    """Si el volcado falla (p. ej. un lock que no llega), los repasos vuelven a la cola y se escriben después"""
+    session_id = new_session(buffered_client)
+    buffered_client.post(f"/api/study-sessions/{session_id}/reviews", json={"items": [
+        {"word_id": 1, "correct": True},
+        {"word_id": 2, "correct": False},
+    ]})
+
+    write_session = database.write_session
+    failures = []
+
+    def failing_write_session():
+        if not failures:
+            failures.append(True)
+            raise OperationalError("BEGIN IMMEDIATE", {}, Exception("database is locked"))
+        return write_session()
+
+    monkeypatch.setattr(database, "write_session", failing_write_session)
+    assert buffered_client.portal.call(buffer.flush) is False
+    assert buffer.retries == 1
+    assert stored_reviews(test_db, session_id) == 0
+    # Siguen pendientes: el detalle de la sesión todavía los cuenta
+    assert buffered_client.get(f"/api/study-sessions/{session_id}").json()["review_items_count"] == 2
+
+    assert buffered_client.portal.call(buffer.flush) is True
+    assert stored_reviews(test_db, session_id) == 2
+    assert not buffer.has_unflushed(session_id)
+    assert buffer.dropped == 0
+
+
+def test_invalid_buffered_reviews_go_to_dead_letter(buffered_client, buffer, test_db, caplog):
+    """Un lote que ya no se puede escribir (su sesión se ha borrado) se descarta y se registra"""
+    session_id = new_session(buffered_client)
+    buffered_client.post(f"/api/study-sessions/{session_id}/reviews",
+                         json={"items": [{"word_id": 1, "correct": True}]})
+    test_db.execute(text("DELETE FROM study_sessions WHERE id = :id"), {"id": session_id})
+    test_db.commit()
+
+    with caplog.at_level(logging.ERROR, logger="app.review_buffer.dead_letter"):
+        assert buffered_client.portal.call(buffer.flush) is True
+    assert buffer.dropped == 1
+    assert not buffer.has_unflushed(session_id)
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["study_session_id"] == session_id
+    assert record["items"][0]["word_id"] == 1
+    assert "review_buffer_dropped_total 1" in buffered_client.get("/metrics").text
+
+
+def test_full_buffer_rejects_new_batches(buffered_client, buffer, test_db, monkeypatch):
+    """Mientras la base falla lo pendiente no crece sin límite: al llenarse se responde 503"""
+    monkeypatch.setattr(buffer, "max_pending", 2)
+    session_id = new_session(buffered_client)
+    review = {"items": [{"word_id": 1, "correct": True}]}
+
+    write_session = database.write_session
+
+    def failing_write_session():
+        raise OperationalError("BEGIN IMMEDIATE", {}, Exception("database is locked"))
+
+    monkeypatch.setattr(database, "write_session", failing_write_session)
+    for _ in range(2):
+        assert buffered_client.post(f"/api/study-sessions/{session_id}/reviews", json=review).status_code == 202
+    assert buffered_client.portal.call(buffer.flush) is False
+
+    response = buffered_client.post(f"/api/study-sessions/{session_id}/reviews", json=review)
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+    assert buffer.rejected == 1
+    assert buffered_client.get(f"/api/study-sessions/{session_id}").json()["review_items_count"] == 2
+
+    # Al volver la base se vuelca lo pendiente y se aceptan lotes otra vez
+    monkeypatch.setattr(database, "write_session", write_session)
+    assert buffered_client.portal.call(buffer.flush) is True
+    assert stored_reviews(test_db, session_id) == 2
+    assert buffered_client.post(f"/api/study-sessions/{session_id}/reviews", json=review).status_code == 202
+    assert "review_buffer_rejected_total 1" in buffered_client.get("/metrics").text
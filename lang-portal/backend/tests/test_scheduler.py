@@ -0,0 +1,37 @@
+from app.scheduler import MIN_EASE, ScheduleState, schedule_review
+
+
+def review_sequence(results, start="2025-03-01 10:00:00"):
+    """Aplica una secuencia de aciertos/fallos, cada uno el día en que toca."""
+    state = ScheduleState()
+    reviewed_at = start
+    for correct in results:
+        state = schedule_review(state, correct, reviewed_at)
+        reviewed_at = state.next_review_at
+    return state
+
+
+def test_intervals_grow_with_correct_reviews():
+    """1 día, 6 días y después intervalo * facilidad"""
+    assert review_sequence([True]).interval_days == 1
+    assert review_sequence([True, True]).interval_days == 6
+    third = review_sequence([True, True, True])
+    assert third.interval_days == 15
+    assert third.repetitions == 3
+    assert third.ease == 2.5
+
+
+def test_failure_resets_repetitions_and_lowers_ease():
+    """Un fallo vuelve a empezar los intervalos y reduce la facilidad"""
+    state = review_sequence([True, True, False])
+    assert state.repetitions == 0
+    assert state.interval_days == 1
+    assert state.ease == 1.96
+
+    assert review_sequence([False] * 10).ease == MIN_EASE
+
+
+def test_next_review_at_is_relative_to_review_time():
+    state = schedule_review(ScheduleState(), True, "2025-03-01 23:30:00")
+    assert state.next_review_at == "2025-03-02 23:30:00"
+    assert state.last_reviewed_at == "2025-03-01 23:30:00"
@@ -0,0 +1,136 @@
+"""
+Pruebas del seeder incremental (`seed_data.py`).
+
+Cada prueba carga un directorio de semillas propio en una base de datos
+temporal creada con las migraciones, sin tocar la base de datos de pruebas.
+"""
+
+import contextlib
+import io
+import json
+import sqlite3
+
+import pytest
+
+import seed_data
+from init_db import run_migrations
+
+
+@pytest.fixture
+def seed_db(tmp_path):
+    path = str(tmp_path / "seed.db")
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_migrations(path)
+    return path
+
+
+def write_json(directory, name, data):
+    (directory / name).write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding="utf-8")
+
+
+def run(db_path, seeds_dir):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return seed_data.run_seed(db_path, str(seeds_dir))
+
+
+def test_iter_records_reads_categories_across_chunks(tmp_path):
+    """El parser incremental devuelve lo mismo aunque los valores crucen bloques"""
+    words = {
+        "food": [{"spanish": "manzana", "english": "apple", "parts": {"n": 12345}}],
+        "colors": [{"spanish": "rojo", "english": "red"}, {"spanish": "azul", "english": "blue"}],
+        "empty": [],
+    }
+    write_json(tmp_path, "words.json", words)
+    path = str(tmp_path / "words.json")
+
+    expected = [(category, word) for category, items in words.items() for word in items]
+    for chunk_size in (1, 3, 7, 1 << 20):
+        assert list(seed_data.iter_records(path, chunk_size)) == expected
+
+
+def test_iter_records_reads_arrays_and_jsonl(tmp_path):
+    """Se aceptan arrays JSON y JSONL con categoría opcional"""
+    write_json(tmp_path, "groups.json", [{"id": 1, "name": "A"}, {"id": 22, "name": "B"}])
+    assert list(seed_data.iter_records(str(tmp_path / "groups.json"), 4)) == [
+        (None, {"id": 1, "name": "A"}),
+        (None, {"id": 22, "name": "B"}),
+    ]
+
+    (tmp_path / "words.jsonl").write_text(
+        '{"spanish": "uno", "english": "one", "category": "numbers"}\n\n{"spanish": "sí", "english": "yes"}\n',
+        encoding="utf-8"
+    )
+    assert [category for category, _ in seed_data.iter_records(str(tmp_path / "words.jsonl"))] == ["numbers", None]
+
+
+def test_seed_maps_categories_to_groups(seed_db, tmp_path):
+    """Las categorías de words.json se convierten en grupos con sus enlaces"""
+    write_json(tmp_path, "groups.json", [{"id": 1, "name": "food"}, {"id": 2, "name": "Basics"}])
+    write_json(tmp_path, "words.json", {
+        "food": [{"spanish": "pan", "english": "bread"}, {"spanish": "leche", "english": "milk"}],
+        "colors": [{"spanish": "rojo", "english": "red"}],
+    })
+    # El enlace a la palabra 99 no existe y se descarta; el repetido se deduplica
+    write_json(tmp_path, "word_groups.json", [
+        {"word_id": 3, "group_id": 2}, {"word_id": 3, "group_id": 2}, {"word_id": 99, "group_id": 2}
+    ])
+    write_json(tmp_path, "study_activities.json", [
+        {"id": 1, "name": "Quiz", "description": "Quiz", "launch_url": "http://example.com"}
+    ])
+    write_json(tmp_path, "study_sessions.json", [
+        {"id": 1, "group_id": 1, "study_activity_id": 1, "created_at": "2025-02-15T15:00:00"}
+    ])
+    write_json(tmp_path, "word_review_items.json", [
+        {"word_id": 1, "study_session_id": 1, "correct": True, "created_at": "2025-02-15T15:01:00"},
+        {"word_id": 1, "study_session_id": 1, "correct": False, "created_at": "2025-02-15T15:02:00"},
+    ])
+
+    report = run(seed_db, tmp_path)
+    assert dict((table, count) for table, count, _ in report.tables)["word_groups"] == 2
+
+    conn = sqlite3.connect(seed_db)
+    try:
+        groups = conn.execute("SELECT id, name, words_count FROM groups ORDER BY id").fetchall()
+        assert groups == [(1, "food", 2), (2, "Basics", 1), (3, "colors", 1)]
+
+        links = conn.execute("SELECT group_id, word_id FROM word_groups ORDER BY group_id, word_id").fetchall()
+        assert links == [(1, 1), (1, 2), (2, 3), (3, 3)]
+
+        assert conn.execute("SELECT word_id, correct_count, wrong_count FROM word_stats").fetchall() == [(1, 1, 1)]
+        assert conn.execute("SELECT created_at FROM study_sessions").fetchone()[0] == "2025-02-15 15:00:00"
+        assert conn.execute("SELECT * FROM study_daily_stats").fetchall() == [("2025-02-15", 1, 2, 1, 1, 1)]
+    finally:
+        conn.close()
+
+
+def test_seed_restores_indexes_and_triggers(seed_db, tmp_path):
+    """Los índices y triggers eliminados durante la carga se recrean al final"""
+    def schema():
+        conn = sqlite3.connect(seed_db)
+        try:
+            return conn.execute("""
+                SELECT type, name, sql FROM sqlite_master
+                WHERE type IN ('index', 'trigger') ORDER BY type, name
+            """).fetchall()
+        finally:
+            conn.close()
+
+    before = schema()
+    (tmp_path / "words.jsonl").write_text(
+        "".join(json.dumps({"spanish": f"p{i}", "english": f"w{i}", "category": "c"}) + "\n" for i in range(50)),
+        encoding="utf-8"
+    )
+    run(seed_db, tmp_path)
+    assert schema() == before
+
+    # Con los triggers de vuelta, las escrituras posteriores vuelven a versionarse
+    conn = sqlite3.connect(seed_db)
+    try:
+        version = "SELECT version FROM table_versions WHERE table_name = 'words'"
+        before_insert = conn.execute(version).fetchone()[0]
+        conn.execute("INSERT INTO words (spanish, english, parts) VALUES ('nuevo', 'new', '{}')")
+        conn.commit()
+        assert conn.execute(version).fetchone()[0] == before_insert + 1
+        assert conn.execute("SELECT words_count FROM groups WHERE id = 1").fetchone()[0] == 50
+    finally:
+        conn.close()
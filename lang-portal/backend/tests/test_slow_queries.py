@@ -0,0 +1,101 @@
+import sqlite3
+
+import pytest
+
+from app.database import read_engine, slow_query_log
+from app.slow_queries import SlowQueryLog, explain, normalize_sql, parameter_shape
+
+
+@pytest.fixture
+def log_everything():
+    """Baja el umbral para que todas las sentencias cuenten como lentas."""
+    threshold = slow_query_log.threshold_ms
+    slow_query_log.threshold_ms = 0.000001
+    slow_query_log.clear()
+    yield slow_query_log
+    slow_query_log.threshold_ms = threshold
+    slow_query_log.clear()
+
+
+def test_normalize_sql_collapses_literals_and_lists():
+    """Las sentencias que solo difieren en literales o en la longitud de un IN comparten forma"""
+    first = normalize_sql("SELECT *\n  FROM words WHERE id IN (?, ?, ?) AND spanish = 'hola' LIMIT 10")
+    second = normalize_sql("SELECT * FROM words WHERE id IN (?) AND spanish = 'adiós' LIMIT 25")
+    assert first == "SELECT * FROM words WHERE id IN (?, ...) AND spanish = ? LIMIT ?"
+    assert second == "SELECT * FROM words WHERE id IN (?) AND spanish = ? LIMIT ?"
+    assert normalize_sql("SELECT word_stats.correct_count FROM t2") == "SELECT word_stats.correct_count FROM t2"
+
+
+def test_parameter_shape_keeps_types_not_values():
+    """Se guardan los tipos de los parámetros, nunca sus valores"""
+    assert parameter_shape((1, "hola", None)) == "(int, str, NoneType)"
+    assert parameter_shape({"id": 3}) == "{id: int}"
+    assert parameter_shape(tuple(range(20))) == "(int x 20)"
+    assert parameter_shape([(1, True), (2, False)], executemany=True) == "2 x (int, bool)"
+
+
+def test_slow_queries_are_logged_once_per_shape_with_plan(client, log_everything):
+    """Cada forma se registra una vez, con la ruta que la lanzó y su plan"""
+    client.get("/api/words/1")
+    client.get("/api/words/2")
+
+    response = client.get("/api/admin/slow-queries")
+    assert response.status_code == 200
+    data = response.json()
+    entries = [entry for entry in data["queries"] if entry["route"] == "/api/words/{word_id}"]
+    assert len(entries) == 1
+    entry = entries[0]
+    assert entry["count"] == 2
+    assert entry["max_ms"] >= entry["duration_ms"] > 0
+    # sqlite3 recibe los parámetros como tupla; psycopg, con su nombre
+    assert "FROM words" in entry["sql"] and entry["params"] in ("(int)", "{word_id: int}")
+    if read_engine.dialect.name == "sqlite":
+        assert entry["plan"][0].startswith("SEARCH w USING INTEGER PRIMARY KEY")
+    else:
+        assert any("words_pkey" in step for step in entry["plan"])
+
+    assert client.delete("/api/admin/slow-queries").status_code == 204
+    remaining = client.get("/api/admin/slow-queries").json()["queries"]
+    assert all(entry["route"] != "/api/words/{word_id}" for entry in remaining)
+
+
+def test_slow_query_log_evicts_oldest_shape():
+    """El registro es un buffer circular: al llenarse sale la forma más antigua"""
+    connection = sqlite3.connect(":memory:")
+    cursor = connection.cursor()
+    log = SlowQueryLog(threshold_ms=1, size=2)
+    for table in ("sqlite_master", "sqlite_schema", "pragma_table_list"):
+        log.record(cursor, f"SELECT * FROM {table}", (), False, 5.0)
+
+    entries = log.entries()
+    assert [entry["sql"] for entry in entries] == [
+        "SELECT * FROM pragma_table_list",
+        "SELECT * FROM sqlite_schema",
+    ]
+    assert entries[0]["plan"] and entries[0]["route"] is None
+    connection.close()
+
+
+def test_slow_query_log_keeps_recurring_shapes():
+    """Una forma que se repite pasa a ser la más reciente y no es la que se descarta"""
+    connection = sqlite3.connect(":memory:")
+    cursor = connection.cursor()
+    log = SlowQueryLog(threshold_ms=1, size=2)
+    for table in ("sqlite_master", "sqlite_schema", "sqlite_master", "pragma_table_list"):
+        log.record(cursor, f"SELECT * FROM {table}", (), False, 5.0)
+
+    assert [entry["sql"] for entry in log.entries()] == [
+        "SELECT * FROM pragma_table_list",
+        "SELECT * FROM sqlite_master",
+    ]
+    connection.close()
+
+
+def test_failed_explain_keeps_the_transaction_usable():
+    """Un EXPLAIN que falla no deja abortada la transacción de la consulta (PostgreSQL)"""
+    with read_engine.connect() as conn:
+        assert conn.exec_driver_sql("SELECT 1").scalar() == 1
+        cursor = conn.connection.dbapi_connection.cursor()
+        plan = explain(cursor, "SELECT * FROM no_such_table", (), False)
+        assert plan[0].startswith("EXPLAIN falló")
+        assert conn.exec_driver_sql("SELECT 2").scalar() == 2
@@ -0,0 +1,90 @@
+from sqlalchemy import Integer, String
+
+from app import statements
+from app.database import read_engine
+from app.statements import statement_cache
+
+# Una petición por cada sentencia del router, con y sin cursor ni total
+ENDPOINTS = [
+    "/api/words",
+    "/api/words?include_total=false&cursor=WzFd",
+    "/api/words/1",
+    "/api/words/search?q=adios",
+    "/api/groups",
+    "/api/groups?sort_by=words_count&order=desc&min_words=1",
+    "/api/groups/1",
+    "/api/groups/1/words",
+    "/api/groups/1/due-words",
+    "/api/groups/1/study-sessions",
+    "/api/study-activities",
+    "/api/study-activities/1",
+    "/api/study-activities/1/study-sessions",
+    "/api/study-sessions",
+    "/api/study-sessions/1",
+    "/api/study-sessions/1/words",
+    "/api/stats/daily",
+]
+
+
+def request_all(client):
+    for path in ENDPOINTS:
+        # If-None-Match que no coincide: la respuesta sale siempre de la base
+        response = client.get(path, headers={"If-None-Match": "x"})
+        assert response.status_code == 200, (path, response.text)
+
+
+def test_statement_variants_are_built_once():
+    """Cada variante de una sentencia es siempre el mismo objeto, con sus parámetros tipados"""
+    assert statements.study_sessions_page("group", True, False) is statements.study_sessions_page("group", True, False)
+    assert statements.study_sessions_page("group", True, False) is not statements.study_sessions_page(None, True, False)
+
+    params = statements.study_sessions_page("activity", False, True)._bindparams
+    assert isinstance(params["activity_id"].type, Integer)
+    assert isinstance(params["limit"].type, Integer)
+    assert isinstance(params["after_created_at"].type, String)
+    assert "group_id" not in params
+
+
+def test_repeated_requests_hit_compiled_cache_and_prepared_mirror(client):
+    """
+    Tras la primera petición, cada sentencia sale compilada de la caché de
+    SQLAlchemy y está en el espejo del LRU de sentencias preparadas.
+
+    sqlite3 no expone su caché de sentencias preparadas: la tasa "prepared"
+    es la de un LRU que reproduce el suyo (mismo tamaño, indexado por el texto
+    SQL), no una medida de la caché real.
+    """
+    request_all(client)
+    statement_cache.clear()
+    request_all(client)
+
+    stats = client.get("/api/admin/statement-cache").json()
+    assert stats["compiled"]["misses"] == 0
+    assert stats["compiled"]["hits"] > len(ENDPOINTS)
+    assert stats["compiled"]["hit_rate"] == 1.0
+    if read_engine.dialect.name == "sqlite":
+        assert stats["prepared"]["hits"] > len(ENDPOINTS)
+        assert stats["prepared"]["hit_rate"] == 1.0
+
+
+def test_review_writes_hit_compiled_cache(client):
+    """Las sentencias de la ruta de escritura de repasos también se compilan una sola vez"""
+    session_id = client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1}).json()["id"]
+    review = {"items": [{"word_id": 1, "correct": True}]}
+    assert client.post(f"/api/study-sessions/{session_id}/reviews", json=review).status_code == 200
+    statement_cache.clear()
+    assert client.post(f"/api/study-sessions/{session_id}/reviews", json=review).status_code == 200
+
+    stats = client.get("/api/admin/statement-cache").json()
+    assert stats["compiled"]["hits"] > 0
+    assert stats["compiled"]["misses"] == 0
+
+
+def test_statement_cache_counters_in_metrics(client):
+    """Los aciertos y fallos de las dos cachés también se publican en /metrics"""
+    statement_cache.clear()
+    client.get("/api/words/1")
+
+    body = client.get("/metrics").text
+    assert 'db_statement_cache_total{cache="compiled",result="hit"}' in body
+    assert 'db_statement_cache_total{cache="prepared",result="miss"}' in body
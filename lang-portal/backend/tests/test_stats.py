@@ -0,0 +1,70 @@
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from app.stats import build_daily_rows, count_by_day, local_today
+
+
+def test_days_are_bucketed_in_the_configured_timezone():
+    """Un repaso a las 03:00 UTC pertenece al día anterior en Ciudad de México"""
+    counts = count_by_day(
+        ["2025-03-01 03:00:00"],
+        [(True, "2025-03-01 03:30:00"), (False, "2025-03-01 12:00:00")],
+        zone=ZoneInfo("America/Mexico_City")
+    )
+    assert dict(counts) == {"2025-02-28": [1, 1, 1, 0], "2025-03-01": [0, 1, 0, 1]}
+
+    assert dict(count_by_day([], [(True, "2025-03-01T03:30:00")], zone=ZoneInfo("UTC"))) == {
+        "2025-03-01": [0, 1, 1, 0]
+    }
+
+
+def test_build_daily_rows_computes_streaks():
+    """La racha de cada día cuenta los días activos seguidos que terminan en él"""
+    counts = {day: [1, 0, 0, 0] for day in ["2025-03-01", "2025-03-02", "2025-03-03", "2025-03-05", "2025-03-06"]}
+    assert [row[-1] for row in build_daily_rows(counts)] == [1, 2, 3, 1, 2]
+
+
+def review_on(client, session_id, day):
+    response = client.post(f"/api/study-sessions/{session_id}/reviews", json={"items": [
+        {"word_id": 1, "correct": True, "created_at": f"{day.isoformat()}T12:00:00Z"},
+        {"word_id": 2, "correct": False, "created_at": f"{day.isoformat()}T12:00:00Z"},
+    ]})
+    assert response.status_code == 200
+
+
+def test_daily_stats_and_streaks_follow_writes(client):
+    """El resumen diario se mantiene en cada escritura, también fuera de orden"""
+    today = local_today()
+    session_id = client.post("/api/study-activities", json={"group_id": 1, "study_activity_id": 1}).json()["id"]
+
+    review_on(client, session_id, today - timedelta(days=20))
+    review_on(client, session_id, today - timedelta(days=22))
+
+    path = f"/api/stats/daily?from={today - timedelta(days=22)}&to={today - timedelta(days=20)}"
+    data = client.get(path).json()
+    assert [day["reviews"] for day in data["days"]] == [2, 0, 2]
+    assert data["days"][0] == {
+        "date": (today - timedelta(days=22)).isoformat(),
+        "sessions": 0, "reviews": 2, "correct_count": 1, "incorrect_count": 1
+    }
+    longest_before = data["longest_streak"]
+
+    # Rellenar el hueco une las dos rachas en una de tres días
+    review_on(client, session_id, today - timedelta(days=21))
+    data = client.get(path).json()
+    assert [day["reviews"] for day in data["days"]] == [2, 2, 2]
+    assert data["longest_streak"] == max(longest_before, 3)
+
+    # Hoy hay actividad (la sesión creada), así que la racha actual la incluye
+    assert data["current_streak"] >= 1
+    assert client.get("/api/dashboard/quick_stats").json()["study_streak_days"] == data["current_streak"]
+
+
+def test_daily_stats_defaults_and_validation(client):
+    data = client.get("/api/stats/daily").json()
+    assert len(data["days"]) == 30
+    assert data["end_date"] == local_today().isoformat()
+    assert data["timezone"] == "UTC"
+
+    assert client.get("/api/stats/daily?from=2025-03-02&to=2025-03-01").status_code == 422
+    assert client.get("/api/stats/daily?from=2000-01-01&to=2025-03-01").status_code == 422